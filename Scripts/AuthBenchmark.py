@@ -0,0 +1,104 @@
+# Arquivo: Scripts/AuthBenchmark.py
+#
+# Microbenchmark do custo de autenticação por requisição:
+#
+#   python Scripts/AuthBenchmark.py --iterations 20000
+#
+# Compara a decodificação completa do JWT (python-jose) com a verificação via
+# cache de tokens, isoladamente e dentro de uma rota protegida (ASGI em processo).
+
+import os
+import sys
+import time
+import argparse
+import statistics
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+import auth_utils
+from auth_utils import VerifiedTokenCache, create_access_token, decode_token, get_current_user, verify_token
+from models import AuthenticatedUser
+
+
+def timeCall(func, iterations: int) -> float:
+    """Tempo médio por chamada, em microssegundos (melhor de 3 rodadas)."""
+    rounds = []
+    for _ in range(3):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            func()
+        rounds.append((time.perf_counter() - start) / iterations * 1e6)
+    return min(rounds)
+
+
+def timeRequests(client, path: str, headers, iterations: int) -> float:
+    """Mediana da latência de uma rota, em microssegundos."""
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        response = client.get(path, headers=headers)
+        samples.append((time.perf_counter() - start) * 1e6)
+        assert response.status_code == 200, response.text
+    return statistics.median(samples)
+
+
+def buildApp():
+    from fastapi import Depends, FastAPI
+
+    app = FastAPI()
+
+    @app.get("/protected")
+    async def protected(user: AuthenticatedUser = Depends(get_current_user)):
+        return {"username": user.username}
+
+    @app.get("/public")
+    async def public():
+        return {"username": None}
+
+    return app
+
+
+def runBenchmark(iterations: int, requests: int):
+    from fastapi.testclient import TestClient
+
+    token = create_access_token({"username": "admin"})
+    headers = {"Authorization": f"Bearer {token}"}
+    client = TestClient(buildApp())
+
+    results = {}
+    results["create_access_token"] = timeCall(lambda: create_access_token({"username": "admin"}), iterations // 10 or 1)
+    results["jose_decode"] = timeCall(lambda: decode_token(token), iterations)
+
+    cachedCache = auth_utils.TOKEN_CACHE
+    verify_token(token)
+    results["verify_token_cached"] = timeCall(lambda: verify_token(token), iterations)
+
+    results["request_public"] = timeRequests(client, "/public", {}, requests)
+
+    # Rota protegida com o cache desligado (decodificação completa a cada requisição)
+    auth_utils.TOKEN_CACHE = VerifiedTokenCache(max_entries=0)
+    try:
+        results["request_protected_uncached"] = timeRequests(client, "/protected", headers, requests)
+    finally:
+        auth_utils.TOKEN_CACHE = cachedCache
+
+    results["request_protected_cached"] = timeRequests(client, "/protected", headers, requests)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Microbenchmark da autenticação JWT")
+    parser.add_argument("--iterations", type=int, default=20000, help="Chamadas por medição isolada")
+    parser.add_argument("--requests", type=int, default=2000, help="Requisições por medição na rota")
+    args = parser.parse_args()
+
+    results = runBenchmark(args.iterations, args.requests)
+    for name, micros in results.items():
+        print(f"{name:<30} {micros:>10.2f} µs")
+
+    print(
+        f"Overhead da autenticação por requisição: "
+        f"{results['request_protected_uncached'] - results['request_public']:.1f} µs sem cache, "
+        f"{results['request_protected_cached'] - results['request_public']:.1f} µs com cache"
+    )
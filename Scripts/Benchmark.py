@@ -0,0 +1,375 @@
+# Arquivo: Scripts/Benchmark.py
+#
+# Benchmark reprodutível da API e das funções mais pesadas:
+#
+#   python Scripts/Benchmark.py                          # 1k, 100k e 1M linhas
+#   python Scripts/Benchmark.py --sizes 1000,100000 --iterations 200
+#   python Scripts/Benchmark.py --compare Data/benchmarks/benchmark-anterior.json
+#
+# - Gera catálogos sintéticos a partir do Data/Livros.csv (semente fixa).
+# - Mede ingest.load_data em cada tamanho e os parsers do scraper nas páginas de fixture.
+# - Mede a atualização dos dados: registros do scraper -> CSV -> load_data contra
+#   registros -> catálogo direto (CatalogSink, sem CSV).
+# - Chama as rotas de livros, estatísticas, categorias e autenticação dentro do
+#   processo (cliente ASGI, sem rede) e reporta vazão, latência p50/p95/p99 e memória.
+# - Grava o resultado em JSON; com --compare, mostra a variação em relação a outra execução.
+
+import os
+import sys
+import json
+import time
+import math
+import asyncio
+import argparse
+import platform
+import resource
+import tempfile
+import tracemalloc
+from datetime import datetime
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(SCRIPTS_DIR)
+sys.path.insert(0, PROJECT_ROOT)
+sys.path.insert(0, SCRIPTS_DIR)
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_SIZES = (1_000, 100_000, 1_000_000)
+DEFAULT_ITERATIONS = 200
+RESULTS_DIR = os.path.join(PROJECT_ROOT, "Data", "benchmarks")
+SEED = 42
+
+# Rotas medidas: (nome, método, caminho, corpo, rota pesada)
+# Rotas pesadas (respostas com o catálogo inteiro) rodam menos iterações.
+ENDPOINTS = [
+    ("books_page", "GET", "/api/v1/books/?limit=100", None, False),
+    ("books_all", "GET", "/api/v1/books/", None, True),
+    ("books_ids", "GET", "/api/v1/books/?ids=1,5,9,42,77,500", None, False),
+    ("book_by_id", "GET", "/api/v1/books/{id}", None, False),
+    ("book_not_found", "GET", "/api/v1/books/0", None, False),
+    ("similar", "GET", "/api/v1/books/{id}/similar?limit=10", None, False),
+    ("similar_batch", "GET", "/api/v1/books/similar?ids=1,5,9,42,77,500,900,1000&limit=10", None, False),
+    ("search_title", "GET", "/api/v1/books/search?title=the&limit=50", None, False),
+    ("search_category", "GET", "/api/v1/books/search?category=fic&limit=50", None, False),
+    ("search_ranked", "GET", "/api/v1/books/search?title=love&rank=true&limit=20", None, False),
+    ("query_multi", "GET", "/api/v1/books/query?category=myst&min_price=10&max_price=40&min_rating=3&sort=-rating&limit=20", None, False),
+    ("top_rated", "GET", "/api/v1/books/top-rated?limit=100", None, False),
+    ("price_range", "GET", "/api/v1/books/price-range?min=10&max=20&sort=asc&limit=100", None, False),
+    ("export_ndjson", "GET", "/api/v1/books/export", None, True),
+    ("stats_overview", "GET", "/api/v1/stats/overview", None, False),
+    ("stats_categories", "GET", "/api/v1/stats/categories", None, False),
+    ("categories", "GET", "/api/v1/categories/", None, False),
+    ("auth_login", "POST", "/api/v1/auth/login", {"username": "admin", "password": "senha"}, False),
+    ("auth_refresh", "POST", "/api/v1/auth/refresh", "refresh", False),
+]
+
+
+# --- Memória ---
+def currentRssMb() -> float:
+    """RSS atual do processo (Linux: /proc); fora do Linux, o pico (ru_maxrss)."""
+    try:
+        with open("/proc/self/status", encoding="ascii") as file:
+            for line in file:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return peakRssMb()
+
+
+def peakRssMb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss é em KB no Linux e em bytes no macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+# --- Dados sintéticos ---
+def makeSyntheticCsv(rows: int, directory: str, sourceCsv: str) -> str:
+    """
+    Replica o CSV real até `rows` linhas. As cópias ganham um sufixo no título e
+    um preço levemente alterado (semente fixa), para que os índices não fiquem
+    com valores todos repetidos.
+    """
+    source = pd.read_csv(sourceCsv)
+    rng = np.random.default_rng(SEED)
+    picks = np.resize(np.arange(len(source)), rows)
+    copy = np.arange(rows) // len(source)
+
+    data = source.iloc[picks].reset_index(drop=True)
+    titles = data.iloc[:, 0].astype(str)
+    data.iloc[:, 0] = np.where(copy == 0, titles, titles + " (" + copy.astype(str) + ")")
+    prices = data.iloc[:, 1].to_numpy(dtype=np.float64) * rng.uniform(0.8, 1.2, rows)
+    data.iloc[:, 1] = np.round(np.where(copy == 0, data.iloc[:, 1], prices), 2)
+
+    path = os.path.join(directory, f"Livros-{rows}.csv")
+    data.to_csv(path, index=False, encoding="utf-8")
+    return path
+
+
+# --- Estatísticas ---
+def summarize(latencies, elapsed: float, sizes, errors: int):
+    ordered = np.sort(np.asarray(latencies, dtype=np.float64)) * 1000
+    return {
+        "requests": len(ordered),
+        "errors": errors,
+        "throughput_rps": round(len(ordered) / elapsed, 2) if elapsed else None,
+        "mean_ms": round(float(ordered.mean()), 3),
+        "p50_ms": round(float(np.percentile(ordered, 50)), 3),
+        "p95_ms": round(float(np.percentile(ordered, 95)), 3),
+        "p99_ms": round(float(np.percentile(ordered, 99)), 3),
+        "max_ms": round(float(ordered[-1]), 3),
+        "response_bytes": int(np.median(sizes)) if sizes else 0,
+    }
+
+
+# --- Microbenchmarks ---
+def benchLoadData(csvPath: str):
+    from ingest import load_data
+
+    rssBefore = currentRssMb()
+    start = time.perf_counter()
+    catalog = load_data(csvPath, quarantine_path=os.path.join(os.path.dirname(csvPath), "quarantine.csv"))
+    elapsed = time.perf_counter() - start
+    return catalog, {
+        "rows": len(catalog),
+        "seconds": round(elapsed, 4),
+        "rows_per_second": round(len(catalog) / elapsed, 1) if elapsed else None,
+        "rss_growth_mb": round(currentRssMb() - rssBefore, 1),
+    }
+
+
+def benchRefresh(catalog, directory: str):
+    """
+    Tempo entre o fim do crawl e o catálogo pronto para servir: registros gravados em
+    CSV e relidos por ingest.load_data (caminho antigo) contra registros entregues
+    direto ao CatalogSink. Os registros são gerados do catálogo antes da medição.
+    """
+    from ingest import load_data
+    from records import BookRecord, CatalogSink, CsvSink
+
+    records = [BookRecord(*(row[field] for field in BookRecord._fields)) for row in catalog.rows()]
+    version = str(time.time_ns())
+
+    start = time.perf_counter()
+    sink = CsvSink(os.path.join(directory, "refresh.csv"))
+    for record in records:
+        sink.write(record)
+    load_data(sink.commit(version), quarantine_path=os.path.join(directory, "quarantine.csv"))
+    csvSeconds = time.perf_counter() - start
+
+    # Com o scraper, `write` acontece durante o crawl; só o commit vem depois da última página
+    start = time.perf_counter()
+    sink = CatalogSink()
+    for record in records:
+        sink.write(record)
+    written = time.perf_counter()
+    sink.commit(version)
+    streamSeconds = time.perf_counter() - start
+
+    return {
+        "rows": len(records),
+        "csv_roundtrip_seconds": round(csvSeconds, 4),
+        "stream_seconds": round(streamSeconds, 4),
+        "stream_commit_seconds": round(time.perf_counter() - written, 4),
+        "speedup": round(csvSeconds / streamSeconds, 2) if streamSeconds else None,
+    }
+
+
+def benchParsers(rounds: int = 3, pagesDir: str = None):
+    """Tempo por página de cada backend de parsing (páginas de fixture ou salvas)."""
+    from ParserCheck import fixturePages, parseAll, savedPages
+    from WebScrap import PARSER_BACKENDS, createParserBackend
+
+    pages = savedPages(pagesDir) if pagesDir else fixturePages()
+    results = {"pages": len(pages)}
+    for name in PARSER_BACKENDS:
+        backend = createParserBackend(name)
+        if backend.name != name:
+            continue
+        timings = []
+        for _ in range(rounds):
+            start = time.perf_counter()
+            parseAll(pages, backend)
+            timings.append(time.perf_counter() - start)
+        best = min(timings)
+        results[name] = {
+            "seconds": round(best, 4),
+            "us_per_page": round(best / len(pages) * 1e6, 1),
+            "pages_per_second": round(len(pages) / best, 1),
+        }
+    return results
+
+
+# --- Rotas (cliente ASGI em processo) ---
+async def benchEndpoints(app, catalog, iterations: int, concurrency: int, measureMemory: bool):
+    import httpx
+
+    transport = httpx.ASGITransport(app=app)
+    results = {}
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        login = await client.post("/api/v1/auth/login", json={"username": "admin", "password": "senha"})
+        refreshToken = login.json()["refresh_token"]
+        bookIds = catalog.ids[np.linspace(0, len(catalog) - 1, num=min(len(catalog), 64), dtype=np.int64)].tolist()
+
+        for name, method, path, body, heavy in ENDPOINTS:
+            count = max(3, iterations // 50) if heavy else iterations
+            latencies, sizes = [], []
+            errors = 0
+            counter = iter(range(count))
+
+            async def call(i):
+                url = path.replace("{id}", str(bookIds[i % len(bookIds)]))
+                payload = {"refresh_token": refreshToken} if body == "refresh" else body
+                start = time.perf_counter()
+                response = await client.request(method, url, json=payload)
+                latencies.append(time.perf_counter() - start)
+                sizes.append(len(response.content))
+                return response.status_code
+
+            async def worker():
+                nonlocal errors
+                for i in counter:
+                    status = await call(i)
+                    # 404 é o resultado esperado da rota de livro inexistente
+                    if status >= 500 or (status >= 400 and name != "book_not_found"):
+                        errors += 1
+
+            await call(0)  # aquecimento (índices, caches de import)
+            latencies.clear()
+            sizes.clear()
+
+            start = time.perf_counter()
+            await asyncio.gather(*(worker() for _ in range(concurrency)))
+            elapsed = time.perf_counter() - start
+            results[name] = summarize(latencies, elapsed, sizes, errors)
+
+            if measureMemory:
+                # Pico de memória Python de uma requisição (medido à parte: o tracemalloc deixa tudo mais lento)
+                tracemalloc.start()
+                await call(0)
+                results[name]["peak_alloc_mb"] = round(tracemalloc.get_traced_memory()[1] / (1024 * 1024), 3)
+                tracemalloc.stop()
+    return results
+
+
+def runSize(rows: int, directory: str, args):
+    import main
+    from utils import CATALOG_STORE
+
+    csvPath = makeSyntheticCsv(rows, directory, args.csv)
+    catalog, loadStats = benchLoadData(csvPath)
+    refreshStats = benchRefresh(catalog, directory)
+
+    # O catálogo sintético passa a ser o servido pela API (sem gravar snapshot);
+    # o cliente ASGI não executa o lifespan, então a carga é feita aqui
+    CATALOG_STORE.configure(loader=lambda: catalog, path=csvPath)
+    CATALOG_STORE.reload()
+    # A matriz de similares é preparada em background depois da troca: aqui espera
+    # por ela, para as rotas de similares não responderem 503 durante a medição
+    from similarity import SIMILARITY_STORE
+    SIMILARITY_STORE.prepare(CATALOG_STORE.get())
+
+    # Sem cache, mede o custo das rotas; com --cache, o caminho de cache/ETag
+    main.RESPONSE_CACHE.clear()
+    main.RESPONSE_CACHE.enabled = args.cache
+
+    endpoints = asyncio.run(benchEndpoints(main.app, catalog, args.iterations, args.concurrency, not args.no_memory))
+    return {
+        "load_data": loadStats,
+        "refresh": refreshStats,
+        "peak_rss_mb": round(peakRssMb(), 1),
+        "endpoints": endpoints,
+    }
+
+
+# --- Comparação entre execuções ---
+def compareResults(current: dict, baseline: dict, threshold: float) -> int:
+    """Imprime a variação de p50 e vazão por rota; retorna o número de regressões acima do limite."""
+    regressions = 0
+    for size, result in current["sizes"].items():
+        before = baseline.get("sizes", {}).get(size)
+        if not before:
+            continue
+        print(f"\n== {size} linhas: variação em relação à execução anterior ==")
+        for name, stats in result["endpoints"].items():
+            old = before["endpoints"].get(name)
+            if not old:
+                continue
+            change = (stats["p50_ms"] - old["p50_ms"]) / old["p50_ms"] if old["p50_ms"] else 0.0
+            flag = ""
+            if change > threshold:
+                flag = "  <-- regressão"
+                regressions += 1
+            print(f"{name:<18} p50 {old['p50_ms']:>9.3f} -> {stats['p50_ms']:>9.3f} ms ({change:+.0%}){flag}")
+    return regressions
+
+
+def printSize(size: str, result: dict):
+    load = result["load_data"]
+    print(f"\n== {size} linhas: load_data {load['seconds']:.2f}s ({load['rows_per_second']:.0f} linhas/s), pico RSS {result['peak_rss_mb']:.0f} MB ==")
+    refresh = result["refresh"]
+    print(
+        f"atualização: CSV + load_data {refresh['csv_roundtrip_seconds']:.2f}s, "
+        f"registros direto {refresh['stream_seconds']:.2f}s ({refresh['speedup']:.1f}x), "
+        f"dos quais {refresh['stream_commit_seconds']:.2f}s após o último registro"
+    )
+    print(f"{'rota':<18} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'bytes':>11}")
+    for name, stats in result["endpoints"].items():
+        print(
+            f"{name:<18} {stats['throughput_rps']:>9.1f} {stats['p50_ms']:>9.3f} {stats['p95_ms']:>9.3f} "
+            f"{stats['p99_ms']:>9.3f} {stats['response_bytes']:>11}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark das rotas da API e das funções de carga/parsing")
+    parser.add_argument("--sizes", default=",".join(str(size) for size in DEFAULT_SIZES), help="Tamanhos dos catálogos sintéticos (separados por vírgula)")
+    parser.add_argument("--iterations", type=int, default=DEFAULT_ITERATIONS, help="Requisições por rota (rotas pesadas usam 1/50)")
+    parser.add_argument("--concurrency", type=int, default=1, help="Requisições simultâneas por rota")
+    parser.add_argument("--cache", action="store_true", help="Mantém o cache de respostas ligado")
+    parser.add_argument("--no-memory", action="store_true", help="Não mede o pico de memória por rota (tracemalloc)")
+    parser.add_argument("--skip-parsers", action="store_true", help="Não mede os parsers do scraper")
+    parser.add_argument("--pages-dir", default=None, help="Páginas HTML salvas para o benchmark dos parsers (padrão: fixtures geradas)")
+    parser.add_argument("--csv", default=os.path.join(PROJECT_ROOT, "Data", "Livros.csv"), help="CSV de origem dos dados sintéticos")
+    parser.add_argument("--output", default=None, help="Arquivo JSON de saída (padrão: Data/benchmarks/benchmark-<data>.json)")
+    parser.add_argument("--compare", default=None, help="JSON de uma execução anterior para comparação")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Aumento de p50 considerado regressão (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    results = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "iterations": args.iterations,
+            "concurrency": args.concurrency,
+            "cache": args.cache,
+        },
+        "sizes": {},
+    }
+
+    if not args.skip_parsers:
+        results["parsers"] = benchParsers(pagesDir=args.pages_dir)
+        print("Parsers (µs por página): " + ", ".join(
+            f"{name} {stats['us_per_page']:.0f}" for name, stats in results["parsers"].items() if isinstance(stats, dict)
+        ))
+
+    with tempfile.TemporaryDirectory() as directory:
+        for size in (int(value) for value in args.sizes.split(",") if value.strip()):
+            results["sizes"][str(size)] = runSize(size, directory, args)
+            printSize(str(size), results["sizes"][str(size)])
+
+    output = args.output or os.path.join(RESULTS_DIR, f"benchmark-{datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as file:
+        json.dump(results, file, indent=2, ensure_ascii=False)
+    print(f"\nResultados gravados em {output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as file:
+            regressions = compareResults(results, json.load(file), args.threshold)
+        sys.exit(1 if regressions else 0)
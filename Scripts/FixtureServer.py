@@ -0,0 +1,231 @@
+# Arquivo: Scripts/FixtureServer.py
+#
+# Servidor HTTP local que imita a estrutura do books.toscrape.com a partir do
+# Data/Livros.csv. Permite rodar o scraping (e seus testes/benchmarks) offline:
+#
+#   python Scripts/FixtureServer.py --port 8001
+#   python Scripts/WebScrap.py --base-url http://127.0.0.1:8001/
+
+import os
+import re
+import sys
+import csv
+import html
+import time
+import hashlib
+from email.utils import formatdate
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from records import RECORD_FIELDS, csv_field_names
+
+DATA_CSV = os.path.join(PROJECT_ROOT, "Data", "Livros.csv")
+
+BOOKS_PER_PAGE = 20
+RATING_NAMES = {1: "One", 2: "Two", 3: "Three", 4: "Four", 5: "Five"}
+
+
+def slugify(text: str) -> str:
+    slug = re.sub(r"[^a-z0-9]+", "-", text.lower()).strip("-")
+    return slug or "book"
+
+
+def loadBooks(csvPath: str = DATA_CSV):
+    """
+    Lê o CSV do scraping pelos nomes das colunas (campos do BookRecord ou os
+    cabeçalhos localizados antigos), então a ordem e colunas extras não importam.
+    """
+    books = []
+    with open(csvPath, newline="", encoding="utf-8-sig") as file:
+        reader = csv.DictReader(file)
+        reader.fieldnames = csv_field_names(reader.fieldnames or [])
+        missing = [field for field in RECORD_FIELDS if field not in reader.fieldnames]
+        if missing:
+            raise ValueError(f"Colunas ausentes no cabeçalho de {csvPath}: {', '.join(missing)}")
+        for row in reader:
+            books.append({
+                "id": len(books) + 1,
+                "title": row["titulo"],
+                "price": float(row["preco"]),
+                "rating": int(float(row["rating"])),
+                "stock": row["disponibilidade"],
+                "category": row["categoria"],
+                "image": row["url_imagem"].split("/media/", 1)[-1],
+            })
+    return books
+
+
+class FixtureSite:
+    """Gera em memória as páginas de listagem, de categoria e de detalhe."""
+
+    def __init__(self, books):
+        self.books = books
+        self.categories = sorted({book["category"] for book in books})
+        self.categorySlugs = {
+            name: f"{slugify(name)}_{code}" for code, name in enumerate(self.categories, start=2)
+        }
+        for book in books:
+            book["slug"] = f"{slugify(book['title'])}_{book['id']}"
+        self.pages = {}
+        self.lastModified = formatdate(time.time(), usegmt=True)
+        self.build()
+
+    def etag(self, path: str) -> str:
+        return '"' + hashlib.sha1(self.pages[path]).hexdigest() + '"'
+
+    # --- Blocos HTML ---
+    def sidebar(self, prefix: str) -> str:
+        items = "".join(
+            f'<li><a href="{prefix}category/books/{self.categorySlugs[name]}/index.html">{html.escape(name)}</a></li>'
+            for name in self.categories
+        )
+        return (
+            '<div class="side_categories"><ul class="nav nav-list">'
+            f'<li><a href="{prefix}category/books_1/index.html">Books</a><ul>{items}</ul></li>'
+            "</ul></div>"
+        )
+
+    def productPod(self, book, prefix: str) -> str:
+        title = html.escape(book["title"], quote=True)
+        href = f"{prefix}{book['slug']}/index.html"
+        return (
+            '<li class="col-xs-6 col-sm-4 col-md-3 col-lg-3"><article class="product_pod">'
+            f'<div class="image_container"><a href="{href}"><img src="{prefix}../media/{book["image"]}" alt="{title}" class="thumbnail"></a></div>'
+            f'<p class="star-rating {RATING_NAMES.get(book["rating"], "Zero")}"><i class="icon-star"></i></p>'
+            f'<h3><a href="{href}" title="{title}">{title}</a></h3>'
+            f'<div class="product_price"><p class="price_color">£{book["price"]:.2f}</p>'
+            f'<p class="instock availability"><i class="icon-ok"></i>\n    {html.escape(book["stock"])}\n</p></div>'
+            "</article></li>"
+        )
+
+    def listing(self, books, page: int, numPages: int, prefix: str, heading: str) -> str:
+        pager = f'<li class="current">Page {page} of {numPages}</li>'
+        if page > 1:
+            pager = f'<li class="previous"><a href="page-{page - 1}.html">previous</a></li>' + pager
+        if page < numPages:
+            pager += f'<li class="next"><a href="page-{page + 1}.html">next</a></li>'
+        pods = "".join(self.productPod(book, prefix) for book in books)
+        return (
+            '<!DOCTYPE html><html lang="en-us"><head><meta charset="utf-8"><title>'
+            f"{html.escape(heading)} | Books to Scrape - Sandbox</title></head><body>"
+            f'<ul class="breadcrumb"><li><a href="/index.html">Home</a></li><li class="active">{html.escape(heading)}</li></ul>'
+            f'<aside>{self.sidebar(prefix)}</aside>'
+            f'<div class="page-header action"><h1>{html.escape(heading)}</h1></div>'
+            f'<form class="form-horizontal"><strong>{len(self.books)}</strong> results</form>'
+            f'<section><ol class="row">{pods}</ol><div><ul class="pager">{pager}</ul></div></section>'
+            "</body></html>"
+        )
+
+    def detail(self, book) -> str:
+        title = html.escape(book["title"])
+        category = html.escape(book["category"])
+        return (
+            '<!DOCTYPE html><html lang="en-us"><head><meta charset="utf-8">'
+            f"<title>{title} | Books to Scrape - Sandbox</title></head><body>"
+            '<ul class="breadcrumb"><li><a href="../../index.html">Home</a></li>'
+            '<li><a href="../category/books_1/index.html">Books</a></li>'
+            f'<li><a href="../category/books/{self.categorySlugs[book["category"]]}/index.html">{category}</a></li>'
+            f'<li class="active">{title}</li></ul>'
+            '<article class="product_page"><div class="row">'
+            f'<div class="item active"><img src="../../media/{book["image"]}" alt="{title}"></div>'
+            f'<div class="col-sm-6 product_main"><h1>{title}</h1>'
+            f'<p class="price_color">£{book["price"]:.2f}</p>'
+            f'<p class="instock availability"><i class="icon-ok"></i>\n    {html.escape(book["stock"])}\n</p>'
+            f'<p class="star-rating {RATING_NAMES.get(book["rating"], "Zero")}"><i class="icon-star"></i></p></div>'
+            "</div></article></body></html>"
+        )
+
+    @staticmethod
+    def chunks(books):
+        return [books[i:i + BOOKS_PER_PAGE] for i in range(0, len(books), BOOKS_PER_PAGE)] or [[]]
+
+    def build(self):
+        # Listagem geral: /catalogue/page-N.html e /catalogue/category/books_1/
+        chunks = self.chunks(self.books)
+        for page, books in enumerate(chunks, start=1):
+            self.pages[f"/catalogue/page-{page}.html"] = self.listing(books, page, len(chunks), "", "All products")
+            self.pages["/catalogue/category/books_1/" + ("index.html" if page == 1 else f"page-{page}.html")] = \
+                self.listing(books, page, len(chunks), "../../", "Books")
+
+        # Índice de cada categoria: /catalogue/category/books/<slug>/index.html e page-N.html
+        for name in self.categories:
+            books = [book for book in self.books if book["category"] == name]
+            chunks = self.chunks(books)
+            base = f"/catalogue/category/books/{self.categorySlugs[name]}/"
+            for page, pageBooks in enumerate(chunks, start=1):
+                body = self.listing(pageBooks, page, len(chunks), "../../../", name)
+                self.pages[base + ("index.html" if page == 1 else f"page-{page}.html")] = body
+
+        # Páginas de detalhe: /catalogue/<slug>/index.html
+        for book in self.books:
+            self.pages[f"/catalogue/{book['slug']}/index.html"] = self.detail(book)
+
+        self.pages = {path: body.encode("utf-8") for path, body in self.pages.items()}
+
+
+def makeHandler(site: FixtureSite, delay: float = 0.0):
+    class FixtureHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            if delay:
+                time.sleep(delay)
+            path = self.path.split("?", 1)[0]
+            body = site.pages.get(path)
+            if body is None:
+                body = b"Not Found"
+                self.send_response(404)
+                self.send_header("Content-Type", "text/plain")
+            else:
+                # Validadores para requisições condicionais (scraping incremental)
+                etag = site.etag(path)
+                if self.headers.get("If-None-Match") == etag:
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("ETag", etag)
+                self.send_header("Last-Modified", site.lastModified)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return FixtureHandler
+
+
+def startFixtureServer(port: int = 0, delay: float = 0.0, csvPath: str = DATA_CSV):
+    """
+    Sobe o servidor em uma thread de background.
+    Retorna (server, baseUrl); use server.shutdown() para encerrar.
+    As páginas ficam em server.site.pages e podem ser alteradas para simular mudanças.
+    """
+    site = FixtureSite(loadBooks(csvPath))
+    server = ThreadingHTTPServer(("127.0.0.1", port), makeHandler(site, delay))
+    server.site = site
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Servidor local de fixtures do Books to Scrape")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--delay", type=float, default=0.0, help="Latência artificial por requisição (segundos)")
+    parser.add_argument("--csv", default=DATA_CSV, help="CSV usado para gerar as páginas")
+    args = parser.parse_args()
+
+    site = FixtureSite(loadBooks(args.csv))
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), makeHandler(site, args.delay))
+    print(f"Servidor de fixtures em http://127.0.0.1:{args.port}/ ({len(site.books)} livros)")
+    server.serve_forever()
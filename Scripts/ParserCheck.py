@@ -0,0 +1,88 @@
+# Arquivo: Scripts/ParserCheck.py
+#
+# Confere que todos os backends de parsing do WebScrap.py produzem exatamente a
+# mesma saída que o BeautifulSoup nas páginas de fixture, e mede o tempo de cada um:
+#
+#   python Scripts/ParserCheck.py
+#   python Scripts/ParserCheck.py --pages-dir caminho/com/paginas/salvas
+#
+# Com --pages-dir, usa páginas HTML salvas do site (listagens, categorias e
+# detalhes) em vez das geradas a partir do Data/Livros.csv.
+#
+# A equivalência dos backends também é verificada automaticamente pelos testes
+# (tests/test_parsers.py); este script serve para páginas reais e para medir o tempo.
+
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from FixtureServer import DATA_CSV, FixtureSite, loadBooks
+from WebScrap import PARSER_BACKENDS, SoupBackend, createParserBackend, parseCategory, parseCategoryLinks, parseListing
+
+FIXTURE_BASE_URL = "http://fixtures.local/"
+
+
+def sitePages(site: FixtureSite):
+    """(url, html) de todas as páginas de um FixtureSite."""
+    return [(FIXTURE_BASE_URL + path.lstrip("/"), body.decode("utf-8")) for path, body in sorted(site.pages.items())]
+
+
+def fixturePages(csvPath: str = DATA_CSV):
+    """(url, html) das páginas geradas pelo servidor de fixtures."""
+    return sitePages(FixtureSite(loadBooks(csvPath)))
+
+
+def savedPages(pagesDir: str):
+    """(url, html) de páginas salvas em disco; a URL é o caminho relativo ao diretório."""
+    pages = []
+    for root, _, files in os.walk(pagesDir):
+        for fileName in sorted(files):
+            if fileName.endswith(".html"):
+                path = os.path.join(root, fileName)
+                with open(path, encoding="utf-8") as file:
+                    pages.append((FIXTURE_BASE_URL + os.path.relpath(path, pagesDir).replace(os.sep, "/"), file.read()))
+    return pages
+
+
+def parseAll(pages, backend):
+    """Aplica o parser adequado a cada página (detalhe ou listagem)."""
+    results = []
+    for url, html in pages:
+        if 'class="product_page"' in html:
+            results.append(("category", parseCategory(html, url, backend)))
+        else:
+            results.append(("listing", parseListing(html, url, FIXTURE_BASE_URL, backend)))
+            results.append(("links", parseCategoryLinks(html, url, backend)))
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compara os backends de parsing do scraper")
+    parser.add_argument("--pages-dir", default=None, help="Diretório com páginas HTML salvas (padrão: páginas geradas do CSV)")
+    parser.add_argument("--rounds", type=int, default=3, help="Rodadas de medição por backend")
+    args = parser.parse_args()
+
+    pages = savedPages(args.pages_dir) if args.pages_dir else fixturePages()
+    expected = parseAll(pages, SoupBackend())
+    print(f"{len(pages)} páginas")
+
+    failed = False
+    for name in PARSER_BACKENDS:
+        backend = createParserBackend(name)
+        if backend.name != name:
+            continue
+
+        timings = []
+        for _ in range(args.rounds):
+            start = time.perf_counter()
+            result = parseAll(pages, backend)
+            timings.append(time.perf_counter() - start)
+
+        identical = result == expected
+        failed = failed or not identical
+        print(f"{name:<12} {min(timings) * 1000:>9.1f} ms  {'idêntico' if identical else 'DIFERENTE'}")
+
+    sys.exit(1 if failed else 0)
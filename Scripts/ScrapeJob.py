@@ -0,0 +1,79 @@
+# Arquivo: Scripts/ScrapeJob.py
+#
+# Processo que executa um job de scraping registrado na tabela de jobs (jobs.py).
+# É iniciado pelo POST /api/v1/scrap, fora dos workers da API:
+#
+#   python Scripts/ScrapeJob.py --job-id 7 --db Data/jobs.sqlite3
+#
+# Grava o progresso (páginas e requisições) periodicamente e para quando o
+# cancelamento é pedido pela API.
+
+import os
+import sys
+import time
+import argparse
+import threading
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(SCRIPTS_DIR)
+sys.path.insert(0, PROJECT_ROOT)
+sys.path.insert(0, SCRIPTS_DIR)
+
+from jobs import CANCELLED, FAILED, JOBS_DB, SUCCEEDED, JobStore
+from WebScrap import ScrapeCancelled, runScraping
+
+# Intervalo entre gravações de progresso (e leituras do pedido de cancelamento)
+PROGRESS_INTERVAL = 0.5
+
+
+def runJob(jobId: int, dbPath: str = JOBS_DB, **scrapingArgs):
+    store = JobStore(dbPath)
+    if not store.start(jobId, os.getpid()):
+        print(f"Job {jobId} cancelado antes de iniciar.")
+        return
+
+    cancelEvent = threading.Event()
+    finished = threading.Event()
+    progress = {"pages": 0, "requests": 0}
+
+    def onProgress(pages: int, requests: int):
+        progress["pages"] = pages
+        progress["requests"] = requests
+
+    def watch():
+        # Um único ponto grava no banco, em intervalos, em vez de uma escrita por página
+        while not finished.wait(PROGRESS_INTERVAL):
+            if store.update_progress(jobId, progress["pages"], progress["requests"]):
+                cancelEvent.set()
+
+    watcher = threading.Thread(target=watch, daemon=True)
+    watcher.start()
+
+    status, errorMessage, result = SUCCEEDED, None, None
+    try:
+        delta = runScraping(incremental=True, cancelEvent=cancelEvent, onProgress=onProgress, **scrapingArgs)
+        if delta is not None:
+            result = {name: len(rows) for name, rows in delta.items()}
+    except ScrapeCancelled:
+        status = CANCELLED
+    except Exception as e:
+        status, errorMessage = FAILED, str(e)
+        print("Erro no scraping:", e)
+    finally:
+        finished.set()
+        watcher.join()
+        store.update_progress(jobId, progress["pages"], progress["requests"])
+        store.finish(jobId, status, errorMessage, result)
+
+    print(f"Job {jobId}: {status}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Executa um job de scraping da tabela de jobs")
+    parser.add_argument("--job-id", type=int, required=True)
+    parser.add_argument("--db", default=JOBS_DB, help="Banco SQLite da tabela de jobs")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    runJob(args.job_id, args.db)
+    print(f"Duração: {time.perf_counter() - started:.1f}s")
@@ -0,0 +1,146 @@
+# Arquivo: Scripts/StartupBenchmark.py
+#
+# Mede a partida a frio de um worker da API, cada rodada em um processo novo:
+#
+#   python Scripts/StartupBenchmark.py                 # 5 rodadas
+#   python Scripts/StartupBenchmark.py --runs 10 --importtime
+#
+# - import: tempo do `import main` (o que cada worker paga antes de aceitar conexões)
+# - startup: fim do startup do lifespan (a partir daqui o servidor aceita conexões)
+# - live: primeira resposta de /api/v1/health/live
+# - ready: primeira resposta 200 de /api/v1/health/ready (dados carregados)
+# - módulos pesados (pandas, scipy, scikit-learn) importados em cada fase
+
+import os
+import sys
+import json
+import argparse
+import subprocess
+import statistics
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(SCRIPTS_DIR)
+
+HEAVY_MODULES = ("pandas", "scipy", "sklearn", "joblib")
+
+# Código executado em cada processo novo (mede e imprime um JSON)
+PROBE = r'''
+import sys, time, json, asyncio
+started = time.perf_counter()
+import main
+imported = time.perf_counter()
+heavy = lambda: [name for name in HEAVY if name in sys.modules]
+after_import = heavy()
+
+async def probe():
+    result = {}
+    async with main.app.router.lifespan_context(main.app):
+        result["startup"] = time.perf_counter() - started
+        # O import do cliente de teste não faz parte da partida do worker: é descontado
+        client_started = time.perf_counter()
+        import httpx
+        started_offset = time.perf_counter() - client_started
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://startup") as client:
+            response = await client.get("/api/v1/health/live")
+            result["live"] = time.perf_counter() - started - started_offset
+            result["live_status"] = response.status_code
+            deadline = time.perf_counter() + TIMEOUT
+            while time.perf_counter() < deadline:
+                response = await client.get("/api/v1/health/ready")
+                if response.status_code == 200:
+                    break
+                await asyncio.sleep(0.005)
+            result["ready"] = time.perf_counter() - started - started_offset
+            result["ready_status"] = response.status_code
+            result["rows"] = response.json().get("rows")
+    return result
+
+result = asyncio.run(probe())
+result.update(import_seconds=imported - started, heavy_after_import=after_import, heavy_after_ready=heavy())
+print(json.dumps(result))
+'''
+
+
+def runProbe(timeout: float) -> dict:
+    code = f"HEAVY = {HEAVY_MODULES!r}\nTIMEOUT = {timeout!r}\n" + PROBE
+    completed = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=PROJECT_ROOT,
+        capture_output=True,
+        text=True,
+        env={**os.environ, "PYTHONPATH": PROJECT_ROOT},
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"Falha na medição:\n{completed.stderr}")
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def importTimeTop(limit: int):
+    """Módulos com maior tempo cumulativo no `import main` (python -X importtime)."""
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=PROJECT_ROOT,
+        capture_output=True,
+        text=True,
+        env={**os.environ, "PYTHONPATH": PROJECT_ROOT},
+    )
+    rows = []
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        parts = line.split("|")
+        try:
+            cumulative = int(parts[1])
+        except ValueError:
+            continue
+        rows.append((parts[2].strip(), cumulative / 1e6))
+    rows.sort(key=lambda row: row[1], reverse=True)
+    return rows[:limit]
+
+
+def summarize(runs, field: str):
+    values = [run[field] for run in runs]
+    return {"median": round(statistics.median(values), 4), "min": round(min(values), 4), "max": round(max(values), 4)}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mede o tempo de partida a frio de um worker da API")
+    parser.add_argument("--runs", type=int, default=5, help="Rodadas (um processo novo por rodada)")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Tempo máximo de espera pela readiness (s)")
+    parser.add_argument("--importtime", action="store_true", help="Mostra os módulos mais caros do import (python -X importtime)")
+    parser.add_argument("--output", default=None, help="Grava o resultado em JSON")
+    args = parser.parse_args()
+
+    runs = []
+    for number in range(1, args.runs + 1):
+        run = runProbe(args.timeout)
+        runs.append(run)
+        print(
+            f"rodada {number}: import {run['import_seconds'] * 1000:7.1f} ms | startup {run['startup'] * 1000:7.1f} ms | live {run['live'] * 1000:7.1f} ms | "
+            f"ready {run['ready'] * 1000:7.1f} ms ({run['ready_status']}, {run['rows']} livros) | "
+            f"pesados após import: {', '.join(run['heavy_after_import']) or '-'} | após ready: {', '.join(run['heavy_after_ready']) or '-'}"
+        )
+
+    results = {
+        "runs": runs,
+        "import_seconds": summarize(runs, "import_seconds"),
+        "startup_seconds": summarize(runs, "startup"),
+        "live_seconds": summarize(runs, "live"),
+        "ready_seconds": summarize(runs, "ready"),
+    }
+    print(
+        f"\nMediana: import {results['import_seconds']['median'] * 1000:.1f} ms, "
+        f"startup {results['startup_seconds']['median'] * 1000:.1f} ms, live {results['live_seconds']['median'] * 1000:.1f} ms, ready {results['ready_seconds']['median'] * 1000:.1f} ms"
+    )
+
+    if args.importtime:
+        results["importtime"] = importTimeTop(15)
+        print("\nMódulos mais caros no import (cumulativo):")
+        for name, seconds in results["importtime"]:
+            print(f"  {seconds * 1000:8.1f} ms  {name}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=2, ensure_ascii=False)
+        print(f"\nResultados gravados em {args.output}")
@@ -1,106 +1,843 @@
 # Arquivo: Script/webscrap.py
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from bs4 import BeautifulSoup
 import os
-import csv
-import glob
+import re
+import sys
+import json
 import time
-from urllib.parse import urljoin
+import hashlib
+import argparse
+import itertools
+import threading
+import multiprocessing
+from collections import deque
+from functools import partial
+from concurrent.futures import CancelledError, ProcessPoolExecutor, ThreadPoolExecutor
+from urllib.parse import urljoin, urlparse
 from datetime import datetime
 
-DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+DATA_DIR = os.path.join(PROJECT_ROOT, "Data")
 FINAL_CSV = os.path.join(DATA_DIR, "Livros.csv")
+SNAPSHOT_DIR = os.path.join(DATA_DIR, "snapshot")
+QUARANTINE_FILE = os.path.join(DATA_DIR, "Livros.quarantine.csv")
+STATE_FILE = os.path.join(DATA_DIR, "scrape_state.json")
+DELTA_FILE = os.path.join(DATA_DIR, "scrape_delta.json")
 
-def checkCacheFile() -> bool:
-    """Verifica se existe CSV recente e reutiliza como cache."""
-    CACHE_MINUTES = 5
-    files = glob.glob(os.path.join(DATA_DIR, "books_*.csv"))
-
-    if files:
-        latestFile = max(files, key=os.path.getctime)
-        lastModified = os.path.getmtime(latestFile)
-        if time.time() - lastModified < CACHE_MINUTES * 60:
-            print(f"Usando cache local: {latestFile}")
-            if not os.path.exists(FINAL_CSV):
-                os.rename(latestFile, FINAL_CSV)
-                print(f"Cache salvo como: {FINAL_CSV}")
-            return True
-    return False
-
-
-def runScraping():
-    """Executa o scraping e salva o CSV limpo (Livros.csv)."""
-    os.makedirs(DATA_DIR, exist_ok=True)
+BASE_URL = os.environ.get("SCRAPER_BASE_URL", "https://books.toscrape.com/")
+
+# Configuração padrão do motor de scraping
+DEFAULT_CONCURRENCY = 16
+DEFAULT_RATE_PER_HOST = 20.0   # requisições por segundo por host
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF = 0.5          # segundos (cresce exponencialmente a cada tentativa)
+DEFAULT_TIMEOUT = 10           # segundos
+# Processos do estágio de parsing (0 = extrai nas próprias threads de download)
+DEFAULT_PARSE_WORKERS = max(1, min(4, (os.cpu_count() or 2) - 1))
+
+# Páginas de detalhe baixadas à frente do livro entregue, por thread de download
+DETAIL_WINDOW_PER_WORKER = 4
+
+# Destinos dos livros extraídos: o snapshot servido pela API e, opcionalmente, o CSV
+SINK_NAMES = ("snapshot", "csv")
+DEFAULT_SINKS = tuple(name.strip() for name in os.environ.get("SCRAPER_SINKS", "snapshot").split(",") if name.strip())
+
+# Dicionário para converter rating textual em número
+RATING_MAP = {"One": 1, "Two": 2, "Three": 3, "Four": 4, "Five": 5}
+
+
+class ScrapeCancelled(Exception):
+    """O scraping foi cancelado (nada é gravado)."""
+
+
+class ListingPageFailed(RuntimeError):
+    """
+    Uma página de listagem não pôde ser baixada: os livros dela ficariam de fora
+    (e contariam como removidos no delta), então o crawl é interrompido sem publicar.
+    """
+
+    def __init__(self, url: str):
+        super().__init__(f"Falha ao acessar página de listagem: {url}")
+        self.url = url
+
+
+class ParsePool:
+    """
+    Estágio de parsing em processos separados.
+
+    As threads de download entregam os corpos das páginas por uma fila limitada
+    (`maxPending` páginas em espera ou em parsing): quando ela enche, os downloads
+    param até haver vaga, então a memória não cresce se o parsing ficar para trás.
+    O parsing (CPU) sai do processo que fez o download e não disputa o GIL com ele.
+    Os processos são criados com "spawn", seguro mesmo dentro de um servidor com threads.
+    """
+
+    def __init__(self, workers: int, backendName: str = "auto", maxPending: int = None, cancelEvent: threading.Event = None):
+        self.executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=setParserBackend,
+            initargs=(backendName,),
+        )
+        self.slots = threading.BoundedSemaphore(maxPending or 2 * workers)
+        self.cancelEvent = cancelEvent or threading.Event()
+
+    def parse(self, parse, html: str, url: str):
+        """Executa `parse(html, url)` em um processo do pool (bloqueia enquanto a fila está cheia)."""
+        while not self.slots.acquire(timeout=0.1):
+            if self.cancelEvent.is_set():
+                raise ScrapeCancelled("Scraping cancelado")
+        try:
+            return self.executor.submit(parse, html, url).result()
+        except CancelledError:
+            raise ScrapeCancelled("Scraping cancelado")
+        finally:
+            self.slots.release()
+
+    def close(self, cancel: bool = False):
+        self.executor.shutdown(wait=True, cancel_futures=cancel)
+
+
+class HostRateLimiter:
+    """Limita a taxa de requisições por host (intervalo mínimo entre requisições)."""
+
+    def __init__(self, ratePerHost: float):
+        self.interval = 1.0 / ratePerHost if ratePerHost and ratePerHost > 0 else 0.0
+        self.lock = threading.Lock()
+        self.nextSlot = {}
+
+    def wait(self, url: str):
+        if not self.interval:
+            return
+        host = urlparse(url).netloc
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.nextSlot.get(host, now))
+            self.nextSlot[host] = slot + self.interval
+        delay = slot - now
+        if delay > 0:
+            time.sleep(delay)
+
+
+def createSession(poolSize: int, retries: int, backoff: float) -> requests.Session:
+    """Cria uma sessão HTTP com pool de conexões e retry com backoff exponencial."""
+    retry = Retry(
+        total=retries,
+        backoff_factor=backoff,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=("GET", "HEAD"),
+        respect_retry_after_header=True,
+    )
+    adapter = HTTPAdapter(pool_connections=poolSize, pool_maxsize=poolSize, max_retries=retry)
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+class ScrapeState:
+    """
+    Estado do scraping incremental, salvo em JSON entre execuções.
+
+    Para cada URL guarda os validadores HTTP (ETag, Last-Modified), o hash do
+    corpo e o resultado já extraído da página; guarda também os livros da última
+    execução (por URL de detalhe) para calcular o delta.
+    """
+
+    def __init__(self, pages=None, books=None):
+        self.pages = pages or {}
+        self.books = books or {}
+        self.lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path: str = STATE_FILE) -> "ScrapeState":
+        if not os.path.exists(path):
+            return cls()
+        try:
+            with open(path, encoding="utf-8") as file:
+                data = json.load(file)
+            return cls(data.get("pages"), data.get("books"))
+        except (OSError, ValueError) as e:
+            print(f"Estado do scraping ignorado ({e})")
+            return cls()
+
+    def save(self, path: str = STATE_FILE):
+        tempPath = path + ".tmp"
+        with open(tempPath, "w", encoding="utf-8") as file:
+            json.dump({"pages": self.pages, "books": self.books}, file, ensure_ascii=False)
+        os.replace(tempPath, path)
+
+    def get(self, url: str):
+        with self.lock:
+            return self.pages.get(url)
+
+    def put(self, url: str, entry: dict):
+        with self.lock:
+            self.pages[url] = entry
+
+    def diff(self, books: dict) -> dict:
+        """Delta entre os livros da última execução e `books` (ambos por URL de detalhe)."""
+        added = [url for url in books if url not in self.books]
+        removed = [url for url in self.books if url not in books]
+        changed = [url for url in books if url in self.books and self.books[url] != books[url]]
+        return {
+            "added": [books[url] for url in added],
+            "changed": [books[url] for url in changed],
+            "removed": [self.books[url] for url in removed],
+        }
+
+
+class ScraperEngine:
+    """
+    Motor de scraping concorrente: pool de threads limitado, sessão HTTP com pool
+    de conexões, limite de taxa por host e retry com backoff.
+    """
+
+    def __init__(
+        self,
+        baseUrl: str = BASE_URL,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        ratePerHost: float = DEFAULT_RATE_PER_HOST,
+        retries: int = DEFAULT_RETRIES,
+        backoff: float = DEFAULT_BACKOFF,
+        timeout: float = DEFAULT_TIMEOUT,
+        state: ScrapeState = None,
+        conditional: bool = False,
+        parseWorkers: int = 0,
+        cancelEvent: threading.Event = None,
+        onProgress=None,
+    ):
+        self.baseUrl = baseUrl if baseUrl.endswith("/") else baseUrl + "/"
+        self.concurrency = concurrency
+        self.timeout = timeout
+        # Estado por URL; com `conditional`, envia If-None-Match/If-Modified-Since
+        self.state = state if state is not None else ScrapeState()
+        self.conditional = conditional
+        self.session = createSession(concurrency, retries, backoff)
+        self.limiter = HostRateLimiter(ratePerHost)
+        self.executor = ThreadPoolExecutor(max_workers=concurrency)
+        # Cancelamento cooperativo: verificado antes de cada download e na fila de parsing
+        self.cancelEvent = cancelEvent or threading.Event()
+        self.parsePool = (
+            ParsePool(parseWorkers, getParserBackend().name, cancelEvent=self.cancelEvent)
+            if parseWorkers > 0 else None
+        )
+        self.counters = {"requests": 0, "not_modified": 0, "unchanged": 0, "parsed": 0}
+        self.countLock = threading.Lock()
+        # Chamado a cada página concluída com (páginas concluídas, requisições)
+        self.onProgress = onProgress
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, excType, *exc):
+        if excType is not None:
+            # Erro ou cancelamento: descarta o trabalho pendente em vez de esperá-lo
+            self.cancelEvent.set()
+        self.close()
+
+    def close(self):
+        cancel = self.cancelEvent.is_set()
+        if self.parsePool is not None and cancel:
+            self.parsePool.executor.shutdown(wait=False, cancel_futures=True)
+        self.executor.shutdown(wait=True, cancel_futures=True)
+        if self.parsePool is not None:
+            self.parsePool.close(cancel)
+        self.session.close()
+
+    def cancel(self):
+        self.cancelEvent.set()
+
+    def count(self, name: str):
+        with self.countLock:
+            self.counters[name] += 1
+
+    @property
+    def requestCount(self) -> int:
+        return self.counters["requests"]
+
+    @property
+    def pagesDone(self) -> int:
+        return self.counters["not_modified"] + self.counters["unchanged"] + self.counters["parsed"]
+
+    def reportProgress(self):
+        if self.onProgress is not None:
+            self.onProgress(self.pagesDone, self.requestCount)
+
+    def fetch(self, url: str, headers: dict = None):
+        """Baixa uma URL; retorna a resposta (200 ou 304) ou None em caso de erro."""
+        if self.cancelEvent.is_set():
+            raise ScrapeCancelled("Scraping cancelado")
+        self.limiter.wait(url)
+        self.count("requests")
+        try:
+            response = self.session.get(url, headers=headers, timeout=self.timeout)
+        except requests.RequestException as e:
+            print(f"Erro ao acessar {url}: {e}")
+            return None
+        response.encoding = "utf-8"
+        if response.status_code == 304 and headers:
+            return response
+        if response.status_code != 200:
+            print(f"Erro ao acessar {url}: HTTP {response.status_code}")
+            return None
+        return response
+
+    def fetchParsed(self, url: str, parse):
+        """
+        Baixa e extrai uma página, reaproveitando o resultado anterior quando ela não mudou.
+
+        Com requisições condicionais, um 304 reutiliza o resultado salvo sem baixar o
+        corpo; um 200 com o mesmo hash de corpo também pula o parsing.
+        Retorna o resultado de `parse(html, url)` ou None em caso de erro.
+        """
+        entry = self.state.get(url)
+        headers = {}
+        if self.conditional and entry:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+
+        response = self.fetch(url, headers or None)
+        if response is None:
+            return None
+
+        if response.status_code == 304:
+            self.count("not_modified")
+            self.reportProgress()
+            return entry["parsed"]
+
+        digest = hashlib.sha256(response.content).hexdigest()
+        if entry and entry.get("hash") == digest:
+            self.count("unchanged")
+            parsed = entry["parsed"]
+        else:
+            self.count("parsed")
+            if self.parsePool is not None:
+                parsed = self.parsePool.parse(parse, response.text, url)
+            else:
+                parsed = parse(response.text, url)
+
+        self.state.put(url, {
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "hash": digest,
+            "parsed": parsed,
+        })
+        self.reportProgress()
+        return parsed
+
+    def iterParsed(self, urls, parse):
+        """fetchParsed em paralelo; os resultados saem na ordem das URLs, conforme ficam prontos."""
+        return self.executor.map(lambda url: self.fetchParsed(url, parse), urls)
+
+    def fetchAllParsed(self, urls, parse):
+        """fetchParsed em paralelo, mantendo a ordem das URLs."""
+        return list(self.iterParsed(urls, parse))
+
+
+# --- Parsing ---
+# Os backends só localizam os campos brutos (texto e atributos) com seletores
+# diretos; a conversão (preço, rating, URLs) é comum a todos, então a saída é a
+# mesma qualquer que seja o backend. O BeautifulSoup é sempre o fallback.
+
+class SoupBackend:
+    """Backend de referência: árvore completa do BeautifulSoup (html.parser)."""
+
+    name = "bs4"
+
+    def listingItems(self, html: str):
+        soup = BeautifulSoup(html, "html.parser")
+        return [
+            (
+                book.h3.a["title"],
+                book.find("p", class_="price_color").text,
+                book.p["class"][1],
+                book.find("p", class_="instock availability").text,
+                book.find("img")["src"],
+                book.h3.a["href"],
+            )
+            for book in soup.find_all("article", class_="product_pod")
+        ]
+
+    def breadcrumbLinks(self, html: str):
+        soup = BeautifulSoup(html, "html.parser")
+        return [link.text for link in soup.find("ul", class_="breadcrumb").find_all("a")]
+
+    def sidebarLinks(self, html: str):
+        soup = BeautifulSoup(html, "html.parser")
+        sidebar = soup.find("div", class_="side_categories")
+        if sidebar is None:
+            return []
+        return [(link.text, link["href"]) for link in sidebar.select("ul li ul li a")]
+
+
+def _hasClass(name: str) -> str:
+    """Predicado XPath equivalente ao seletor CSS `.name`."""
+    return f'contains(concat(" ", normalize-space(@class), " "), " {name} ")'
+
+
+class LxmlBackend:
+    """Backend lxml: parser em C e consultas XPath pré-compiladas."""
+
+    name = "lxml"
+
+    def __init__(self):
+        from lxml import etree, html as lxmlHtml
+        self.fromstring = lxmlHtml.fromstring
+        self.books = etree.XPath(f"//article[{_hasClass('product_pod')}]")
+        self.titleLink = etree.XPath("(.//h3//a)[1]")
+        self.price = etree.XPath(f"(.//p[{_hasClass('price_color')}])[1]")
+        self.firstParagraph = etree.XPath("(.//p)[1]/@class")
+        self.stock = etree.XPath('(.//p[@class="instock availability"])[1]')
+        self.image = etree.XPath("(.//img)[1]/@src")
+        self.breadcrumb = etree.XPath(f"(//ul[{_hasClass('breadcrumb')}])[1]//a")
+        self.sidebar = etree.XPath(f"(//div[{_hasClass('side_categories')}])[1]")
+        self.sidebarAnchors = etree.XPath(".//ul//li//ul//li//a")
+
+    def listingItems(self, html: str):
+        items = []
+        for book in self.books(self.fromstring(html)):
+            link = self.titleLink(book)[0]
+            items.append((
+                link.get("title"),
+                self.price(book)[0].text_content(),
+                self.firstParagraph(book)[0].split()[1],
+                self.stock(book)[0].text_content(),
+                self.image(book)[0],
+                link.get("href"),
+            ))
+        return items
 
-    if os.path.exists(FINAL_CSV):
-        print(f"Arquivo já existe: {FINAL_CSV}")
-        return
+    def breadcrumbLinks(self, html: str):
+        return [link.text_content() for link in self.breadcrumb(self.fromstring(html))]
 
-    if checkCacheFile():
-        print("Cache válido encontrado. Nenhum scraping necessário.")
-        return
+    def sidebarLinks(self, html: str):
+        sidebar = self.sidebar(self.fromstring(html))
+        if not sidebar:
+            return []
+        return [(link.text_content(), link.get("href")) for link in self.sidebarAnchors(sidebar[0])]
 
-    timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
-    tempFile = os.path.join(DATA_DIR, f"books_{timestamp}.csv")
 
-    print(f"Criando novo arquivo: {tempFile}")
+class SelectolaxBackend:
+    """Backend selectolax: parser em C (lexbor) e seletores CSS, sem montar objetos Python por nó."""
 
-    BASE_URL = "https://books.toscrape.com/catalogue/page-{}.html"
-    BASE_BASE = "https://books.toscrape.com/"
-    NUM_PAGES = 50
+    name = "selectolax"
 
-    # Dicionário para converter rating textual em número
-    rating_map = {"One": 1, "Two": 2, "Three": 3, "Four": 4, "Five": 5}
+    def __init__(self):
+        from selectolax.lexbor import LexborHTMLParser
+        self.HTMLParser = LexborHTMLParser
 
-    with open(tempFile, mode="w", newline="", encoding="utf-8-sig") as file:
-        writer = csv.writer(file)
-        writer.writerow(["Título", "Preço(£)", "Rating", "Disponibilidade", "Categoria", "URL da Imagem"])
+    def listingItems(self, html: str):
+        items = []
+        for book in self.HTMLParser(html).css("article.product_pod"):
+            link = book.css_first("h3 a")
+            items.append((
+                link.attributes.get("title"),
+                book.css_first("p.price_color").text(),
+                book.css_first("p").attributes.get("class").split()[1],
+                book.css_first('p[class="instock availability"]').text(),
+                book.css_first("img").attributes.get("src"),
+                link.attributes.get("href"),
+            ))
+        return items
 
-        for page in range(1, NUM_PAGES + 1):
-            print(f"Lendo página {page}")
-            url = BASE_URL.format(page)
-            response = requests.get(url)
-            response.encoding = "utf-8"
+    def breadcrumbLinks(self, html: str):
+        breadcrumb = self.HTMLParser(html).css_first("ul.breadcrumb")
+        return [link.text() for link in breadcrumb.css("a")]
 
-            if response.status_code != 200:
-                print(f"Erro ao acessar página {page}")
-                continue
+    def sidebarLinks(self, html: str):
+        sidebar = self.HTMLParser(html).css_first("div.side_categories")
+        if sidebar is None:
+            return []
+        return [(link.text(), link.attributes.get("href")) for link in sidebar.css("ul li ul li a")]
 
-            soup = BeautifulSoup(response.text, "html.parser")
-            books = soup.find_all("article", class_="product_pod")
 
-            for book in books:
-                title = book.h3.a["title"]
+# Ordem de preferência do modo "auto"
+PARSER_BACKENDS = {
+    "selectolax": SelectolaxBackend,
+    "lxml": LxmlBackend,
+    "bs4": SoupBackend,
+}
 
-                # Preço -> float
-                price_text = book.find("p", class_="price_color").text.strip()
-                price = float(price_text.replace("£", ""))
+_backend = None
 
-                # Rating -> número
-                rating_class = book.p["class"][1]
-                rating = rating_map.get(rating_class, 0)
 
-                stock = book.find("p", class_="instock availability").text.strip()
+def createParserBackend(name: str = "auto"):
+    """
+    Instancia o backend pedido. Em "auto", usa o mais rápido que estiver instalado;
+    se um backend opcional não estiver instalado, cai para o BeautifulSoup.
+    """
+    names = list(PARSER_BACKENDS) if name == "auto" else [name]
+    for candidate in names:
+        try:
+            return PARSER_BACKENDS[candidate]()
+        except ImportError:
+            print(f"Backend de parsing '{candidate}' indisponível; tentando o próximo.")
+    return SoupBackend()
 
-                # Corrige URL da imagem
-                image_src = book.find("img")["src"].replace("../../", "")
-                image_url = urljoin(BASE_BASE, image_src)
 
-                # Descobre categoria
-                href = book.h3.a["href"]
-                detail_url = urljoin(url, href)
-                detail_resp = requests.get(detail_url)
-                detail_resp.raise_for_status()
-                detail_soup = BeautifulSoup(detail_resp.text, "html.parser")
-                category = detail_soup.find("ul", class_="breadcrumb").find_all("a")[2].text.strip()
+def setParserBackend(name: str = "auto"):
+    """Define o backend usado pelas funções de parsing deste módulo."""
+    global _backend
+    _backend = createParserBackend(name)
+    return _backend
 
-                writer.writerow([title, price, rating, stock, category, image_url])
 
-    os.rename(tempFile, FINAL_CSV)
-    print(f"✅ Arquivo salvo como: {FINAL_CSV}")
+def getParserBackend():
+    if _backend is None:
+        setParserBackend("auto")
+    return _backend
+
+
+def parsePageCount(html: str) -> int:
+    """Lê o total de páginas do paginador ("Page 1 of 50")."""
+    match = re.search(r"Page\s+\d+\s+of\s+(\d+)", html)
+    return int(match.group(1)) if match else 1
+
+
+def parseListingPage(html: str, pageUrl: str, baseUrl: str, backend=None):
+    """Extrai os livros de uma página de listagem (sem a categoria)."""
+    books = []
+
+    for title, priceText, ratingClass, stock, imageSrc, href in (backend or getParserBackend()).listingItems(html):
+        # Preço -> float
+        price = float(priceText.strip().replace("£", ""))
+
+        # Rating -> número
+        rating = RATING_MAP.get(ratingClass, 0)
+
+        # Corrige URL da imagem
+        image_url = urljoin(baseUrl, imageSrc.replace("../../", ""))
+
+        books.append({
+            "title": title,
+            "price": price,
+            "rating": rating,
+            "stock": stock.strip(),
+            "image_url": image_url,
+            "detail_url": urljoin(pageUrl, href),
+        })
+
+    return books
+
+
+def parseListing(html: str, pageUrl: str, baseUrl: str, backend=None) -> dict:
+    """Extrai os livros e o total de páginas de uma página de listagem."""
+    return {
+        "page_count": parsePageCount(html),
+        "books": parseListingPage(html, pageUrl, baseUrl, backend),
+    }
+
+
+def parseCategory(html: str, pageUrl: str = None, backend=None) -> str:
+    """Extrai a categoria do breadcrumb da página de detalhe."""
+    return (backend or getParserBackend()).breadcrumbLinks(html)[2].strip()
+
+
+def parseCategoryLinks(html: str, pageUrl: str, backend=None):
+    """Extrai (nome, url) das categorias do menu lateral (ignora o agregador "Books")."""
+    return [
+        (text.strip(), urljoin(pageUrl, href))
+        for text, href in (backend or getParserBackend()).sidebarLinks(html)
+    ]
+
+
+def listingPageUrl(firstUrl: str, page: int) -> str:
+    """URL da página N de uma listagem paginada (index.html -> page-N.html)."""
+    if page == 1:
+        return firstUrl
+    return urljoin(firstUrl, f"page-{page}.html")
+
+
+def crawlListings(engine: ScraperEngine, firstUrls):
+    """
+    Percorre listagens paginadas completas, entregando os livros de cada página
+    assim que ela é extraída.
+
+    As primeiras páginas são baixadas juntas; o paginador de cada uma informa
+    quantas páginas faltam, e todas as restantes são baixadas em um único lote.
+    Gera (índice da listagem, livros da página), na ordem das listagens e das páginas.
+
+    Uma página que falha (depois das retentativas da sessão) interrompe o crawl com
+    ListingPageFailed: um catálogo sem os livros dela não deve ser publicado.
+    """
+    parse = partial(parseListing, baseUrl=engine.baseUrl)
+    firsts = engine.fetchAllParsed(firstUrls, parse)
+
+    pending = []
+    for url, first in zip(firstUrls, firsts):
+        if first is None:
+            raise ListingPageFailed(url)
+        pending.extend(listingPageUrl(url, page) for page in range(2, first["page_count"] + 1))
+
+    rest = zip(pending, engine.iterParsed(pending, parse))
+    for index, first in enumerate(firsts):
+        yield index, first["books"]
+        for url, listing in itertools.islice(rest, first["page_count"] - 1):
+            if listing is None:
+                raise ListingPageFailed(url)
+            yield index, listing["books"]
+
+
+def requireListing(url: str, listing):
+    if listing is None:
+        raise ListingPageFailed(url)
+    return listing
+
+
+def crawlCatalogue(engine: ScraperEngine, numPages: int = None):
+    """Percorre a listagem geral (catalogue/page-N.html); a categoria fica em aberto."""
+    pageUrl = urljoin(engine.baseUrl, "catalogue/page-{}.html")
+
+    if numPages is None:
+        pages = (books for _, books in crawlListings(engine, [pageUrl.format(1)]))
+    else:
+        urls = [pageUrl.format(page) for page in range(1, numPages + 1)]
+        parse = partial(parseListing, baseUrl=engine.baseUrl)
+        pages = (requireListing(url, listing)["books"] for url, listing in zip(urls, engine.iterParsed(urls, parse)))
+
+    pageCount = 0
+    for page in pages:
+        pageCount += 1
+        for book in page:
+            yield dict(book)
+
+    if not pageCount:
+        raise RuntimeError("Não foi possível acessar a primeira página do catálogo")
+    print(f"{pageCount} páginas de listagem lidas")
+
+
+def crawlCategories(engine: ScraperEngine):
+    """
+    Percorre as listagens de cada categoria: cada livro já sai com a categoria
+    da listagem em que aparece, sem baixar a página de detalhe.
+    """
+    indexUrl = urljoin(engine.baseUrl, "catalogue/category/books_1/index.html")
+    categories = engine.fetchParsed(indexUrl, parseCategoryLinks)
+    if categories is None:
+        raise RuntimeError("Não foi possível acessar o índice de categorias")
+    if not categories:
+        raise RuntimeError("Nenhuma categoria encontrada no índice")
+
+    pageCount = 0
+    for index, page in crawlListings(engine, [url for _, url in categories]):
+        pageCount += 1
+        name = categories[index][0]
+        for book in page:
+            yield dict(book, category=name)
+
+    print(f"{len(categories)} categorias lidas ({pageCount} páginas)")
+
+
+def withCategory(book: dict, detail) -> dict:
+    """Completa a categoria com o resultado da página de detalhe (None = não precisava)."""
+    if detail is not None:
+        category = detail.result()
+        if category is None:
+            raise RuntimeError(f"Falha ao acessar detalhe: {book['detail_url']}")
+        book["category"] = category
+    return book
+
+
+def crawlBooks(engine: ScraperEngine, numPages: int = None, mode: str = "catalogue"):
+    """
+    Executa o crawl e gera os livros (dicionários com a URL de detalhe) conforme as
+    páginas são extraídas, na ordem do crawl.
+
+    mode="catalogue" (padrão): percorre a listagem geral (ordem do catálogo) e descobre
+    a categoria pela página de detalhe.
+    mode="category": percorre as listagens por categoria (ordem das categorias e páginas).
+    Bem menos requisições, mas os livros saem em outra ordem, e o id de cada livro é
+    a sua posição: todos os ids mudam em relação ao modo catalogue.
+
+    Livros repetidos (mesma URL de detalhe) são descartados, e páginas de detalhe
+    só são baixadas para os livros que ainda não têm categoria: em paralelo, até
+    DETAIL_WINDOW_PER_WORKER por thread à frente do livro entregue.
+    """
+    if mode == "category":
+        books = crawlCategories(engine)
+    elif mode == "catalogue":
+        books = crawlCatalogue(engine, numPages)
+    else:
+        raise ValueError(f"Modo de crawl inválido: {mode}")
+
+    seen = set()
+    window = deque()
+    limit = engine.concurrency * DETAIL_WINDOW_PER_WORKER
+    for book in books:
+        # Deduplicação pela URL de detalhe
+        if book["detail_url"] in seen:
+            continue
+        seen.add(book["detail_url"])
+
+        detail = None if book.get("category") else engine.executor.submit(engine.fetchParsed, book["detail_url"], parseCategory)
+        window.append((book, detail))
+        while window and (len(window) > limit or window[0][1] is None or window[0][1].done()):
+            yield withCategory(*window.popleft())
+
+    while window:
+        yield withCategory(*window.popleft())
+
+
+def createSink(name: str):
+    """Instancia um destino dos registros pelo nome (opção --sink)."""
+    # Import local: os processos de parsing reimportam este módulo e não precisam do catálogo
+    from records import CsvSink, SnapshotSink
+
+    if name == "snapshot":
+        return SnapshotSink(SNAPSHOT_DIR, quarantine_path=QUARANTINE_FILE)
+    if name == "csv":
+        return CsvSink(FINAL_CSV)
+    raise ValueError(f"Destino inválido: {name}")
+
+
+def dataExists() -> bool:
+    """Já há dados para a API: um snapshot publicado pelo scraper ou o CSV."""
+    from snapshot import published_version
+
+    return published_version(SNAPSHOT_DIR) is not None or os.path.exists(FINAL_CSV)
+
+
+def runScraping(
+    baseUrl: str = BASE_URL,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    ratePerHost: float = DEFAULT_RATE_PER_HOST,
+    numPages: int = None,
+    mode: str = "catalogue",
+    incremental: bool = False,
+    parser: str = "auto",
+    parseWorkers: int = DEFAULT_PARSE_WORKERS,
+    sinks=None,
+    cancelEvent: threading.Event = None,
+    onProgress=None,
+):
+    """
+    Executa o scraping e entrega os livros aos destinos (`sinks`).
+
+    Cada livro vira um registro tipado (records.BookRecord, os campos do modelo
+    Livro) assim que a sua página é extraída e segue direto para os destinos: por
+    padrão, o snapshot binário servido pela API, sem CSV intermediário; "csv"
+    exporta também o Livros.csv. `sinks` aceita nomes (SINK_NAMES) ou objetos com
+    write/commit/abort (ex.: um records.CatalogSink que publica o catálogo no
+    próprio processo).
+
+    `parser` escolhe o backend de parsing ("auto", "selectolax", "lxml" ou "bs4");
+    com `parseWorkers` > 0, o parsing roda em um pool de processos alimentado por
+    uma fila limitada. Os livros saem na ordem das páginas.
+
+    Se `cancelEvent` for sinalizado, os downloads e parsings pendentes são
+    descartados e ScrapeCancelled é lançada sem publicar nada nem alterar o estado.
+    Uma página de listagem que não pôde ser baixada (ListingPageFailed) também
+    descarta os destinos e o estado: o run falha em vez de publicar um catálogo
+    incompleto.
+    `onProgress(páginas, requisições)` é chamado a cada página concluída.
+
+    Com `incremental`, refaz o crawl mesmo que os dados já existam, usando requisições
+    condicionais (ETag/Last-Modified) e o hash das páginas para só extrair o que
+    mudou. Retorna o delta (livros adicionados, alterados e removidos), que também
+    é salvo em scrape_delta.json; os destinos só são publicados quando há mudanças.
+    """
+    os.makedirs(DATA_DIR, exist_ok=True)
+
+    if not incremental:
+        if dataExists():
+            print(f"Dados já existem (snapshot publicado ou {FINAL_CSV})")
+            return None
+
+    # Import local: os processos de parsing reimportam este módulo e não precisam do catálogo
+    from records import BookRecord
+
+    start = time.perf_counter()
+    state = ScrapeState.load(STATE_FILE)
+    print(f"Backend de parsing: {setParserBackend(parser).name}")
+
+    sinks = [createSink(sink) if isinstance(sink, str) else sink for sink in (sinks or DEFAULT_SINKS)]
+    current = {}
+    try:
+        with ScraperEngine(
+            baseUrl, concurrency=concurrency, ratePerHost=ratePerHost,
+            state=state, conditional=incremental,
+            parseWorkers=parseWorkers, cancelEvent=cancelEvent, onProgress=onProgress,
+        ) as engine:
+            for book in crawlBooks(engine, numPages, mode=mode):
+                record = BookRecord(book["title"], book["price"], book["rating"], book["stock"], book["category"], book["image_url"])
+                current[book["detail_url"]] = list(record)
+                for sink in sinks:
+                    sink.write(record)
+            print(
+                f"{engine.requestCount} requisições HTTP "
+                f"({engine.counters['not_modified']} não modificadas, "
+                f"{engine.counters['unchanged']} sem mudança, {engine.counters['parsed']} extraídas)"
+            )
+    except BaseException:
+        for sink in sinks:
+            sink.abort()
+        raise
+
+    delta = state.diff(current)
+    state.books = current
+    print(f"Delta: {len(delta['added'])} adicionados, {len(delta['changed'])} alterados, {len(delta['removed'])} removidos")
+
+    with open(DELTA_FILE, "w", encoding="utf-8") as file:
+        json.dump(delta, file, ensure_ascii=False)
+
+    if incremental and dataExists() and not any(delta.values()):
+        for sink in sinks:
+            sink.abort()
+        state.save(STATE_FILE)
+        print("Nenhuma mudança no catálogo. Dados mantidos.")
+        return delta
+
+    # Todos os destinos recebem a mesma versão (instante em ns). O CSV é publicado por
+    # último e recebe a versão como mtime: os workers já encontram o snapshot pronto.
+    version = str(time.time_ns())
+    pending = sorted(sinks, key=lambda sink: getattr(sink, "name", None) == "csv")
+    try:
+        while pending:
+            published = pending[0].commit(version)
+            pending.pop(0)
+            if isinstance(published, str):
+                print(f"Publicado: {published}")
+    except BaseException:
+        for sink in pending:
+            sink.abort()
+        raise
+
+    state.save(STATE_FILE)
+    print(f"✅ Versão {version} publicada ({len(current)} livros em {time.perf_counter() - start:.1f}s)")
     print("Script finalizado com sucesso.")
+    return delta
 
 
 if __name__ == "__main__":
-    runScraping()
+    parser = argparse.ArgumentParser(description="Scraping do Books to Scrape")
+    parser.add_argument("--base-url", default=BASE_URL, help="Site alvo (ex: http://127.0.0.1:8001/ para o servidor de fixtures)")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="Número de downloads simultâneos")
+    parser.add_argument("--rate", type=float, default=DEFAULT_RATE_PER_HOST, help="Requisições por segundo por host (0 = sem limite)")
+    parser.add_argument("--pages", type=int, default=None, help="Número de páginas no modo catalogue (padrão: lido do paginador)")
+    parser.add_argument("--mode", choices=("catalogue", "category"), default="catalogue", help="Percorre a listagem geral + detalhes (ordem e ids do catálogo) ou as listagens por categoria (menos requisições, ids em outra ordem)")
+    parser.add_argument("--incremental", action="store_true", help="Atualiza os dados existentes usando requisições condicionais e gera o delta")
+    parser.add_argument("--parser", choices=("auto",) + tuple(PARSER_BACKENDS), default="auto", help="Backend de parsing do HTML (auto = o mais rápido instalado)")
+    parser.add_argument("--parse-workers", type=int, default=DEFAULT_PARSE_WORKERS, help="Processos de parsing (0 = parsing nas threads de download)")
+    parser.add_argument("--sink", action="append", choices=SINK_NAMES, default=None, help="Destino dos livros (repetível; padrão: snapshot, ou SCRAPER_SINKS). csv exporta o Livros.csv")
+    args = parser.parse_args()
+
+    try:
+        runScraping(
+            args.base_url, concurrency=args.concurrency, ratePerHost=args.rate,
+            numPages=args.pages, mode=args.mode, incremental=args.incremental,
+            parser=args.parser, parseWorkers=args.parse_workers, sinks=args.sink,
+        )
+    except (KeyboardInterrupt, ScrapeCancelled):
+        print("Scraping cancelado. Dados publicados e estado mantidos.")
+    except ListingPageFailed as e:
+        print(f"ERRO: {e}. Dados publicados e estado mantidos.")
+        sys.exit(1)
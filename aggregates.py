@@ -0,0 +1,84 @@
+import numpy as np
+from typing import Any, Dict, List, Optional
+
+# Ratings válidos (1 a 5); o índice 0 do histograma fica sem uso
+MAX_RATING = 5
+
+
+class Aggregates:
+    """
+    Agregados de um snapshot do catálogo.
+
+    Guarda contagem, soma de preços, histograma de ratings e contagem/soma de
+    preços por categoria. São calculados uma vez, junto do snapshot (cada recarga
+    monta um catálogo novo com os seus agregados), de modo que os endpoints de
+    estatísticas só leem valores prontos.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.preco_sum = 0.0
+        self.rating_counts = np.zeros(MAX_RATING + 1, dtype=np.int64)
+        self.category_counts: Dict[str, int] = {}
+        self.category_sums: Dict[str, float] = {}
+        self._overview: Optional[Dict[str, Any]] = None
+        self._categories: Optional[List[Dict[str, Any]]] = None
+
+    @classmethod
+    def from_columns(
+        cls,
+        precos: np.ndarray,
+        ratings: np.ndarray,
+        categoria_codes: np.ndarray,
+        categorias: List[str],
+    ) -> "Aggregates":
+        """Calcula os agregados de uma vez a partir das colunas do catálogo."""
+        aggregates = cls()
+        precos = np.asarray(precos, dtype=np.float64)
+        aggregates.count = len(precos)
+        aggregates.preco_sum = float(precos.sum())
+        aggregates.rating_counts = np.bincount(
+            np.clip(np.asarray(ratings, dtype=np.int64), 0, MAX_RATING),
+            minlength=MAX_RATING + 1,
+        )
+
+        n_categorias = len(categorias)
+        counts = np.bincount(categoria_codes, minlength=n_categorias)
+        sums = np.bincount(categoria_codes, weights=precos, minlength=n_categorias)
+        for code, categoria in enumerate(categorias):
+            if counts[code] > 0:
+                aggregates.category_counts[categoria] = int(counts[code])
+                aggregates.category_sums[categoria] = float(sums[code])
+        return aggregates
+
+    # --- Leitura ---
+    def overview(self) -> Dict[str, Any]:
+        """Total de livros, preço médio e distribuição de ratings (1 a 5)."""
+        overview = self._overview
+        if overview is None:
+            preco_medio = round(self.preco_sum / self.count, 2) if self.count else 0.0
+            overview = {
+                'total_livros': self.count,
+                'preco_medio': preco_medio,
+                'distribuicao_ratings': [
+                    {'rating': rating, 'count': int(self.rating_counts[rating])}
+                    for rating in range(1, MAX_RATING + 1)
+                ] if self.count else [],
+            }
+            self._overview = overview
+        return overview
+
+    def categories(self) -> List[Dict[str, Any]]:
+        """Contagem e preço médio por categoria, em ordem alfabética."""
+        categories = self._categories
+        if categories is None:
+            categories = [
+                {
+                    'categoria': categoria,
+                    'total_livros': self.category_counts[categoria],
+                    'preco_medio': round(self.category_sums[categoria] / self.category_counts[categoria], 2),
+                }
+                for categoria in sorted(self.category_counts)
+            ]
+            self._categories = categories
+        return categories
@@ -1,10 +1,16 @@
-from fastapi import APIRouter, HTTPException
-from models import Token, UserLogin, TokenRefresh
+import sqlite3
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.security import HTTPAuthorizationCredentials
+from models import Token, UserLogin, TokenRefresh, AuthenticatedUser
 from auth_utils import (
     verify_password_simple,
     create_access_token, 
     create_refresh_token, 
-    decode_token,
+    verify_token,
+    revoke_token,
+    get_current_user,
+    http_bearer,
     TEST_USER
 )
 from jose import JWTError
@@ -49,7 +55,7 @@ async def refresh_access_token(token_refresh: TokenRefresh):
     Usa o Refresh Token para obter um novo Access Token e um novo Refresh Token.
     """
     try:
-        payload = decode_token(token_refresh.refresh_token)
+        payload = verify_token(token_refresh.refresh_token)
         # O token DEVE ser do tipo "refresh"
         if payload.get("sub") != "refresh":
              raise HTTPException(status_code=401, detail="Token inválido. É necessário um Refresh Token.")
@@ -74,4 +80,25 @@ async def refresh_access_token(token_refresh: TokenRefresh):
             status_code=401,
             detail="Refresh Token inválido ou expirado",
             headers={"WWW-Authenticate": "Bearer"},
-        )
\ No newline at end of file
+        )
+
+# Revoga os tokens (síncrona: a gravação da lista de revogação no SQLite roda no threadpool)
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT, summary="Revoga o Access Token (e opcionalmente o Refresh Token)")
+def logout(
+    token_refresh: Optional[TokenRefresh] = None,
+    current_user: AuthenticatedUser = Depends(get_current_user),
+    security_credentials: HTTPAuthorizationCredentials = Depends(http_bearer),
+):
+    """
+    Revoga o Access Token enviado no header e, se informado no corpo, o Refresh Token.
+    Tokens revogados são recusados mesmo que ainda estejam no cache de verificação.
+    """
+    try:
+        revoke_token(security_credentials.credentials)
+        if token_refresh is not None:
+            revoke_token(token_refresh.refresh_token)
+    except (sqlite3.Error, OSError):
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Não foi possível gravar a revogação; tente novamente",
+        )
@@ -1,90 +1,282 @@
 from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from typing import List, Optional
-from models import Livro
-from utils import BOOKS_DATA
+import numpy as np
+from models import Livro, SimilarBook, SimilarBooks
+from catalog import Catalog
+from query import BookQuery, SORT_FIELDS, execute_query
+from response_utils import PreEncodedJSONResponse
+from similarity import DEFAULT_SIMILAR, MAX_SIMILAR, SIMILARITY_STORE
+from utils import get_catalog
 
 router = APIRouter(
     prefix="/v1/books",
     tags=["Livros"],
 )
 
-# Lista todos os livros
+# Tamanho dos blocos de linhas enviados pela exportação em streaming
+EXPORT_CHUNK_ROWS = 1000
+
+LIMIT_DESCRIPTION = "Número máximo de livros por página (padrão: todos)"
+AFTER_DESCRIPTION = "Cursor: ID do último livro da página anterior (valor do header X-Next-Cursor)"
+
+
+def paginated_rows(
+    catalog: Catalog,
+    positions: Optional[np.ndarray],
+    limit: Optional[int],
+    after: Optional[int],
+    in_id_order: bool = True,
+) -> PreEncodedJSONResponse:
+    """
+    Aplica a paginação por cursor e monta a resposta com o JSON pré-codificado das
+    linhas da página. O cursor da próxima página (se houver) vai no header X-Next-Cursor.
+    """
+    try:
+        page, next_cursor = catalog.paginate(positions, limit=limit, after=after, in_id_order=in_id_order)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    headers = {"X-Next-Cursor": str(next_cursor)} if next_cursor is not None else None
+    return PreEncodedJSONResponse(catalog.encode_rows(page), headers=headers)
+
+
+def encode_similar(catalog: Catalog, positions: np.ndarray, scores: np.ndarray) -> bytes:
+    """Lista JSON de SimilarBook: o JSON pré-codificado de cada livro com o campo 'similaridade'."""
+    return b"[" + b",".join(
+        catalog.encode_row(pos)[:-1] + b',"similaridade":' + repr(round(score, 4)).encode("ascii") + b"}"
+        for pos, score in zip(positions.tolist(), scores.tolist())
+    ) + b"]"
+
+
+# Lista todos os livros (ou um lote de livros pelos IDs)
 @router.get("/", response_model=List[Livro], summary="Lista todos os livros disponíveis")
-async def get_all_books():
-    return BOOKS_DATA
+async def get_all_books(
+    ids: Optional[str] = Query(None, description="Lista de IDs separados por vírgula (ex: 1,5,9) para buscar vários livros de uma vez"),
+    limit: Optional[int] = Query(None, ge=1, description=LIMIT_DESCRIPTION),
+    after: Optional[int] = Query(None, description=AFTER_DESCRIPTION)
+):
+    """
+    Sem parâmetros, retorna todos os livros.
+    Com 'ids', retorna os livros encontrados na ordem pedida (IDs inexistentes são ignorados e repetidos aparecem uma vez).
+    Com 'limit', pagina por cursor: passe o X-Next-Cursor recebido em 'after' para a próxima página.
+    """
+    catalog = get_catalog()
+    if ids is None:
+        return paginated_rows(catalog, None, limit, after)
+
+    try:
+        book_ids = [int(book_id) for book_id in ids.split(",") if book_id.strip()]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="O parâmetro 'ids' deve conter apenas inteiros separados por vírgula")
+
+    return paginated_rows(catalog, catalog.positions(book_ids), limit, after, in_id_order=False)
+
+# Exporta o catálogo em NDJSON (streaming)
+@router.get(
+    "/export",
+    response_class=StreamingResponse,
+    responses={200: {"content": {"application/x-ndjson": {}}, "description": "Um livro (Livro) por linha"}},
+    summary="Exporta os livros em NDJSON (streaming)"
+)
+async def export_books(
+    limit: Optional[int] = Query(None, ge=1, description="Número máximo de livros exportados (padrão: todos)"),
+    after: Optional[int] = Query(None, description="Exporta a partir do livro seguinte a este ID")
+):
+    """
+    Envia um livro por linha, em blocos, à medida que as linhas são geradas,
+    sem montar a resposta inteira em memória.
+    """
+    catalog = get_catalog()
+    page, _ = catalog.paginate(None, limit=limit, after=after)
+
+    def generate():
+        for start in range(0, len(page), EXPORT_CHUNK_ROWS):
+            yield catalog.encode_ndjson(page[start:start + EXPORT_CHUNK_ROWS])
+
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
 
 # Busca livros por categoria e/ou titulo
 @router.get("/search", response_model=List[Livro], summary="Busca livros por título e/ou categoria")
 async def search_books(
     title: Optional[str] = Query(None, description="Parte do título do livro para buscar"),
-    category: Optional[str] = Query(None, description="Parte do nome da categoria do livro para buscar")
+    category: Optional[str] = Query(None, description="Parte do nome da categoria do livro para buscar"),
+    rank: bool = Query(False, description="Ordena os resultados por relevância em vez da ordem do catálogo"),
+    limit: Optional[int] = Query(None, ge=1, description=LIMIT_DESCRIPTION),
+    after: Optional[int] = Query(None, description=AFTER_DESCRIPTION)
 ):
+    """
+    Busca por substring (sem diferenciar maiúsculas) usando os índices de trigramas de títulos e categorias.
+    """
+    catalog = get_catalog()
     try:
         if not title and not category:
-            return BOOKS_DATA
+            return paginated_rows(catalog, None, limit, after)
 
-        results = [
-            book for book in BOOKS_DATA
-            if (not title or title.lower() in book['titulo'].lower())
-            and (not category or category.lower() in book['categoria'].lower())
-        ]
+        positions = catalog.search(title=title, category=category, rank=rank)
 
-        if not results:
+        if len(positions) == 0:
             raise HTTPException(status_code=404, detail="Nenhum livro encontrado com os filtros fornecidos")
 
-        return results
+        return paginated_rows(catalog, positions, limit, after, in_id_order=not rank)
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro na busca: {str(e)}")
 
+# Consulta combinando vários filtros
+@router.get("/query", response_model=List[Livro], summary="Consulta livros combinando título, categoria, preço e rating")
+async def query_books(
+    title: Optional[str] = Query(None, description="Parte do título do livro"),
+    category: Optional[str] = Query(None, description="Parte do nome da categoria"),
+    min_price: Optional[float] = Query(None, ge=0, description="Preço mínimo (inclusivo)"),
+    max_price: Optional[float] = Query(None, ge=0, description="Preço máximo (inclusivo)"),
+    min_rating: Optional[int] = Query(None, ge=0, le=5, description="Rating mínimo (inclusivo)"),
+    max_rating: Optional[int] = Query(None, ge=0, le=5, description="Rating máximo (inclusivo)"),
+    sort: Optional[str] = Query(None, pattern=f"^({'|'.join(SORT_FIELDS)})$", description="Ordena por 'price' ou 'rating' ('-' para decrescente; padrão: ordem do catálogo)"),
+    limit: Optional[int] = Query(None, ge=1, description=LIMIT_DESCRIPTION),
+    offset: int = Query(0, ge=0, description="Número de livros a pular antes de retornar"),
+    after: Optional[int] = Query(None, description=AFTER_DESCRIPTION)
+):
+    """
+    Aplica todos os filtros informados em uma única consulta.
+
+    O planejador começa pelo filtro mais seletivo (estimado pelos índices de
+    categoria, rating, preço e trigramas de título) e só testa os demais nos
+    candidatos restantes. Com 'sort' e 'limit', apenas os primeiros resultados são
+    selecionados (top-k), sem ordenar todo o conjunto. A ordem escolhida vai no header X-Query-Plan.
+    """
+    if min_price is not None and max_price is not None and min_price > max_price:
+        raise HTTPException(status_code=400, detail="O valor 'min_price' deve ser menor ou igual a 'max_price'")
+    if min_rating is not None and max_rating is not None and min_rating > max_rating:
+        raise HTTPException(status_code=400, detail="O valor 'min_rating' deve ser menor ou igual a 'max_rating'")
+
+    catalog = get_catalog()
+    query = BookQuery(
+        title=title, category=category,
+        min_price=min_price, max_price=max_price,
+        min_rating=min_rating, max_rating=max_rating,
+        sort=sort,
+    )
+
+    # Um livro a mais que a página indica se existe uma próxima página
+    top = offset + limit + 1 if sort and limit is not None and after is None else None
+    positions, plan = execute_query(catalog, query, top=top)
+
+    if len(positions) == 0:
+        raise HTTPException(status_code=404, detail="Nenhum livro encontrado com os filtros fornecidos")
+
+    response = paginated_rows(catalog, positions[offset:], limit, after, in_id_order=sort is None)
+    response.headers["X-Query-Plan"] = ",".join(f"{name}={estimate}" for name, estimate in plan) or "scan"
+    return response
+
 # Livros com melhor avaliação
 @router.get("/top-rated", response_model=List[Livro], summary="Lista os livros com a melhor avaliação (Rating 5)")
-async def get_top_rated_books():
+async def get_top_rated_books(
+    limit: Optional[int] = Query(None, ge=1, description=LIMIT_DESCRIPTION),
+    after: Optional[int] = Query(None, description=AFTER_DESCRIPTION)
+):
     """
     Retorna todos os livros que possuem a avaliação máxima (rating 5).
     """
-    # Filtra livros com rating 5
-    top_rated = [book for book in BOOKS_DATA if book['rating'] == 5]
+    catalog = get_catalog()
+
+    # Livros com rating 5, direto do bitmap de ratings
+    top_rated = catalog.with_rating(5)
     
-    if not top_rated:
+    if len(top_rated) == 0:
         raise HTTPException(status_code=404, detail="Nenhum livro encontrado com avaliação máxima (5)")
         
-    return top_rated
+    return paginated_rows(catalog, top_rated, limit, after)
 
 # Filtra os livros por faixa de preço
 @router.get("/price-range", response_model=List[Livro], summary="Filtra livros por faixa de preço")
 async def get_books_by_price_range(
     min: float = Query(0.0, description="Preço mínimo (inclusivo)"),
-    max: Optional[float] = Query(None, description="Preço máximo (inclusivo)")
+    max: Optional[float] = Query(None, description="Preço máximo (inclusivo)"),
+    sort: Optional[str] = Query(None, pattern="^(asc|desc)$", description="Ordena por preço: 'asc' ou 'desc' (padrão: ordem do catálogo)"),
+    limit: Optional[int] = Query(None, ge=1, description="Número máximo de livros retornados"),
+    offset: int = Query(0, ge=0, description="Número de livros a pular antes de retornar"),
+    after: Optional[int] = Query(None, description=AFTER_DESCRIPTION)
 ):
     """
     Filtra os livros cuja faixa de preço se encaixa entre 'min' e 'max'.
     O valor 'max' padrão é infinito para pegar todos os livros acima do 'min' se o 'max' não for especificado.
+    A busca usa o índice ordenado de preços (duas buscas binárias e uma fatia contígua).
     """
+    catalog = get_catalog()
 
     # Incluindo o valor infinto como padrão do valor máximo, caso não seja usado nenhum
     max_inf = max if max is not None else float('inf')
     if min >= max_inf:
         raise HTTPException(status_code=400, detail="O valor 'min' deve ser menor que o valor 'max'")
     
-    results = [
-        book for book in BOOKS_DATA
-        if min <= book['preco'] <= max_inf
-    ]
+    positions = catalog.price_range(min, max_inf, sort=sort)
     
-    if not results:
+    if len(positions) == 0:
         raise HTTPException(status_code=404, detail=f"Nenhum livro encontrado na faixa de preço de £{min:.2f} a £{max_inf:.2f}")
-        
-    return results
+    
+    # Paginação aplicada sobre as posições, antes de materializar as linhas
+    return paginated_rows(catalog, positions[offset:], limit, after, in_id_order=sort is None)
+
+# Livros similares de vários livros de uma vez
+@router.get("/similar", response_model=List[SimilarBooks], summary="Livros similares de vários livros (consulta em lote)")
+async def get_similar_books_batch(
+    ids: str = Query(..., description="Lista de IDs separados por vírgula (ex: 1,5,9)"),
+    limit: int = Query(DEFAULT_SIMILAR, ge=1, le=MAX_SIMILAR, description="Número de livros similares por livro")
+):
+    """
+    Os livros similares de cada ID, na ordem pedida (IDs inexistentes são ignorados),
+    calculados em um único lote sobre a matriz de features.
+    """
+    try:
+        book_ids = [int(book_id) for book_id in ids.split(",") if book_id.strip()]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="O parâmetro 'ids' deve conter apenas inteiros separados por vírgula")
+
+    catalog = get_catalog()
+    positions = catalog.positions(book_ids)
+    if len(positions) == 0:
+        raise HTTPException(status_code=404, detail="Nenhum dos livros informados foi encontrado")
+
+    neighbours, scores = SIMILARITY_STORE.get(catalog).similar(positions, limit)
+    body = b",".join(
+        b'{"id":' + str(int(catalog.ids[pos])).encode("ascii") + b',"similares":' + encode_similar(catalog, row, row_scores) + b"}"
+        for pos, row, row_scores in zip(positions.tolist(), neighbours, scores)
+    )
+    return PreEncodedJSONResponse(b"[" + body + b"]")
+
+# Livros similares (título, categoria, preço e rating)
+@router.get("/{book_id}/similar", response_model=List[SimilarBook], summary="Lista os livros mais similares a um livro")
+async def get_similar_books(
+    book_id: int,
+    limit: int = Query(DEFAULT_SIMILAR, ge=1, le=MAX_SIMILAR, description="Número de livros similares retornados")
+):
+    """
+    Similaridade de cosseno entre as features dos livros: TF-IDF do título, categoria,
+    preço e rating. A matriz é montada uma vez por versão dos dados (junto do snapshot)
+    e aberta na recarga do catálogo; cada consulta só calcula os scores do livro e
+    seleciona os maiores. Enquanto a matriz da versão atual não está pronta, responde 503.
+    """
+    catalog = get_catalog()
+    position = catalog.position(book_id)
+    if position is None:
+        raise HTTPException(status_code=404, detail=f"Livro com ID {book_id} não encontrado")
+
+    neighbours, scores = SIMILARITY_STORE.get(catalog).similar(np.array([position]), limit)
+    return PreEncodedJSONResponse(encode_similar(catalog, neighbours[0], scores[0]))
 
 # Retorna detalhes de um livro pelo ID
 @router.get("/{book_id}", response_model=Livro, summary="Retorna detalhes de um livro pelo ID")
 async def get_book_by_id(book_id: int):
-    # Busca o livro na lista pelo ID
-    book = next((book for book in BOOKS_DATA if book['id'] == book_id), None)
+    catalog = get_catalog()
+
+    # Busca o livro pelo índice de chave primária
+    position = catalog.position(book_id)
     
-    if book is None:
+    if position is None:
         # Se o livro não for encontrado, retorna 404 Not Found
         raise HTTPException(status_code=404, detail=f"Livro com ID {book_id} não encontrado")
         
-    return book
+    return PreEncodedJSONResponse(catalog.encode_row(position))
@@ -1,6 +1,6 @@
 from fastapi import APIRouter
 from typing import List
-from utils import BOOKS_DATA
+from utils import get_catalog
 
 router = APIRouter(
     prefix="/v1/categories",
@@ -10,6 +10,7 @@ router = APIRouter(
 # GET no /api/v1/categories - lista todas as categorias
 @router.get("/", response_model=List[str], summary="Lista todas as categorias de livros disponíveis")
 async def get_all_categories():
-    # Usa um set para obter apenas categorias únicas, depois converte para lista
-    categories = sorted(list({book['categoria'] for book in BOOKS_DATA}))
-    return categories
\ No newline at end of file
+    catalog = get_catalog()
+
+    # Categorias do índice de bitmap (dicionário único e ordenado, só as que têm livros)
+    return catalog.category_names()
\ No newline at end of file
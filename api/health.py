@@ -1,6 +1,8 @@
-from fastapi import APIRouter
-from models import HealthStatus
-from utils import BOOKS_DATA
+from fastapi import APIRouter, Response, status
+from models import HealthStatus, MemoryUsage, ReadinessStatus
+from metrics import process_rss_bytes
+from similarity import SIMILARITY_STORE
+from utils import CATALOG_STORE
 
 router = APIRouter(
     prefix="/v1/health",
@@ -10,10 +12,57 @@ router = APIRouter(
 # GET no /api/v1/health - verifica o status da api e conectividade com os dados
 @router.get("/", response_model=HealthStatus, summary="Verifica o status da API e conectividade com os dados")
 async def health_check():
-    # Verifica se os dados foram carregados (lista não vazia)
-    data_status = "ok" if BOOKS_DATA else "erro (dados não carregados)"
+    # Não espera a primeira carga: durante ela, o catálogo atual é o vazio
+    catalog = CATALOG_STORE.get()
+
+    # Verifica se os dados foram carregados (catálogo não vazio)
+    if not CATALOG_STORE.loaded:
+        data_status = "carregando"
+    else:
+        data_status = "ok" if catalog else "erro (dados não carregados)"
     
     return HealthStatus(
         status="online",
-        data_source=data_status
-    )
\ No newline at end of file
+        data_source=data_status,
+        data_version=catalog.version,
+        rows=len(catalog),
+        load_seconds=catalog.load_seconds,
+        memory=MemoryUsage(catalog_bytes=catalog.nbytes(), rss_bytes=process_rss_bytes()),
+        ingest=catalog.load_report
+    )
+
+# GET no /api/v1/health/live - liveness: o processo está respondendo
+@router.get("/live", summary="Liveness: o worker está de pé (não depende dos dados)")
+async def liveness():
+    return {"status": "alive"}
+
+# GET no /api/v1/health/ready - readiness: o worker pode receber tráfego
+@router.get(
+    "/ready",
+    response_model=ReadinessStatus,
+    responses={503: {"model": ReadinessStatus, "description": "Dados ainda não carregados (ou vazios)"}},
+    summary="Readiness: os dados foram carregados e o worker pode receber tráfego"
+)
+async def readiness(response: Response):
+    """
+    Retorna 200 quando a primeira carga terminou com dados, e 503 enquanto ela está
+    em andamento ou se o catálogo ficou vazio.
+
+    A matriz de similares é preparada depois da carga e não bloqueia a readiness:
+    o campo `similarity` diz se ela já está aberta (até lá, as rotas de similares
+    respondem 503).
+    """
+    catalog = CATALOG_STORE.get()
+    if not CATALOG_STORE.loaded:
+        state = "loading"
+    else:
+        state = "ready" if catalog else "no_data"
+    if state != "ready":
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    return ReadinessStatus(
+        status=state,
+        rows=len(catalog),
+        data_version=catalog.version,
+        error=CATALOG_STORE.error,
+        similarity=None if state != "ready" else "ready" if SIMILARITY_STORE.ready(catalog) else "preparing",
+    )
@@ -0,0 +1,58 @@
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import PlainTextResponse
+from models import AuthenticatedUser, ProfilerStatus
+from auth_utils import get_current_user
+from metrics import METRICS
+from profiler import PROFILER
+
+router = APIRouter(
+    prefix="/metrics",
+    tags=["Métricas"],
+)
+
+# Content-Type do formato de texto do Prometheus
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+# GET no /api/metrics - métricas do worker no formato do Prometheus
+@router.get("", response_class=PlainTextResponse, summary="Métricas do processo no formato de texto do Prometheus")
+async def get_metrics():
+    """
+    Latência e tamanho das respostas por rota (histogramas), requisições em andamento,
+    duração dos trechos da camada de dados (busca em índice, filtragem, serialização,
+    decodificação do token), caches, catálogo e memória do processo.
+    """
+    return PlainTextResponse(METRICS.render(), media_type=PROMETHEUS_CONTENT_TYPE)
+
+# Profiler por amostragem (desligado por padrão)
+@router.get("/profiler", response_model=ProfilerStatus, summary="Estado do profiler por amostragem")
+async def get_profiler_status(current_user: AuthenticatedUser = Depends(get_current_user)):
+    return PROFILER.status()
+
+# Ligar e desligar esperam a thread de amostragem (lock e join): rotas síncronas,
+# executadas no threadpool, para não bloquear o event loop
+@router.post("/profiler/start", response_model=ProfilerStatus, summary="Liga o profiler por amostragem neste worker")
+def start_profiler(
+    interval_ms: float = Query(5.0, ge=1.0, le=1000.0, description="Intervalo entre amostras, em milissegundos"),
+    current_user: AuthenticatedUser = Depends(get_current_user)
+):
+    """
+    As amostras anteriores são descartadas. Cada worker tem o seu profiler: com
+    vários workers, a requisição liga apenas o worker que a recebeu.
+    """
+    PROFILER.start(interval_ms / 1000)
+    return PROFILER.status()
+
+@router.post("/profiler/stop", response_model=ProfilerStatus, summary="Desliga o profiler por amostragem")
+def stop_profiler(current_user: AuthenticatedUser = Depends(get_current_user)):
+    PROFILER.stop()
+    return PROFILER.status()
+
+# Também síncrona: folded() toma o lock das amostras
+@router.get("/profiler/stacks", response_class=PlainTextResponse, summary="Pilhas amostradas no formato folded")
+def get_profiler_stacks(current_user: AuthenticatedUser = Depends(get_current_user)):
+    """
+    Uma pilha por linha ("arquivo:função;...;arquivo:função contagem"), pronta para
+    flamegraph.pl ou speedscope.
+    """
+    return PlainTextResponse(PROFILER.folded())
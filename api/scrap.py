@@ -1,105 +1,86 @@
 # Arquivo: api/scrap.py
 
-from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks
-from models import AuthenticatedUser
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from typing import List
+from models import AuthenticatedUser, ScrapeJob
 from auth_utils import get_current_user
-from datetime import datetime
+from jobs import ACTIVE_STATES, FAILED, JOBS_DB, SUCCEEDED, JobAlreadyRunning, JobStore
+import subprocess
+import threading
 import sys
 import os
-import importlib.util
 
 router = APIRouter(
     prefix="/v1",
     tags=["Web Scraping"],
 )
 
-# Variável de estado global para a tarefa de scraping
-scraping_status = {
-    "running": False,
-    "success": None, # True, False ou None (Não iniciado/Pendente)
-    "last_run": None,
-    "error_message": None
-}
+# Tipo dos jobs de scraping na tabela de jobs
+JOB_KIND = "scrap"
 
-# --- Importação Dinâmica do runScraping ---
-def import_run_scraping():
-    """Importa dinamicamente a função runScraping do Script/webscrap.py."""
-    
-    # Caminho para o arquivo webscrap.py (assumindo que está em PROJECT_ROOT/Script/webscrap.py)
-    SCRIPT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Script", "webscrap.py")
-    
-    if not os.path.exists(SCRIPT_PATH):
-        raise FileNotFoundError(f"Script de web scraping não encontrado em: {SCRIPT_PATH}")
+# Processo que executa o job (Scripts/ScrapeJob.py, em PROJECT_ROOT/Scripts)
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+JOB_SCRIPT_PATH = os.path.join(PROJECT_ROOT, "Scripts", "ScrapeJob.py")
 
-    # Cria um spec de módulo e carrega
-    spec = importlib.util.spec_from_file_location("scrapeBooks", SCRIPT_PATH)
-    if spec is None:
-        raise ImportError(f"Não foi possível carregar o spec do módulo em: {SCRIPT_PATH}")
+# Estado compartilhado por todos os workers (SQLite), no lugar de um dict por processo
+JOB_STORE = JobStore(os.path.join(PROJECT_ROOT, JOBS_DB))
 
-    scrapeBooks = importlib.util.module_from_spec(spec)
-    sys.modules["scrapeBooks"] = scrapeBooks
-    spec.loader.exec_module(scrapeBooks)
-    
-    return scrapeBooks.runScraping
 
-# --- Tarefa de Background (síncrona) ---
-def scrapingTask(runScraping_func):
+# --- Processo do Job ---
+def start_job_process(job_id: int) -> subprocess.Popen:
     """
-    Função síncrona que executa o scraping e atualiza o status.
-    Deve ser rodada em um threadpool.
+    Inicia o job em um processo separado do worker da API: o crawl não disputa CPU
+    (nem o GIL) com as requisições. O job publica um novo snapshot binário e os workers
+    o percebem pela versão dos dados.
     """
-    try:
-        scraping_status["running"] = True
-        scraping_status["success"] = None
-        scraping_status["error_message"] = None
-        scraping_status["last_run"] = datetime.now().isoformat()
-
-        # Chama a função runScraping importada
-        runScraping_func()
-
-        scraping_status["success"] = True
+    if not os.path.exists(JOB_SCRIPT_PATH):
+        raise FileNotFoundError(f"Script do job de scraping não encontrado em: {JOB_SCRIPT_PATH}")
 
-    except Exception as e:
-        scraping_status["success"] = False
-        scraping_status["error_message"] = str(e)
-        print("Erro no scraping:", e)
-    finally:
-        scraping_status["running"] = False
+    process = subprocess.Popen(
+        [sys.executable, JOB_SCRIPT_PATH, "--job-id", str(job_id), "--db", JOB_STORE.path],
+        cwd=PROJECT_ROOT,
+        start_new_session=True,
+    )
+    # Recolhe o processo quando ele terminar (evita processos zumbis no worker)
+    threading.Thread(target=process.wait, daemon=True).start()
+    return process
 
 # ----------------------------------------------------
 # POST /api/v1/scrap - Inicia o webscrap (Assíncrono)
+# Rota síncrona: a gravação no SQLite e o Popen rodam no threadpool, fora do event loop
 # ----------------------------------------------------
 @router.post(
-    "/scrap", 
-    status_code=status.HTTP_202_ACCEPTED, 
+    "/scrap",
+    status_code=status.HTTP_202_ACCEPTED,
     summary="Inicia a atualização do Web Scraping em segundo plano"
 )
-async def run_webscrap(
-    background_tasks: BackgroundTasks,
+def run_webscrap(
     current_user: AuthenticatedUser = Depends(get_current_user)
 ):
     """
-    Inicia o script de web scraping em uma tarefa de background, retornando 202 imediatamente.
+    Registra um job de scraping e o executa em um processo separado, retornando 202 imediatamente.
+    Só um job roda por vez, mesmo com vários workers.
     """
-    if scraping_status["running"]:
+    try:
+        job = JOB_STORE.create(JOB_KIND, username=current_user.username)
+    except JobAlreadyRunning as e:
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
-            detail="A tarefa de Web Scraping já está em execução. Verifique /v1/scrap_status."
+            detail=f"A tarefa de Web Scraping já está em execução (job {e.job['id']}). Verifique /v1/scrap_status."
         )
 
     try:
-        runScraping_func = import_run_scraping()
-    except (FileNotFoundError, ImportError) as e:
-         raise HTTPException(
+        start_job_process(job["id"])
+    except OSError as e:
+        JOB_STORE.finish(job["id"], FAILED, f"Falha ao iniciar o processo do job: {e}")
+        raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Falha ao carregar o script de scraping: {e}"
+            detail=f"Falha ao iniciar o script de scraping: {e}"
         )
 
-    # Adiciona a tarefa síncrona ao BackgroundTasks, movendo-a para o threadpool.
-    background_tasks.add_task(scrapingTask, runScraping_func)
-    
     return {
         "message": "Atualização do Web Scraping iniciada em segundo plano. Status: 202 Accepted.",
+        "job_id": job["id"],
         "status_endpoint": "/v1/scrap_status",
         "user": current_user.username
     }
@@ -108,16 +89,55 @@ async def run_webscrap(
 # GET /api/v1/scrap_status - Verifica o status
 # ----------------------------------------------------
 @router.get(
-    "/scrap_status", 
+    "/scrap_status",
     summary="Verifica o status atual da tarefa de Web Scraping"
 )
 def get_scraping_status():
     """
-    Retorna o estado atual da última execução do Web Scraping.
+    Retorna o estado atual da última execução do Web Scraping, com o progresso do job.
     """
+    job = JOB_STORE.latest(JOB_KIND)
+    if job is None:
+        return {"running": False, "success": None, "last_run": None, "error_message": None, "job": None}
+
+    finished = job["status"] not in ACTIVE_STATES
     return {
-        "running": scraping_status["running"],
-        "success": scraping_status["success"],
-        "last_run": scraping_status["last_run"],
-        "error_message": scraping_status["error_message"]
-    }
\ No newline at end of file
+        "running": not finished,
+        "success": job["status"] == SUCCEEDED if finished else None,
+        "last_run": job["started_at"] or job["created_at"],
+        "error_message": job["error_message"],
+        "job": ScrapeJob(**job)
+    }
+
+# ----------------------------------------------------
+# POST /api/v1/scrap/cancel - Cancela o job em execução
+# ----------------------------------------------------
+@router.post(
+    "/scrap/cancel",
+    response_model=ScrapeJob,
+    status_code=status.HTTP_202_ACCEPTED,
+    summary="Pede o cancelamento da tarefa de Web Scraping em execução"
+)
+def cancel_webscrap(current_user: AuthenticatedUser = Depends(get_current_user)):
+    """
+    O processo do job para no próximo ponto de verificação (em menos de um segundo),
+    descartando downloads pendentes; os dados publicados e o estado do scraping não são alterados.
+    """
+    job = JOB_STORE.active(JOB_KIND)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Nenhuma tarefa de Web Scraping em execução")
+    return JOB_STORE.request_cancel(job["id"])
+
+# ----------------------------------------------------
+# GET /api/v1/scrap/history - Histórico de execuções
+# ----------------------------------------------------
+@router.get(
+    "/scrap/history",
+    response_model=List[ScrapeJob],
+    summary="Lista as últimas execuções do Web Scraping"
+)
+def get_scraping_history(limit: int = Query(20, ge=1, le=200, description="Número máximo de execuções retornadas")):
+    """
+    Execuções mais recentes primeiro, com duração, páginas processadas e páginas por segundo.
+    """
+    return JOB_STORE.history(JOB_KIND, limit=limit)
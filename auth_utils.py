@@ -1,9 +1,16 @@
-from datetime import datetime, timedelta, timezone
-from typing import Optional
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+from datetime import timedelta
+from typing import Dict, Optional, Tuple
 from jose import jwt, JWTError
 #from fastapi.security import OAuth2PasswordBearer
 from fastapi import Depends, HTTPException, status
 from models import AuthenticatedUser # Importado para a função get_current_user
+from metrics import SPAN_AUTH_DECODE, span
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials 
 
 # Configurações JWT
@@ -12,6 +19,20 @@ ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 REFRESH_TOKEN_EXPIRE_DAYS = 7 
 
+# Cache de tokens já verificados (por processo)
+TOKEN_CACHE_MAX_ENTRIES = 10_000
+
+# Lista de revogação (compartilhada pelos workers)
+REVOKED_TOKENS_DB = "Data/revoked_tokens.sqlite3"
+REVOKED_TOKENS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS revoked_tokens (
+    digest BLOB PRIMARY KEY,
+    expires REAL NOT NULL
+)
+"""
+# Espera antes de tentar ler de novo uma lista de revogação indisponível (segundos)
+REVOKED_TOKENS_RETRY_SECONDS = 5.0
+
 # Define o esquema de segurança para o FastAPI
 #oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/v1/auth/login")
 http_bearer = HTTPBearer(auto_error=False)
@@ -30,40 +51,215 @@ def verify_password_simple(plain_password: str, stored_password: str) -> bool:
     return plain_password == stored_password
 
 # Funções de Geração de Token 
-def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
-    """Gera um JWT de acesso."""
+def _create_token(data: dict, kind: str, expires_delta: timedelta) -> str:
+    """Gera um JWT do tipo informado ("access" ou "refresh")."""
     to_encode = data.copy()
-    if expires_delta:
-        expire = datetime.now(timezone.utc) + expires_delta
-    else:
-        expire = datetime.now(timezone.utc) + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    
-    to_encode.update({"exp": expire, "sub": "access"})
+    # `exp` em segundos desde a época: evita montar um datetime com fuso por token
+    to_encode.update({"exp": int(time.time() + expires_delta.total_seconds()), "sub": kind})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    # O token acabou de ser assinado aqui: já entra no cache como verificado
+    TOKEN_CACHE.put(token_digest(encoded_jwt), to_encode)
     return encoded_jwt
 
+def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
+    """Gera um JWT de acesso."""
+    return _create_token(data, "access", expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
+
 def create_refresh_token(data: dict, expires_delta: Optional[timedelta] = None):
     """Gera um JWT de renovação."""
-    to_encode = data.copy()
-    if expires_delta:
-        expire = datetime.now(timezone.utc) + expires_delta
-    else:
-        expire = datetime.now(timezone.utc) + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
-        
-    to_encode.update({"exp": expire, "sub": "refresh"})
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
-    return encoded_jwt
-    
+    return _create_token(data, "refresh", expires_delta or timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS))
+
+# Cache de Verificação e Revogação
+def token_digest(token: str) -> bytes:
+    """Chave do token no cache e na lista de revogação (o token em si não é guardado)."""
+    return hashlib.sha256(token.encode("utf-8")).digest()
+
+
+class VerifiedTokenCache:
+    """
+    Cache LRU dos payloads de tokens com assinatura já verificada, indexado pelo digest do token.
+
+    Cada entrada vale até o `exp` do próprio token, então um acerto nunca aceita
+    um token expirado. Com `max_entries=0` o cache fica desligado.
+    """
+
+    def __init__(self, max_entries: int = TOKEN_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[bytes, Tuple[dict, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, digest: bytes) -> Optional[dict]:
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is None or entry[1] <= time.time():
+                if entry is not None:
+                    del self._entries[digest]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(digest)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, digest: bytes, payload: dict) -> None:
+        expires = payload.get("exp")
+        if self.max_entries <= 0 or not isinstance(expires, (int, float)):
+            return
+        with self._lock:
+            self._entries[digest] = (payload, float(expires))
+            self._entries.move_to_end(digest)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def discard(self, digest: bytes) -> None:
+        with self._lock:
+            self._entries.pop(digest, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class RevokedTokens:
+    """
+    Lista de tokens revogados (digest -> exp) em SQLite, compartilhada por todos os
+    workers da API: um logout recebido por um worker vale para os demais, mesmo que
+    o token ainda esteja no cache de verificação deles.
+
+    A consulta de cada requisição não toca o SQLite: cada processo guarda a lista
+    em memória e só a relê quando o arquivo de geração (`<base>.generation`,
+    substituído a cada revogação) muda, o que custa um `stat` por requisição.
+    A base só é criada na primeira revogação.
+
+    Um token só precisa ficar na lista até expirar; depois disso a própria
+    verificação do `exp` já o recusa, então as entradas vencidas são descartadas.
+    """
+
+    def __init__(self, path: str = REVOKED_TOKENS_DB):
+        self.path = path
+        self.generation_path = path + ".generation"
+        self._connection: Optional[sqlite3.Connection] = None
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+        self._digests: Dict[bytes, float] = {}
+        self._generation: Optional[Tuple[int, int]] = None
+        self._retry_at = 0.0
+
+    def _connect(self) -> sqlite3.Connection:
+        # Uma conexão por processo, aberta no primeiro uso (workers criados por fork não herdam a do pai)
+        if self._connection is None or self._pid != os.getpid():
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=10.0, isolation_level=None, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(REVOKED_TOKENS_SCHEMA)
+            self._connection, self._pid = connection, os.getpid()
+        return self._connection
+
+    def _current_generation(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(self.generation_path)
+        except OSError:
+            return None
+        return (stat.st_ino, stat.st_mtime_ns)
+
+    def _refresh(self) -> None:
+        # Relê a lista se outro processo (ou este) revogou algo desde a última leitura
+        generation = self._current_generation()
+        if generation == self._generation or time.monotonic() < self._retry_at:
+            return
+        with self._lock:
+            if generation == self._generation:
+                return
+            try:
+                rows = self._connect().execute(
+                    "SELECT digest, expires FROM revoked_tokens WHERE expires > ?", (time.time(),)
+                ).fetchall()
+            except (sqlite3.Error, OSError) as e:
+                # Base indisponível: segue com a lista já lida e tenta de novo mais tarde
+                print(f"ERRO ao ler a lista de tokens revogados: {e}")
+                self._retry_at = time.monotonic() + REVOKED_TOKENS_RETRY_SECONDS
+                return
+            self._digests = {bytes(digest): expires for digest, expires in rows}
+            self._generation = generation
+
+    def add(self, digest: bytes, expires: float) -> None:
+        """Revoga o digest em todos os workers; erros do SQLite sobem para quem chamou."""
+        with self._lock:
+            # Mesmo que a gravação falhe, este processo já recusa o token
+            self._digests = {**self._digests, digest: expires}
+            connection = self._connect()
+            connection.execute("INSERT OR REPLACE INTO revoked_tokens (digest, expires) VALUES (?, ?)", (digest, expires))
+            connection.execute("DELETE FROM revoked_tokens WHERE expires <= ?", (time.time(),))
+            # Nova geração: troca o arquivo (inode novo) para os outros processos relerem a lista
+            temporary = f"{self.generation_path}.{os.getpid()}.tmp"
+            with open(temporary, "w") as handle:
+                handle.write(f"{time.time_ns()}\n")
+            os.replace(temporary, self.generation_path)
+
+    def __contains__(self, digest: bytes) -> bool:
+        self._refresh()
+        expires = self._digests.get(digest)
+        return expires is not None and expires > time.time()
+
+    def __len__(self) -> int:
+        self._refresh()
+        now = time.time()
+        return sum(1 for expires in self._digests.values() if expires > now)
+
+
+TOKEN_CACHE = VerifiedTokenCache()
+REVOKED_TOKENS = RevokedTokens()
+
 # Funções de Decodificação e Dependência
 def decode_token(token: str):
     """Decodifica e verifica um token JWT."""
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        with span(SPAN_AUTH_DECODE):
+            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         return payload
     except JWTError as e:
         # Lança exceção se o token for inválido (expirado, assinatura incorreta, etc.)
         raise JWTError(f"Token inválido ou expirado: {e}")
 
+def verify_token(token: str) -> dict:
+    """
+    Igual a `decode_token`, mas consulta o cache de tokens verificados antes de
+    refazer o HMAC e a validação das claims. A lista de revogação (compartilhada)
+    é consultada antes, então um token revogado por outro worker é recusado
+    mesmo que esteja no cache deste.
+    """
+    digest = token_digest(token)
+    if digest in REVOKED_TOKENS:
+        raise JWTError("Token revogado")
+    payload = TOKEN_CACHE.get(digest)
+    if payload is None:
+        payload = decode_token(token)
+        TOKEN_CACHE.put(digest, payload)
+    return payload
+
+def revoke_token(token: str) -> bool:
+    """
+    Revoga um token válido em todos os workers (ele deixa de ser aceito mesmo que
+    ainda esteja no cache de algum deles).
+    Retorna False se o token já for inválido ou estiver expirado. Se a lista
+    compartilhada não puder ser gravada (sqlite3.Error/OSError), o token já fica
+    recusado neste worker e o erro sobe para quem chamou.
+    """
+    try:
+        payload = decode_token(token)
+    except JWTError:
+        return False
+    digest = token_digest(token)
+    TOKEN_CACHE.discard(digest)
+    REVOKED_TOKENS.add(digest, float(payload.get("exp", float("inf"))))
+    return True
+
 async def get_current_user(
     # Agora espera credenciais HTTP Bearer em vez de string
     security_credentials: HTTPAuthorizationCredentials = Depends(http_bearer)
@@ -87,7 +283,7 @@ async def get_current_user(
     )
     
     try:
-        payload = decode_token(token)
+        payload = verify_token(token)
         username: str = payload.get("username")
         
         # O token DEVE ser do tipo "access"
@@ -0,0 +1,418 @@
+import json
+import numpy as np
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+from columns import StringColumn
+from indexes import BitmapIndex, IdIndex, PriceIndex, TrigramIndex
+from aggregates import Aggregates
+from metrics import SPAN_FILTERING, SPAN_INDEX_LOOKUP, SPAN_SERIALIZATION, span
+
+# Ordem das colunas expostas pelo modelo Livro
+COLUMNS = (
+    'id', 'titulo', 'preco', 'rating',
+    'disponibilidade', 'categoria', 'url_imagem'
+)
+
+# Índices de bitmap gravados no snapshot (nome do atributo do Catalog)
+BITMAP_INDEXES = ('category_bitmaps', 'rating_bitmaps', 'availability_bitmaps')
+
+# Ratings possíveis (0 = sem avaliação, 1 a 5 estrelas)
+RATING_VALUES = 6
+
+
+def _encode(values: Sequence[str]):
+    """
+    Codifica uma coluna de strings repetidas como dicionário ordenado + códigos inteiros.
+    """
+    array = np.asarray(list(values), dtype=object)
+    if len(array) == 0:
+        return [], np.empty(0, dtype=np.int32)
+    dictionary, codes = np.unique(array, return_inverse=True)
+    return [str(v) for v in dictionary], codes.astype(np.int32).ravel()
+
+
+def encode_json_row(row: Dict[str, Any]) -> bytes:
+    """JSON de uma linha no mesmo formato do JSONResponse do FastAPI (fragmento terminado em ",")."""
+    return json.dumps(row, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8") + b","
+
+
+def _strings(values):
+    """Mantém StringColumn como está; outras sequências viram array de objetos."""
+    if isinstance(values, StringColumn):
+        return values
+    return np.asarray(values, dtype=object)
+
+
+class Catalog:
+    """
+    Catálogo colunar em memória.
+
+    Cada coluna é armazenada separadamente: arrays NumPy para id, preço e rating,
+    e colunas de baixa cardinalidade (categoria, disponibilidade) codificadas como
+    dicionário + códigos. As linhas só viram dicionários quando são devolvidas.
+
+    Os índices são construídos junto com o catálogo; um recarregamento cria um
+    novo Catalog completo, então colunas e índices são trocados juntos.
+
+    Os ids são crescentes na ordem do catálogo (ids sequenciais atribuídos na carga),
+    o que permite paginação por cursor com busca binária.
+
+    Títulos e URLs podem ser arrays de objetos ou StringColumn (heap UTF-8); um
+    catálogo vindo do snapshot binário usa só arrays mapeados em memória.
+    """
+
+    def __init__(
+        self,
+        ids: np.ndarray,
+        titulos: np.ndarray,
+        precos: np.ndarray,
+        ratings: np.ndarray,
+        disponibilidade_codes: np.ndarray,
+        disponibilidades: List[str],
+        categoria_codes: np.ndarray,
+        categorias: List[str],
+        urls_imagem: np.ndarray,
+        id_index: Optional[IdIndex] = None,
+        price_index: Optional[PriceIndex] = None,
+        title_index: Optional[TrigramIndex] = None,
+        json_rows: Optional[StringColumn] = None,
+        bitmaps: Optional[Dict[str, BitmapIndex]] = None,
+    ):
+        self.ids = np.asarray(ids, dtype=np.int64)
+        self.titulos = _strings(titulos)
+        self.precos = np.asarray(precos, dtype=np.float64)
+        self.ratings = np.asarray(ratings, dtype=np.int8)
+        self.disponibilidade_codes = np.asarray(disponibilidade_codes, dtype=np.int32)
+        self.disponibilidades = list(disponibilidades)
+        self.categoria_codes = np.asarray(categoria_codes, dtype=np.int32)
+        self.categorias = list(categorias)
+        self.urls_imagem = _strings(urls_imagem)
+
+        # Versão dos dados de origem (definida por quem carrega o catálogo)
+        self.version: Optional[str] = None
+        # Resumo da carga que gerou os dados (tempo, linhas aceitas/rejeitadas)
+        self.load_report: Optional[Dict[str, Any]] = None
+        # Tempo para montar este snapshot no worker (CSV ou snapshot binário)
+        self.load_seconds: Optional[float] = None
+        self._nbytes: Optional[int] = None
+
+        # Índice de chave primária (id -> posição)
+        self.id_index = id_index or IdIndex(self.ids)
+        # Índice ordenado de preços (faixas de preço por busca binária)
+        self.price_index = price_index or PriceIndex(self.precos)
+        # Índices invertidos de trigramas (títulos e dicionário de categorias)
+        self.title_index = title_index or TrigramIndex(self.titulos)
+        self.category_index = TrigramIndex(self.categorias)
+
+        # Bitmaps das colunas de baixa cardinalidade (filtros por AND/OR e contagens)
+        bitmaps = bitmaps or {}
+        self.category_bitmaps = bitmaps.get('category_bitmaps') or BitmapIndex(self.categoria_codes, len(self.categorias))
+        self.rating_bitmaps = bitmaps.get('rating_bitmaps') or BitmapIndex(self.ratings, RATING_VALUES)
+        self.availability_bitmaps = bitmaps.get('availability_bitmaps') or BitmapIndex(self.disponibilidade_codes, len(self.disponibilidades))
+
+        # Agregados para os endpoints de estatísticas
+        self.aggregates = Aggregates.from_columns(
+            self.precos, self.ratings, self.categoria_codes, self.categorias
+        )
+
+        # JSON de cada linha pré-codificado (fragmentos terminados em ",")
+        self.json_rows = json_rows if json_rows is not None else self._encode_json_rows()
+
+    def _encode_json_rows(self) -> StringColumn:
+        """Codifica cada linha com o mesmo formato do JSONResponse do FastAPI."""
+        return StringColumn.from_bytes(encode_json_row(row) for row in self.rows())
+
+    # --- Construção ---
+    @classmethod
+    def from_columns(
+        cls,
+        ids: Iterable[int],
+        titulos: Iterable[str],
+        precos: Iterable[float],
+        ratings: Iterable[int],
+        disponibilidades: Iterable[str],
+        categorias: Iterable[str],
+        urls_imagem: Iterable[str],
+    ) -> "Catalog":
+        """Monta o catálogo a partir de colunas já limpas (ex.: colunas de um DataFrame)."""
+        disp_values, disp_codes = _encode(disponibilidades)
+        cat_values, cat_codes = _encode(categorias)
+        return cls(
+            ids=np.fromiter(ids, dtype=np.int64),
+            titulos=np.asarray(list(titulos), dtype=object),
+            precos=np.fromiter(precos, dtype=np.float64),
+            ratings=np.fromiter(ratings, dtype=np.int8),
+            disponibilidade_codes=disp_codes,
+            disponibilidades=disp_values,
+            categoria_codes=cat_codes,
+            categorias=cat_values,
+            urls_imagem=np.asarray(list(urls_imagem), dtype=object),
+        )
+
+    @classmethod
+    def empty(cls) -> "Catalog":
+        """Catálogo vazio, usado quando os dados não puderam ser carregados."""
+        return cls.from_columns([], [], [], [], [], [], [])
+
+    # --- Serialização (snapshot binário) ---
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        """Colunas e índices como arrays planos (um arquivo .npy cada)."""
+        arrays = {
+            'ids': self.ids,
+            'precos': self.precos,
+            'ratings': self.ratings,
+            'disponibilidade_codes': self.disponibilidade_codes,
+            'categoria_codes': self.categoria_codes,
+        }
+        for name in ('titulos', 'urls_imagem'):
+            column = getattr(self, name)
+            if not isinstance(column, StringColumn):
+                column = StringColumn.from_strings(column)
+            arrays.update(column.to_arrays(name))
+        arrays.update(self.id_index.to_arrays())
+        arrays.update(self.price_index.to_arrays())
+        arrays.update(self.title_index.to_arrays('title_index'))
+        arrays.update(self.json_rows.to_arrays('json_rows'))
+        for name in BITMAP_INDEXES:
+            arrays.update(getattr(self, name).to_arrays(name))
+        return arrays
+
+    def to_meta(self) -> Dict[str, Any]:
+        """Dicionários de categorias/disponibilidades e metadados do snapshot."""
+        return {
+            'rows': len(self),
+            'version': self.version,
+            'disponibilidades': self.disponibilidades,
+            'categorias': self.categorias,
+            'load_report': self.load_report,
+        }
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray], meta: Dict[str, Any]) -> "Catalog":
+        """Monta o catálogo sobre arrays já prontos (ex.: mapeados do snapshot), sem copiar."""
+        catalog = cls(
+            ids=arrays['ids'],
+            titulos=StringColumn.from_arrays(arrays, 'titulos'),
+            precos=arrays['precos'],
+            ratings=arrays['ratings'],
+            disponibilidade_codes=arrays['disponibilidade_codes'],
+            disponibilidades=meta['disponibilidades'],
+            categoria_codes=arrays['categoria_codes'],
+            categorias=meta['categorias'],
+            urls_imagem=StringColumn.from_arrays(arrays, 'urls_imagem'),
+            id_index=IdIndex.from_arrays(arrays),
+            price_index=PriceIndex.from_arrays(arrays),
+            title_index=TrigramIndex.from_arrays(arrays, 'title_index'),
+            json_rows=StringColumn.from_arrays(arrays, 'json_rows'),
+            bitmaps={name: BitmapIndex.from_arrays(arrays, name, len(arrays['ids'])) for name in BITMAP_INDEXES},
+        )
+        catalog.version = meta.get('version')
+        catalog.load_report = meta.get('load_report')
+        return catalog
+
+    # --- Acesso ---
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __bool__(self) -> bool:
+        return len(self) > 0
+
+    def nbytes(self) -> int:
+        """
+        Tamanho das colunas e índices (os mesmos arrays do snapshot). Com o snapshot
+        mapeado em memória, parte disso fica no cache de páginas, compartilhado entre workers.
+        """
+        if self._nbytes is None:
+            self._nbytes = int(sum(array.nbytes for array in self.to_arrays().values()))
+        return self._nbytes
+
+    def row(self, pos: int) -> Dict[str, Any]:
+        """Materializa a linha na posição `pos` como dicionário."""
+        return {
+            'id': int(self.ids[pos]),
+            'titulo': self.titulos[pos],
+            'preco': float(self.precos[pos]),
+            'rating': int(self.ratings[pos]),
+            'disponibilidade': self.disponibilidades[self.disponibilidade_codes[pos]],
+            'categoria': self.categorias[self.categoria_codes[pos]],
+            'url_imagem': self.urls_imagem[pos],
+        }
+
+    def rows(self, positions: Optional[Iterable[int]] = None) -> List[Dict[str, Any]]:
+        """Materializa várias linhas (todas, se `positions` for None)."""
+        if positions is None:
+            positions = range(len(self))
+        ids = self.ids.tolist()
+        precos = self.precos.tolist()
+        ratings = self.ratings.tolist()
+        disp_codes = self.disponibilidade_codes.tolist()
+        cat_codes = self.categoria_codes.tolist()
+        return [
+            {
+                'id': ids[i],
+                'titulo': self.titulos[i],
+                'preco': precos[i],
+                'rating': ratings[i],
+                'disponibilidade': self.disponibilidades[disp_codes[i]],
+                'categoria': self.categorias[cat_codes[i]],
+                'url_imagem': self.urls_imagem[i],
+            }
+            for i in np.asarray(positions, dtype=np.int64).tolist()
+        ]
+
+    def position(self, book_id: int) -> Optional[int]:
+        """Posição da linha com o id informado (None se não existir)."""
+        with span(SPAN_INDEX_LOOKUP):
+            return self.id_index.get(book_id)
+
+    def positions(self, book_ids: Iterable[int]) -> np.ndarray:
+        """
+        Posições dos ids informados, na mesma ordem, omitindo ids inexistentes.
+        Um id repetido aparece uma vez só (na primeira ocorrência), então o cursor
+        da paginação identifica um único livro do resultado.
+        """
+        with span(SPAN_INDEX_LOOKUP):
+            positions = self.id_index.get_many(book_ids)
+            positions = positions[positions >= 0]
+            _, first = np.unique(positions, return_index=True)
+            if len(first) < len(positions):
+                positions = positions[np.sort(first)]
+            return positions
+
+    # --- Serialização das respostas ---
+    def encode_row(self, pos: int) -> bytes:
+        """JSON de uma linha, sem passar pelo Pydantic."""
+        with span(SPAN_SERIALIZATION):
+            return self.json_rows.raw([pos])[:-1]
+
+    def encode_rows(self, positions: Optional[np.ndarray] = None) -> bytes:
+        """Lista JSON das linhas, montada juntando os fragmentos pré-codificados."""
+        if positions is None:
+            positions = self.slice()
+        with span(SPAN_SERIALIZATION):
+            body = self.json_rows.raw(positions)
+            return b"[" + body[:-1] + b"]"
+
+    def encode_ndjson(self, positions: np.ndarray) -> bytes:
+        """Linhas em NDJSON (um objeto JSON por linha)."""
+        if len(positions) == 0:
+            return b""
+        with span(SPAN_SERIALIZATION):
+            offsets = self.json_rows.offsets
+            heap = memoryview(self.json_rows.heap)
+            positions = np.asarray(positions, dtype=np.int64)
+            starts = offsets[positions].tolist()
+            ends = offsets[positions + 1].tolist()
+            return b"\n".join([heap[start:end - 1] for start, end in zip(starts, ends)]) + b"\n"
+
+    # --- Paginação por cursor ---
+    def paginate(
+        self,
+        positions: Optional[np.ndarray] = None,
+        limit: Optional[int] = None,
+        after: Optional[int] = None,
+        in_id_order: bool = True,
+    ):
+        """
+        Paginação por cursor (keyset): `after` é o id do último livro da página anterior.
+
+        `positions` None significa o catálogo inteiro. Retorna (posições da página,
+        cursor da próxima página ou None).
+        Para resultados na ordem do catálogo (ids crescentes), o início da página é
+        achado por busca binária nos ids, e o cursor continua válido mesmo que o
+        livro tenha sido removido num recarregamento. Para outras ordenações (preço,
+        relevância), o livro do cursor precisa estar no resultado (ValueError se não).
+        """
+        total = len(self) if positions is None else len(positions)
+
+        start = 0
+        if after is not None:
+            if in_id_order:
+                ids = self.ids if positions is None else self.ids[positions]
+                start = int(np.searchsorted(ids, after, side="right"))
+            else:
+                pos = self.position(after)
+                found = np.flatnonzero(positions == pos) if pos is not None else []
+                if len(found) == 0:
+                    raise ValueError(f"Cursor inválido: livro {after} não está no resultado")
+                start = int(found[0]) + 1
+
+        stop = total if limit is None else min(start + limit, total)
+        page = self.slice(start, stop) if positions is None else positions[start:stop]
+        next_cursor = int(self.ids[page[-1]]) if stop < total and len(page) else None
+        return page, next_cursor
+
+    # --- Operações vetorizadas ---
+    def slice(self, start: int = 0, stop: Optional[int] = None) -> np.ndarray:
+        """Posições de um intervalo contíguo de linhas."""
+        start, stop, _ = slice(start, stop).indices(len(self))
+        return np.arange(start, stop, dtype=np.int64)
+
+    def price_range(self, min_price: float, max_price: float, sort: Optional[str] = None) -> np.ndarray:
+        """
+        Posições dos livros com preço entre min_price e max_price (inclusivo).
+
+        sort: 'asc' ou 'desc' ordena por preço; None mantém a ordem do catálogo.
+        """
+        with span(SPAN_INDEX_LOOKUP):
+            positions = self.price_index.range(min_price, max_price)
+        if sort == "asc":
+            return positions
+        if sort == "desc":
+            return positions[::-1]
+        return np.sort(positions)
+
+    def category_bitmap(self, text: str) -> np.ndarray:
+        """Bitset das linhas cuja categoria contém `text` (OR dos bitmaps das categorias encontradas)."""
+        with span(SPAN_INDEX_LOOKUP):
+            return self.category_bitmaps.any_of(self.category_index.search(text).tolist())
+
+    def with_rating(self, *ratings: int) -> np.ndarray:
+        """Posições dos livros com algum dos ratings informados, em ordem do catálogo."""
+        with span(SPAN_INDEX_LOOKUP):
+            return self.rating_bitmaps.positions(self.rating_bitmaps.any_of(ratings))
+
+    def category_names(self) -> List[str]:
+        """Categorias com pelo menos um livro, em ordem alfabética (dicionário do bitmap)."""
+        return [self.categorias[code] for code in np.flatnonzero(self.category_bitmaps.counts).tolist()]
+
+    def search(
+        self,
+        title: Optional[str] = None,
+        category: Optional[str] = None,
+        rank: bool = False,
+    ) -> np.ndarray:
+        """
+        Posições dos livros cujo título e/ou categoria contém o texto informado.
+
+        Sem `rank`, mantém a ordem do catálogo. Com `rank`, ordena por relevância
+        (título, depois categoria), depois pelo título mais curto.
+        """
+        positions = self.slice()
+        if category:
+            # Filtra primeiro pela categoria (busca apenas no dicionário de categorias)
+            positions = self.category_bitmaps.positions(self.category_bitmap(category))
+        if title:
+            with span(SPAN_INDEX_LOOKUP):
+                title_positions = self.title_index.search(title)
+            with span(SPAN_FILTERING):
+                positions = np.intersect1d(positions, title_positions, assume_unique=True)
+
+        if not rank or len(positions) == 0:
+            return positions
+
+        title_scores = (
+            self.title_index.scores(title, positions) if title
+            else np.zeros(len(positions), dtype=np.int64)
+        )
+        category_scores = (
+            self.category_index.scores(category, self.categoria_codes[positions]) if category
+            else np.zeros(len(positions), dtype=np.int64)
+        )
+        title_lengths = np.fromiter(
+            (len(self.titulos[pos]) for pos in positions.tolist()),
+            dtype=np.int64,
+            count=len(positions),
+        )
+        # lexsort usa a última chave como principal
+        order = np.lexsort((positions, title_lengths, -category_scores, -title_scores))
+        return positions[order]
@@ -0,0 +1,61 @@
+import numpy as np
+from typing import Dict, Iterable, Iterator
+
+
+class StringColumn:
+    """
+    Coluna de strings armazenada como um heap UTF-8 contíguo + offsets.
+
+    Os dois arrays podem vir de um snapshot mapeado em memória (np.load com
+    mmap_mode="r"); as strings só são decodificadas quando acessadas.
+    """
+
+    def __init__(self, offsets: np.ndarray, heap: np.ndarray):
+        self.offsets = offsets
+        self.heap = heap
+
+    @classmethod
+    def from_strings(cls, values: Iterable[str]) -> "StringColumn":
+        return cls.from_bytes(str(value).encode("utf-8") for value in values)
+
+    @classmethod
+    def from_bytes(cls, values: Iterable[bytes]) -> "StringColumn":
+        encoded = list(values)
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(value) for value in encoded], out=offsets[1:])
+        heap = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+        return cls(offsets, heap)
+
+    def raw(self, positions: np.ndarray) -> bytes:
+        """Bytes das posições informadas concatenados, sem decodificar."""
+        positions = np.asarray(positions, dtype=np.int64)
+        if len(positions) == 0:
+            return b""
+        first, last = int(positions[0]), int(positions[-1])
+        if last - first + 1 == len(positions) and (len(positions) == 1 or bool(np.all(np.diff(positions) == 1))):
+            # Intervalo contíguo: uma única fatia do heap
+            return self.heap[self.offsets[first]:self.offsets[last + 1]].tobytes()
+        heap = memoryview(self.heap)
+        starts = self.offsets[positions].tolist()
+        ends = self.offsets[positions + 1].tolist()
+        return b"".join([heap[start:end] for start, end in zip(starts, ends)])
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i: int) -> str:
+        start, end = int(self.offsets[i]), int(self.offsets[i + 1])
+        return self.heap[start:end].tobytes().decode("utf-8")
+
+    def __iter__(self) -> Iterator[str]:
+        heap = memoryview(self.heap)
+        offsets = self.offsets.tolist()
+        for start, end in zip(offsets, offsets[1:]):
+            yield str(heap[start:end], "utf-8")
+
+    def to_arrays(self, prefix: str) -> Dict[str, np.ndarray]:
+        return {f"{prefix}.offsets": self.offsets, f"{prefix}.heap": self.heap}
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray], prefix: str) -> "StringColumn":
+        return cls(arrays[f"{prefix}.offsets"], arrays[f"{prefix}.heap"])
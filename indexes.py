@@ -0,0 +1,356 @@
+import numpy as np
+from itertools import chain
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional
+from columns import StringColumn
+
+INT64_MIN, INT64_MAX = int(np.iinfo(np.int64).min), int(np.iinfo(np.int64).max)
+
+
+class IdIndex:
+    """
+    Índice de chave primária id -> posição da linha no catálogo.
+
+    Quando os ids são densos (caso normal, ids sequenciais), usa um array de
+    endereçamento direto (lookup O(1)). Caso contrário, recorre a uma busca
+    binária sobre os ids ordenados.
+    """
+
+    def __init__(self, ids: np.ndarray):
+        ids = np.asarray(ids, dtype=np.int64)
+        self._dense: Optional[np.ndarray] = None
+        self._sorted_ids: Optional[np.ndarray] = None
+        self._order: Optional[np.ndarray] = None
+
+        if len(ids) == 0:
+            self._dense = np.empty(0, dtype=np.int64)
+            return
+
+        min_id, max_id = int(ids.min()), int(ids.max())
+        if min_id >= 0 and max_id < 2 * len(ids) + 1024:
+            # Endereçamento direto: dense[id] = posição (-1 quando o id não existe)
+            self._dense = np.full(max_id + 1, -1, dtype=np.int64)
+            self._dense[ids] = np.arange(len(ids), dtype=np.int64)
+        else:
+            self._order = np.argsort(ids, kind="stable")
+            self._sorted_ids = ids[self._order]
+
+    def get(self, book_id: int) -> Optional[int]:
+        """Retorna a posição do livro `book_id` ou None se não existir."""
+        if self._dense is not None:
+            if 0 <= book_id < len(self._dense):
+                pos = int(self._dense[book_id])
+                return pos if pos >= 0 else None
+            return None
+
+        i = int(np.searchsorted(self._sorted_ids, book_id))
+        if i < len(self._sorted_ids) and self._sorted_ids[i] == book_id:
+            return int(self._order[i])
+        return None
+
+    def get_many(self, book_ids: Iterable[int]) -> np.ndarray:
+        """Posições de vários ids de uma vez (-1 para ids inexistentes)."""
+        book_ids = list(book_ids)
+        positions = np.full(len(book_ids), -1, dtype=np.int64)
+        # Ids fora do intervalo do int64 não existem no catálogo (nem cabem no array)
+        in_range = np.fromiter((INT64_MIN <= book_id <= INT64_MAX for book_id in book_ids), dtype=bool, count=len(book_ids))
+        if in_range.all():
+            positions[:] = self._lookup(np.asarray(book_ids, dtype=np.int64))
+        elif in_range.any():
+            positions[in_range] = self._lookup(np.asarray([book_id for book_id in book_ids if INT64_MIN <= book_id <= INT64_MAX], dtype=np.int64))
+        return positions
+
+    def _lookup(self, book_ids: np.ndarray) -> np.ndarray:
+        positions = np.full(len(book_ids), -1, dtype=np.int64)
+
+        if self._dense is not None:
+            valid = (book_ids >= 0) & (book_ids < len(self._dense))
+            positions[valid] = self._dense[book_ids[valid]]
+            return positions
+
+        i = np.searchsorted(self._sorted_ids, book_ids)
+        inside = i < len(self._sorted_ids)
+        found = np.zeros(len(book_ids), dtype=bool)
+        found[inside] = self._sorted_ids[i[inside]] == book_ids[inside]
+        positions[found] = self._order[i[found]]
+        return positions
+
+    # --- Serialização (snapshot) ---
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        if self._dense is not None:
+            return {"id_index.dense": self._dense}
+        return {"id_index.sorted_ids": self._sorted_ids, "id_index.order": self._order}
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray]) -> "IdIndex":
+        index = cls.__new__(cls)
+        index._dense = arrays.get("id_index.dense")
+        index._sorted_ids = arrays.get("id_index.sorted_ids")
+        index._order = arrays.get("id_index.order")
+        return index
+
+
+class PriceIndex:
+    """
+    Índice ordenado de preços: array de preços ordenado + permutação para as posições.
+
+    Uma consulta por faixa [min, max] vira duas buscas binárias e uma fatia contígua.
+    """
+
+    def __init__(self, precos: np.ndarray):
+        precos = np.asarray(precos, dtype=np.float64)
+        # Ordenação estável: preços iguais mantêm a ordem original do catálogo
+        self.order = np.argsort(precos, kind="stable")
+        self.sorted_precos = precos[self.order]
+
+    def range(self, min_price: float, max_price: float) -> np.ndarray:
+        """Posições com min_price <= preço <= max_price, em ordem crescente de preço."""
+        lo = np.searchsorted(self.sorted_precos, min_price, side="left")
+        hi = np.searchsorted(self.sorted_precos, max_price, side="right")
+        return self.order[lo:hi]
+
+    # --- Serialização (snapshot) ---
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        return {"price_index.order": self.order, "price_index.sorted_precos": self.sorted_precos}
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray]) -> "PriceIndex":
+        index = cls.__new__(cls)
+        index.order = arrays["price_index.order"]
+        index.sorted_precos = arrays["price_index.sorted_precos"]
+        return index
+
+
+class BitmapIndex:
+    """
+    Bitmaps por valor para colunas de baixa cardinalidade (códigos de dicionário, ratings).
+
+    Cada valor tem um bitset compactado (np.packbits, 1 bit por linha), então
+    combinações de filtros são AND/OR vetorizados sobre bytes, 8 linhas por byte,
+    e só o resultado final é convertido em posições. A contagem de linhas de cada
+    valor fica pré-calculada.
+    """
+
+    def __init__(self, codes: np.ndarray, cardinality: int = 0):
+        codes = np.asarray(codes, dtype=np.int64)
+        self.rows = len(codes)
+        cardinality = max(cardinality, int(codes.max()) + 1 if len(codes) else 0)
+
+        # Um valor por vez: evita materializar a matriz booleana valores x linhas
+        self.bits = np.empty((cardinality, (self.rows + 7) // 8), dtype=np.uint8)
+        for value in range(cardinality):
+            self.bits[value] = np.packbits(codes == value)
+        self.counts = np.bincount(codes, minlength=cardinality).astype(np.int64)
+
+    def __len__(self) -> int:
+        return len(self.counts)
+
+    def bitmap(self, value: int) -> np.ndarray:
+        """Bitset compactado das linhas com o valor informado (vazio se o valor não existe)."""
+        if 0 <= value < len(self.counts):
+            return self.bits[value]
+        return self.none()
+
+    def none(self) -> np.ndarray:
+        return np.zeros(self.bits.shape[1], dtype=np.uint8)
+
+    def any_of(self, values: Iterable[int]) -> np.ndarray:
+        """OR dos bitsets dos valores informados."""
+        values = [value for value in values if 0 <= value < len(self.counts)]
+        if not values:
+            return self.none()
+        return np.bitwise_or.reduce(self.bits[values], axis=0)
+
+    def count(self, values: Iterable[int]) -> int:
+        """Número de linhas com algum dos valores (sem tocar nos bitsets)."""
+        values = [value for value in values if 0 <= value < len(self.counts)]
+        return int(self.counts[values].sum())
+
+    def positions(self, bitmap: np.ndarray) -> np.ndarray:
+        """Posições (em ordem crescente) marcadas em um bitset."""
+        return np.flatnonzero(np.unpackbits(bitmap, count=self.rows))
+
+    # --- Serialização (snapshot) ---
+    def to_arrays(self, prefix: str) -> Dict[str, np.ndarray]:
+        return {f"{prefix}.bits": self.bits, f"{prefix}.counts": self.counts}
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray], prefix: str, rows: int) -> "BitmapIndex":
+        index = cls.__new__(cls)
+        index.rows = rows
+        index.bits = arrays[f"{prefix}.bits"]
+        index.counts = arrays[f"{prefix}.counts"]
+        return index
+
+
+class TrigramIndex:
+    """
+    Índice invertido de trigramas para busca por substring sem diferenciar maiúsculas.
+
+    O texto é normalizado (lower, como a busca original) uma única vez na construção. Uma busca
+    intersecta as listas de postings dos trigramas da consulta (da menor para a
+    maior) e só então confirma a substring nos candidatos, mantendo a mesma
+    semântica do teste `consulta in texto`.
+
+    As postings ficam em formato CSR (offsets + um único array de posições), o
+    que permite gravá-las no snapshot binário e mapeá-las em memória.
+    """
+
+    N = 3
+
+    def __init__(self, texts: Iterable[str]):
+        builder = TrigramBuilder()
+        for text in texts:
+            builder.add(text)
+        self._set_postings(builder.texts, builder.postings)
+
+    @classmethod
+    def from_postings(cls, texts: List[str], postings: Dict[str, List[int]]) -> "TrigramIndex":
+        """Índice sobre textos já normalizados e postings já montadas (TrigramBuilder)."""
+        index = cls.__new__(cls)
+        index._set_postings(texts, postings)
+        return index
+
+    def _set_postings(self, texts: List[str], postings: Dict[str, List[int]]):
+        self.texts = texts
+        self.grams = {gram: slot for slot, gram in enumerate(postings)}
+        self.offsets = np.zeros(len(postings) + 1, dtype=np.int64)
+        np.cumsum([len(p) for p in postings.values()], out=self.offsets[1:])
+        self.flat = np.fromiter(
+            chain.from_iterable(postings.values()),
+            dtype=np.int64,
+            count=int(self.offsets[-1]),
+        )
+
+    def posting(self, gram: str) -> Optional[np.ndarray]:
+        """Posições (ordenadas) dos textos que contêm o trigrama."""
+        slot = self.grams.get(gram)
+        if slot is None:
+            return None
+        return self.flat[self.offsets[slot]:self.offsets[slot + 1]]
+
+    # --- Serialização (snapshot) ---
+    def to_arrays(self, prefix: str) -> Dict[str, np.ndarray]:
+        texts = self.texts if isinstance(self.texts, StringColumn) else StringColumn.from_strings(self.texts)
+        arrays = {f"{prefix}.offsets": self.offsets, f"{prefix}.flat": self.flat}
+        arrays.update(texts.to_arrays(f"{prefix}.texts"))
+        arrays.update(StringColumn.from_strings(self.grams).to_arrays(f"{prefix}.grams"))
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray], prefix: str) -> "TrigramIndex":
+        index = cls.__new__(cls)
+        index.texts = StringColumn.from_arrays(arrays, f"{prefix}.texts")
+        index.grams = {
+            gram: slot for slot, gram in enumerate(StringColumn.from_arrays(arrays, f"{prefix}.grams"))
+        }
+        index.offsets = arrays[f"{prefix}.offsets"]
+        index.flat = arrays[f"{prefix}.flat"]
+        return index
+
+    def search(self, query: str) -> np.ndarray:
+        """Posições (em ordem crescente) cujo texto contém `query`."""
+        query = query.lower()
+        texts = self.texts
+
+        # Consultas mais curtas que um trigrama: varredura do texto já normalizado
+        if len(query) < self.N:
+            return np.fromiter(
+                (pos for pos, text in enumerate(texts) if query in text),
+                dtype=np.int64,
+            )
+
+        lists = []
+        for gram in {query[i:i + self.N] for i in range(len(query) - self.N + 1)}:
+            posting = self.posting(gram)
+            if posting is None:
+                return np.empty(0, dtype=np.int64)
+            lists.append(posting)
+
+        lists.sort(key=len)
+        candidates = lists[0]
+        for posting in lists[1:]:
+            candidates = np.intersect1d(candidates, posting, assume_unique=True)
+            if len(candidates) == 0:
+                return candidates
+
+        if len(query) == self.N:
+            return candidates
+
+        # Confirma a substring (trigramas em comum não garantem a sequência)
+        return np.fromiter(
+            (pos for pos in candidates.tolist() if query in texts[pos]),
+            dtype=np.int64,
+        )
+
+    def estimate(self, query: str) -> int:
+        """
+        Limite superior do número de resultados de `query`, sem executar a busca:
+        o tamanho da menor lista de postings entre os trigramas da consulta.
+        """
+        query = query.lower()
+        if len(query) < self.N:
+            return len(self.texts)
+        smallest = len(self.texts)
+        for gram in {query[i:i + self.N] for i in range(len(query) - self.N + 1)}:
+            slot = self.grams.get(gram)
+            if slot is None:
+                return 0
+            smallest = min(smallest, int(self.offsets[slot + 1] - self.offsets[slot]))
+        return smallest
+
+    def matches(self, query: str, positions: np.ndarray) -> np.ndarray:
+        """Máscara das posições informadas cujo texto contém `query` (confirmação direta)."""
+        query = query.lower()
+        texts = self.texts
+        return np.fromiter(
+            (query in texts[pos] for pos in np.asarray(positions).tolist()),
+            dtype=bool,
+            count=len(positions),
+        )
+
+    def scores(self, query: str, positions: np.ndarray) -> np.ndarray:
+        """
+        Relevância de cada posição para `query`:
+        3 = texto igual, 2 = começa com a consulta, 1 = início de palavra, 0 = no meio.
+        """
+        query = query.lower()
+        word_query = " " + query
+        texts = self.texts
+
+        def score(text: str) -> int:
+            if text == query:
+                return 3
+            if text.startswith(query):
+                return 2
+            if word_query in text:
+                return 1
+            return 0
+
+        return np.fromiter(
+            (score(texts[pos]) for pos in np.asarray(positions).tolist()),
+            dtype=np.int64,
+            count=len(positions),
+        )
+
+
+class TrigramBuilder:
+    """
+    Monta as postings do TrigramIndex texto a texto, conforme os textos chegam
+    (ex.: registros do scraper), para que o índice fique pronto logo após o último.
+    """
+
+    def __init__(self):
+        self.texts: List[str] = []
+        self.postings: Dict[str, List[int]] = defaultdict(list)
+
+    def add(self, text: str) -> None:
+        text = str(text).lower()
+        pos = len(self.texts)
+        self.texts.append(text)
+        n = TrigramIndex.N
+        for gram in {text[i:i + n] for i in range(len(text) - n + 1)}:
+            self.postings[gram].append(pos)
+
+    def build(self) -> TrigramIndex:
+        return TrigramIndex.from_postings(self.texts, self.postings)
@@ -0,0 +1,190 @@
+import os
+import csv
+import time
+import warnings
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+from typing import List, Optional
+from catalog import Catalog
+from records import DEFAULT_LABEL, MAX_RATING, QUARANTINE_PATH, RECORD_FIELDS, csv_field_names
+from utils import DATA_PATH
+
+# Esquema do CSV: os campos do registro do scraper (= modelo Livro sem o id), lidos
+# pelo nome da coluna no cabeçalho, não pela posição. Preço e rating são lidos como
+# texto e convertidos/validados linha a linha, para que um valor inválido rejeite só
+# a sua linha; as colunas repetitivas usam dtype category.
+CSV_COLUMNS = list(RECORD_FIELDS)
+CSV_DTYPES = {
+    'titulo': 'object',
+    'preco': 'object',
+    'rating': 'object',
+    'disponibilidade': 'category',
+    'categoria': 'category',
+    'url_imagem': 'object',
+}
+LOAD_CHUNK_ROWS = 100_000
+
+def _read_header(path: str) -> List[str]:
+    """Nome do campo de cada coluna do CSV; ValueError se faltar algum campo."""
+    with open(path, newline="", encoding="utf-8-sig") as file:
+        header = next(csv.reader(file), [])
+    names = csv_field_names(header)
+    missing = [name for name in CSV_COLUMNS if name not in names]
+    if missing:
+        raise ValueError(f"colunas ausentes no cabeçalho do CSV: {', '.join(missing)}")
+    return names
+
+
+def _fill_category(series: pd.Series, value: str) -> pd.Series:
+    """fillna para colunas category (o valor precisa existir entre as categorias)."""
+    if not series.isna().any():
+        return series
+    if value not in series.cat.categories:
+        series = series.cat.add_categories([value])
+    return series.fillna(value)
+
+
+def _validate_chunk(chunk: pd.DataFrame):
+    """
+    Converte e valida um bloco do CSV de forma vetorizada.
+    Retorna (preços, ratings, motivo de rejeição por linha; "" = linha aceita).
+    """
+    precos = pd.to_numeric(chunk['preco'], errors='coerce').to_numpy(dtype=np.float64)
+    ratings = pd.to_numeric(chunk['rating'], errors='coerce').to_numpy(dtype=np.float64)
+    titulos = chunk['titulo'].astype(object)
+
+    with np.errstate(invalid='ignore'):
+        reasons = np.select(
+            [
+                titulos.isna().to_numpy() | (titulos.str.strip() == "").to_numpy(dtype=bool, na_value=True),
+                ~np.isfinite(precos),
+                precos < 0,
+                ~np.isfinite(ratings) | (ratings % 1 != 0) | (ratings < 0) | (ratings > MAX_RATING),
+            ],
+            ["titulo vazio", "preco invalido", "preco negativo", "rating invalido"],
+            default="",
+        )
+    return precos, ratings, reasons
+
+
+def _merge_categories(parts: List[pd.Categorical]):
+    """Une as colunas category dos blocos: (dicionário ordenado, códigos int32)."""
+    if not parts:
+        return [], np.empty(0, dtype=np.int32)
+    merged = union_categoricals(parts, sort_categories=True).remove_unused_categories()
+    return [str(value) for value in merged.categories], merged.codes.astype(np.int32)
+
+
+def _write_quarantine(rejected: List[pd.DataFrame], path: str) -> Optional[str]:
+    """Grava as linhas rejeitadas (com o motivo); remove um relatório antigo se não houver nenhuma."""
+    if not rejected:
+        if os.path.exists(path):
+            os.remove(path)
+        return None
+    report = pd.concat(rejected, ignore_index=True)
+    report['registro'] = report['registro'].astype('Int64')
+    report.to_csv(path, index=False, encoding="utf-8")
+    return path
+
+
+def load_data(path: str = DATA_PATH, chunksize: int = LOAD_CHUNK_ROWS, quarantine_path: str = QUARANTINE_PATH) -> Catalog:
+    """
+    Carrega o arquivo CSV, pré-processa os dados e retorna um catálogo colunar.
+
+    As colunas são localizadas pelo cabeçalho (nomes dos campos ou os cabeçalhos
+    localizados antigos), então a ordem das colunas no arquivo não importa.
+    O arquivo é lido em blocos com dtypes explícitos, então a memória fica
+    limitada ao bloco atual mais as colunas já aceitas. Cada linha é validada
+    individualmente: linhas inválidas (ou malformadas) vão para o relatório de
+    quarentena em vez de invalidar a carga inteira. O id de cada livro é o número
+    do registro no CSV, então uma linha rejeitada na validação não desloca os ids
+    das demais (uma linha malformada, descartada pelo parser, desloca os seguintes).
+
+    O resumo da carga (tempo, linhas aceitas/rejeitadas) fica em `catalog.load_report`.
+    """
+    started = time.perf_counter()
+    columns = {name: [] for name in ('ids', 'titulos', 'precos', 'ratings', 'disponibilidades', 'categorias', 'urls_imagem')}
+    rejected: List[pd.DataFrame] = []
+    accepted_rows = 0
+
+    try:
+        names = _read_header(path)
+        with warnings.catch_warnings(record=True) as bad_lines:
+            warnings.simplefilter("always", pd.errors.ParserWarning)
+            chunks = pd.read_csv(
+                path,
+                sep=",",
+                quotechar='"',
+                encoding="utf-8",
+                header=0,
+                names=names,
+                # usecols ignora campos a mais: só é usado quando o cabeçalho tem colunas extras
+                usecols=CSV_COLUMNS if len(names) > len(CSV_COLUMNS) else None,
+                dtype=CSV_DTYPES,
+                chunksize=chunksize,
+                on_bad_lines="warn",
+            )
+            for chunk in chunks:
+                precos, ratings, reasons = _validate_chunk(chunk)
+                ok = reasons == ""
+
+                if not ok.all():
+                    bad = chunk.loc[~ok].astype(object)
+                    bad.insert(0, 'registro', chunk.index[~ok] + 1)
+                    bad.insert(0, 'motivo', reasons[~ok])
+                    rejected.append(bad)
+
+                accepted = chunk.loc[ok]
+                accepted_rows += len(accepted)
+                columns['ids'].append(accepted.index.to_numpy(dtype=np.int64) + 1)
+                columns['titulos'].append(accepted['titulo'].to_numpy(dtype=object))
+                columns['precos'].append(precos[ok])
+                columns['ratings'].append(ratings[ok].astype(np.int8))
+                columns['disponibilidades'].append(_fill_category(accepted['disponibilidade'], DEFAULT_LABEL).values)
+                columns['categorias'].append(_fill_category(accepted['categoria'], DEFAULT_LABEL).values)
+                columns['urls_imagem'].append(accepted['url_imagem'].fillna("").to_numpy(dtype=object))
+
+        # Linhas com número de campos errado são descartadas pelo parser com um aviso
+        for warning in bad_lines:
+            for line in str(warning.message).strip().splitlines():
+                rejected.append(pd.DataFrame({'motivo': [f"linha malformada ({line.strip()})"], 'registro': [None]}))
+
+        disponibilidades, disponibilidade_codes = _merge_categories(columns['disponibilidades'])
+        categorias, categoria_codes = _merge_categories(columns['categorias'])
+
+        def concat(name, dtype):
+            parts = columns[name]
+            return np.concatenate(parts) if parts else np.empty(0, dtype=dtype)
+
+        catalog = Catalog(
+            ids=concat('ids', np.int64),
+            titulos=concat('titulos', object),
+            precos=concat('precos', np.float64),
+            ratings=concat('ratings', np.int8),
+            disponibilidade_codes=disponibilidade_codes,
+            disponibilidades=disponibilidades,
+            categoria_codes=categoria_codes,
+            categorias=categorias,
+            urls_imagem=concat('urls_imagem', object),
+        )
+
+    except Exception as e:
+        print(f"ERRO ao carregar dados: {e}")
+        return Catalog.empty()
+
+    try:
+        quarantine = _write_quarantine(rejected, quarantine_path)
+    except OSError as e:
+        print(f"ERRO ao gravar relatório de quarentena: {e}")
+        quarantine = None
+
+    catalog.load_report = {
+        'rows_accepted': accepted_rows,
+        'rows_rejected': sum(len(part) for part in rejected),
+        'load_seconds': round(time.perf_counter() - started, 4),
+        'quarantine_file': quarantine,
+    }
+    if rejected:
+        print(f"AVISO: {catalog.load_report['rows_rejected']} linha(s) rejeitada(s); veja {quarantine_path}")
+    return catalog
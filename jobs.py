@@ -0,0 +1,228 @@
+import os
+import json
+import time
+import sqlite3
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+JOBS_DB = "Data/jobs.sqlite3"
+
+# Estados de um job
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+ACTIVE_STATES = (QUEUED, RUNNING)
+
+# Um job que não começou a rodar nesse prazo é considerado perdido
+QUEUED_TIMEOUT_SECONDS = 60.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    status TEXT NOT NULL,
+    username TEXT,
+    pid INTEGER,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    pages_done INTEGER NOT NULL DEFAULT 0,
+    requests INTEGER NOT NULL DEFAULT 0,
+    cancel_requested INTEGER NOT NULL DEFAULT 0,
+    error_message TEXT,
+    result TEXT
+)
+"""
+
+
+class JobAlreadyRunning(Exception):
+    """Já existe um job ativo do mesmo tipo."""
+
+    def __init__(self, job: Dict[str, Any]):
+        super().__init__(f"Job {job['id']} ainda está em execução")
+        self.job = job
+
+
+def _pid_alive(pid: Optional[int]) -> bool:
+    if not pid:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _iso(timestamp: Optional[float]) -> Optional[str]:
+    return datetime.fromtimestamp(timestamp).isoformat() if timestamp else None
+
+
+class JobStore:
+    """
+    Tabela de jobs em SQLite, compartilhada por todos os workers da API e pelos
+    processos que executam os jobs.
+
+    A criação de um job é feita em uma transação exclusiva (BEGIN IMMEDIATE), então
+    só um job ativo por tipo existe, mesmo com vários workers recebendo requisições
+    ao mesmo tempo. O processo do job grava o progresso e lê o pedido de cancelamento
+    na mesma tabela.
+    """
+
+    def __init__(self, path: str = JOBS_DB):
+        self.path = path
+        # O banco é criado no primeiro uso, não quando o módulo da API é importado
+        self._initialized = False
+
+    def _initialize(self, connection: sqlite3.Connection) -> None:
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute(SCHEMA)
+        self._initialized = True
+
+    @contextmanager
+    def _connect(self):
+        if not self._initialized:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+        # Autocommit: cada comando é uma transação, exceto os blocos com BEGIN explícito
+        connection = sqlite3.connect(self.path, timeout=10.0, isolation_level=None)
+        connection.row_factory = sqlite3.Row
+        if not self._initialized:
+            self._initialize(connection)
+        try:
+            yield connection
+        finally:
+            connection.close()
+
+    # --- Criação e ciclo de vida (API e processo do job) ---
+    def create(self, kind: str, username: Optional[str] = None) -> Dict[str, Any]:
+        """Registra um novo job; JobAlreadyRunning se já houver um ativo do mesmo tipo."""
+        with self._connect() as connection:
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                self._expire_lost(connection)
+                active = connection.execute(
+                    "SELECT * FROM jobs WHERE kind = ? AND status IN (?, ?) ORDER BY id DESC LIMIT 1",
+                    (kind, *ACTIVE_STATES),
+                ).fetchone()
+                if active is not None:
+                    raise JobAlreadyRunning(self._to_dict(active))
+                cursor = connection.execute(
+                    "INSERT INTO jobs (kind, status, username, created_at) VALUES (?, ?, ?, ?)",
+                    (kind, QUEUED, username, time.time()),
+                )
+                connection.execute("COMMIT")
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+        return self.get(cursor.lastrowid)
+
+    def start(self, job_id: int, pid: int) -> bool:
+        """Marca o job como em execução; False se ele foi cancelado antes de começar."""
+        with self._connect() as connection:
+            cursor = connection.execute(
+                "UPDATE jobs SET status = ?, pid = ?, started_at = ? WHERE id = ? AND status = ? AND cancel_requested = 0",
+                (RUNNING, pid, time.time(), job_id, QUEUED),
+            )
+            if cursor.rowcount == 0:
+                self.finish(job_id, CANCELLED)
+                return False
+            return True
+
+    def update_progress(self, job_id: int, pages_done: int, requests: int) -> bool:
+        """Grava os contadores de progresso; retorna se houve pedido de cancelamento."""
+        with self._connect() as connection:
+            connection.execute(
+                "UPDATE jobs SET pages_done = ?, requests = ? WHERE id = ?",
+                (pages_done, requests, job_id),
+            )
+            row = connection.execute("SELECT cancel_requested FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return bool(row and row["cancel_requested"])
+
+    def finish(self, job_id: int, status: str, error_message: Optional[str] = None, result: Optional[dict] = None) -> None:
+        with self._connect() as connection:
+            connection.execute(
+                "UPDATE jobs SET status = ?, finished_at = ?, error_message = ?, result = ? WHERE id = ? AND status IN (?, ?)",
+                (status, time.time(), error_message, json.dumps(result) if result is not None else None, job_id, *ACTIVE_STATES),
+            )
+
+    def request_cancel(self, job_id: int) -> Optional[Dict[str, Any]]:
+        """
+        Pede o cancelamento de um job ativo. Um job que ainda não começou (ou cujo
+        processo não existe mais) é encerrado na hora; um job em execução para
+        quando o processo ler o pedido.
+        """
+        with self._connect() as connection:
+            connection.execute(
+                "UPDATE jobs SET cancel_requested = 1 WHERE id = ? AND status IN (?, ?)",
+                (job_id, *ACTIVE_STATES),
+            )
+        job = self.get(job_id)
+        if job is not None and job["status"] in ACTIVE_STATES and not _pid_alive(job["pid"]):
+            self.finish(job_id, CANCELLED)
+            job = self.get(job_id)
+        return job
+
+    # --- Consultas ---
+    def get(self, job_id: int) -> Optional[Dict[str, Any]]:
+        with self._connect() as connection:
+            row = connection.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._to_dict(row) if row is not None else None
+
+    def active(self, kind: str) -> Optional[Dict[str, Any]]:
+        """Job ativo do tipo informado (jobs cujo processo morreu são marcados como falhos)."""
+        with self._connect() as connection:
+            self._expire_lost(connection)
+            row = connection.execute(
+                "SELECT * FROM jobs WHERE kind = ? AND status IN (?, ?) ORDER BY id DESC LIMIT 1",
+                (kind, *ACTIVE_STATES),
+            ).fetchone()
+        return self._to_dict(row) if row is not None else None
+
+    def latest(self, kind: str) -> Optional[Dict[str, Any]]:
+        history = self.history(kind, limit=1)
+        return history[0] if history else None
+
+    def history(self, kind: str, limit: int = 20) -> List[Dict[str, Any]]:
+        with self._connect() as connection:
+            self._expire_lost(connection)
+            rows = connection.execute(
+                "SELECT * FROM jobs WHERE kind = ? ORDER BY id DESC LIMIT ?",
+                (kind, limit),
+            ).fetchall()
+        return [self._to_dict(row) for row in rows]
+
+    def _expire_lost(self, connection: sqlite3.Connection) -> None:
+        """Encerra jobs ativos cujo processo não existe mais (ou que nunca começaram)."""
+        now = time.time()
+        rows = connection.execute(
+            "SELECT id, status, pid, created_at FROM jobs WHERE status IN (?, ?)", ACTIVE_STATES
+        ).fetchall()
+        for row in rows:
+            lost = (
+                not _pid_alive(row["pid"]) if row["status"] == RUNNING
+                else now - row["created_at"] > QUEUED_TIMEOUT_SECONDS
+            )
+            if lost:
+                connection.execute(
+                    "UPDATE jobs SET status = ?, finished_at = ?, error_message = ? WHERE id = ?",
+                    (FAILED, now, "Processo do job encerrado inesperadamente", row["id"]),
+                )
+
+    @staticmethod
+    def _to_dict(row: sqlite3.Row) -> Dict[str, Any]:
+        job = dict(row)
+        end = job["finished_at"] or (time.time() if job["started_at"] else None)
+        duration = end - job["started_at"] if job["started_at"] and end else None
+        job["duration_seconds"] = round(duration, 3) if duration is not None else None
+        job["pages_per_second"] = round(job["pages_done"] / duration, 2) if duration else None
+        job["cancel_requested"] = bool(job["cancel_requested"])
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        for field in ("created_at", "started_at", "finished_at"):
+            job[field] = _iso(job[field])
+        return job
@@ -1,13 +1,89 @@
-from fastapi import FastAPI
-from api import books, categories, health, stats, auth, scrap
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+from starlette.concurrency import run_in_threadpool
+from api import books, categories, health, stats, auth, scrap, metrics
+from auth_utils import TOKEN_CACHE
+from metrics import METRICS, MetricsMiddleware
+from profiler import PROFILER, PROFILER_ENABLED
+from response_cache import ResponseCache, ResponseCacheMiddleware
+from utils import CATALOG_STORE, CatalogNotReady
+
+# Segundos sugeridos (Retry-After) para repetir uma requisição durante a primeira carga
+NOT_READY_RETRY_AFTER = 1
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Inicialização do worker: nada pesado acontece no import do módulo.
+    A primeira carga do catálogo roda em background; o worker já responde à
+    liveness (/api/v1/health/live) e fica pronto (/api/v1/health/ready) quando ela termina.
+    """
+    CATALOG_STORE.start()
+    if PROFILER_ENABLED:
+        PROFILER.start()
+    yield
+    # stop() espera a thread de amostragem terminar: fora do event loop
+    await run_in_threadpool(PROFILER.stop)
 
 # Cria a instância principal da aplicação FastAPI
 app = FastAPI(
     title="Books to Scrape RESTful API",
     description="API de demonstração utilizando dados de web scraping do Books to Scrape.",
     version="1.0.0",
+    lifespan=lifespan,
+)
+
+# Rotas de dados chamadas antes da primeira carga terminar respondem 503
+@app.exception_handler(CatalogNotReady)
+async def catalog_not_ready_handler(request: Request, exc: CatalogNotReady):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Os dados ainda estão sendo carregados. Tente novamente em instantes."},
+        headers={"Retry-After": str(NOT_READY_RETRY_AFTER)},
+    )
+
+# Cache de respostas das rotas de leitura (ETag/304, invalidado pela versão dos dados)
+RESPONSE_CACHE = ResponseCache()
+app.add_middleware(
+    ResponseCacheMiddleware,
+    cache=RESPONSE_CACHE,
+    version_getter=lambda: CATALOG_STORE.get().version,
+    prefixes=("/api/v1/books", "/api/v1/categories", "/api/v1/stats"),
+    exclude=("/api/v1/books/export",),
 )
 
+# Latência, tamanho das respostas e requisições em andamento por rota.
+# Adicionado por último = middleware mais externo (mede também os acertos do cache).
+app.add_middleware(MetricsMiddleware, routes=app.routes, registry=METRICS)
+
+# Valores lidos na hora da coleta do /api/metrics
+METRICS.register_gauge("response_cache_entries", "Entradas no cache de respostas.", lambda: [({}, len(RESPONSE_CACHE))])
+METRICS.register_gauge("response_cache_bytes", "Bytes armazenados no cache de respostas.", lambda: [({}, RESPONSE_CACHE.size)])
+METRICS.register_gauge("response_cache_lookups_total", "Consultas ao cache de respostas por resultado.", lambda: [
+    ({"result": "hit"}, RESPONSE_CACHE.hits), ({"result": "miss"}, RESPONSE_CACHE.misses)
+], metric_type="counter")
+METRICS.register_gauge("token_cache_lookups_total", "Consultas ao cache de tokens verificados por resultado.", lambda: [
+    ({"result": "hit"}, TOKEN_CACHE.hits), ({"result": "miss"}, TOKEN_CACHE.misses)
+], metric_type="counter")
+METRICS.register_gauge("catalog_rows", "Livros no snapshot atual do catálogo.", lambda: [({}, len(CATALOG_STORE.get()))])
+METRICS.register_gauge("catalog_generation", "Recarregamentos do catálogo neste worker.", lambda: [({}, CATALOG_STORE.generation)])
+METRICS.register_gauge("catalog_load_seconds", "Tempo de montagem do snapshot atual.", lambda: [({}, CATALOG_STORE.get().load_seconds or 0)])
+METRICS.register_gauge("catalog_bytes", "Tamanho das colunas e índices do snapshot atual.", lambda: [({}, CATALOG_STORE.get().nbytes())])
+
+def ingest_report() -> dict:
+    """Resumo da carga que gerou o snapshot atual (CSV ou scraper); vazio se não houver."""
+    return CATALOG_STORE.get().load_report or {}
+
+METRICS.register_gauge("catalog_ingest_rows", "Linhas da carga que gerou o snapshot atual, por resultado da validação.", lambda: [
+    ({"result": "accepted"}, ingest_report().get("rows_accepted", 0)),
+    ({"result": "rejected"}, ingest_report().get("rows_rejected", 0)),
+])
+METRICS.register_gauge("catalog_ingest_seconds", "Tempo de leitura e validação da carga que gerou o snapshot atual.", lambda: [
+    ({}, ingest_report().get("load_seconds") or 0)
+])
+
 # Inclusão dos routers (endpoints)
 app.include_router(health.router, prefix="/api")
 app.include_router(books.router, prefix="/api")
@@ -15,6 +91,7 @@ app.include_router(categories.router, prefix="/api")
 app.include_router(stats.router, prefix="/api")
 app.include_router(auth.router, prefix="/api") 
 app.include_router(scrap.router, prefix="/api") 
+app.include_router(metrics.router, prefix="/api")
 
 @app.get("/", tags=["Root"])
 async def read_root():
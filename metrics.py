@@ -0,0 +1,288 @@
+import sys
+import time
+import bisect
+import resource
+import threading
+from typing import Callable, Dict, Iterable, List, Tuple
+
+# Limites dos buckets dos histogramas (em segundos e em bytes)
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SPAN_BUCKETS = (0.00001, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216, 67108864, 268435456)
+
+# Rótulo das requisições que não casam com nenhuma rota (evita um rótulo por URL)
+UNMATCHED_ROUTE = "<unmatched>"
+
+# Limite do cache caminho -> rota (ids na URL geram um caminho por livro)
+ROUTE_CACHE_MAX_ENTRIES = 4096
+
+# Trechos medidos dentro da camada de dados
+SPAN_INDEX_LOOKUP = "index_lookup"
+SPAN_FILTERING = "filtering"
+SPAN_SERIALIZATION = "serialization"
+SPAN_AUTH_DECODE = "auth_decode"
+
+
+class Histogram:
+    """Histograma de buckets fixos (contagens por bucket, soma e total), no formato do Prometheus."""
+
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        # Um bucket por limite, mais o +Inf
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        """(le, contagem acumulada) de cada bucket, terminando em +Inf."""
+        result, total = [], 0
+        for bound, count in zip(self.bounds + (float("inf"),), self.counts):
+            total += count
+            result.append(("+Inf" if bound == float("inf") else repr(bound), total))
+        return result
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels) -> str:
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+
+def process_rss_bytes() -> int:
+    """Memória residente atual do processo (Linux: /proc); fora do Linux, o pico (ru_maxrss)."""
+    try:
+        with open("/proc/self/status", encoding="ascii") as file:
+            for line in file:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss é em KB no Linux e em bytes no macOS
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class MetricsRegistry:
+    """
+    Métricas do processo: latência, tamanho das respostas e requisições em andamento
+    por rota, duração dos trechos da camada de dados e valores lidos na hora da
+    coleta (gauges registrados por quem os conhece, como o cache de respostas).
+
+    Cada worker tem o seu registro; o Prometheus agrega os workers pelo rótulo da instância.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started = time.time()
+        self.requests: Dict[Tuple[str, str, str], int] = {}
+        self.latency: Dict[Tuple[str, str], Histogram] = {}
+        self.sizes: Dict[Tuple[str, str], Histogram] = {}
+        self.in_flight: Dict[Tuple[str, str], int] = {}
+        self.spans: Dict[str, Histogram] = {}
+        self._gauges: List[Tuple[str, str, Callable[[], Iterable[Tuple[Dict[str, str], float]]], str]] = []
+
+    # --- Coleta ---
+    def request_started(self, method: str, route: str) -> None:
+        with self._lock:
+            key = (method, route)
+            self.in_flight[key] = self.in_flight.get(key, 0) + 1
+
+    def request_finished(self, method: str, route: str, status: int, seconds: float, size: int) -> None:
+        with self._lock:
+            key = (method, route)
+            self.in_flight[key] -= 1
+            self.requests[(method, route, str(status))] = self.requests.get((method, route, str(status)), 0) + 1
+            latency = self.latency.get(key)
+            if latency is None:
+                latency = self.latency[key] = Histogram(LATENCY_BUCKETS)
+                self.sizes[key] = Histogram(SIZE_BUCKETS)
+            latency.observe(seconds)
+            self.sizes[key].observe(size)
+
+    def observe_span(self, name: str, seconds: float) -> None:
+        with self._lock:
+            histogram = self.spans.get(name)
+            if histogram is None:
+                histogram = self.spans[name] = Histogram(SPAN_BUCKETS)
+            histogram.observe(seconds)
+
+    def register_gauge(
+        self,
+        name: str,
+        help_text: str,
+        collect: Callable[[], Iterable[Tuple[Dict[str, str], float]]],
+        metric_type: str = "gauge",
+    ) -> None:
+        """
+        Registra um valor calculado na coleta: `collect` retorna pares (rótulos, valor).
+        Contadores mantidos por outros módulos (ex.: acertos de cache) usam metric_type="counter".
+        """
+        self._gauges.append((name, help_text, collect, metric_type))
+
+    def reset(self) -> None:
+        with self._lock:
+            self.requests.clear()
+            self.latency.clear()
+            self.sizes.clear()
+            self.spans.clear()
+            self.in_flight = {key: value for key, value in self.in_flight.items() if value}
+
+    # --- Exposição ---
+    def render(self) -> str:
+        """Todas as métricas no formato de texto do Prometheus (versão 0.0.4)."""
+        with self._lock:
+            requests = dict(self.requests)
+            in_flight = dict(self.in_flight)
+            latency = {key: (hist.cumulative(), hist.sum, hist.count) for key, hist in self.latency.items()}
+            sizes = {key: (hist.cumulative(), hist.sum, hist.count) for key, hist in self.sizes.items()}
+            spans = {name: (hist.cumulative(), hist.sum, hist.count) for name, hist in self.spans.items()}
+
+        lines = [
+            "# HELP http_requests_total Requisições atendidas por rota e status.",
+            "# TYPE http_requests_total counter",
+        ]
+        for (method, route, status), count in sorted(requests.items()):
+            lines.append(f"http_requests_total{_labels(method=method, route=route, status=status)} {count}")
+
+        lines += [
+            "# HELP http_requests_in_flight Requisições em andamento por rota.",
+            "# TYPE http_requests_in_flight gauge",
+        ]
+        for (method, route), count in sorted(in_flight.items()):
+            lines.append(f"http_requests_in_flight{_labels(method=method, route=route)} {count}")
+
+        for name, help_text, series in (
+            ("http_request_duration_seconds", "Latência das requisições por rota.", latency),
+            ("http_response_size_bytes", "Tamanho do corpo das respostas por rota.", sizes),
+        ):
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+            for (method, route), values in sorted(series.items()):
+                lines += self._histogram_lines(name, {"method": method, "route": route}, *values)
+
+        lines += [
+            "# HELP data_span_duration_seconds Duração dos trechos da camada de dados.",
+            "# TYPE data_span_duration_seconds histogram",
+        ]
+        for name, values in sorted(spans.items()):
+            lines += self._histogram_lines("data_span_duration_seconds", {"span": name}, *values)
+
+        for name, help_text, collect, metric_type in self._gauges:
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {metric_type}"]
+            for labels, value in collect():
+                lines.append(f"{name}{_labels(**labels) if labels else ''} {value}")
+
+        lines += [
+            "# HELP process_resident_memory_bytes Memória residente do processo.",
+            "# TYPE process_resident_memory_bytes gauge",
+            f"process_resident_memory_bytes {process_rss_bytes()}",
+            "# HELP process_start_time_seconds Início do processo (epoch).",
+            "# TYPE process_start_time_seconds gauge",
+            f"process_start_time_seconds {self.started}",
+        ]
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def _histogram_lines(name: str, labels: Dict[str, str], buckets, total: float, count: int) -> List[str]:
+        lines = [f"{name}_bucket{_labels(**labels, le=le)} {value}" for le, value in buckets]
+        lines.append(f"{name}_sum{_labels(**labels)} {total}")
+        lines.append(f"{name}_count{_labels(**labels)} {count}")
+        return lines
+
+
+# Registro do processo (usado pelo middleware, pela camada de dados e por /api/metrics)
+METRICS = MetricsRegistry()
+
+
+class Span:
+    """Mede a duração de um trecho da camada de dados (context manager)."""
+
+    __slots__ = ("name", "start")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        METRICS.observe_span(self.name, time.perf_counter() - self.start)
+        return False
+
+
+def span(name: str) -> Span:
+    """
+    Mede um trecho da camada de dados:
+
+        with span(SPAN_INDEX_LOOKUP):
+            positions = index.search(text)
+    """
+    return Span(name)
+
+
+class MetricsMiddleware:
+    """
+    Middleware ASGI que mede cada requisição HTTP: latência, tamanho do corpo,
+    status e requisições em andamento, rotuladas pelo modelo da rota
+    (ex.: /api/v1/books/{book_id}), não pela URL.
+
+    Deve ser o middleware mais externo, para que respostas servidas pelo cache também sejam medidas.
+    """
+
+    def __init__(self, app, routes: List, registry: MetricsRegistry = METRICS):
+        self.app = app
+        self.routes = routes
+        self.registry = registry
+        self._route_cache: Dict[Tuple[str, str], str] = {}
+
+    def route_template(self, scope) -> str:
+        key = (scope["method"], scope["path"])
+        template = self._route_cache.get(key)
+        if template is None:
+            template = UNMATCHED_ROUTE
+            # Import local: starlette só é necessário quando o middleware é usado
+            from starlette.routing import Match
+            for route in self.routes:
+                match, _ = route.matches(scope)
+                if match == Match.FULL:
+                    template = route.path
+                    break
+                if match == Match.PARTIAL and template == UNMATCHED_ROUTE:
+                    template = route.path
+            if len(self._route_cache) >= ROUTE_CACHE_MAX_ENTRIES:
+                self._route_cache.clear()
+            self._route_cache[key] = template
+        return template
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        method = scope["method"]
+        route = self.route_template(scope)
+        status = 500
+        size = 0
+
+        async def measure(message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        self.registry.request_started(method, route)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, measure)
+        finally:
+            self.registry.request_finished(method, route, status, time.perf_counter() - start, size)
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 # Modelo para o objeto Livro
 class Livro(BaseModel):
@@ -11,11 +11,46 @@ class Livro(BaseModel):
     categoria: str
     url_imagem: str
     
+# Modelo para um livro recomendado (Livro + similaridade de cosseno com o livro consultado)
+class SimilarBook(Livro):
+    similaridade: float
+
+# Modelo para os livros similares de um livro (consulta em lote)
+class SimilarBooks(BaseModel):
+    id: int
+    similares: List[SimilarBook]
+
+
+# Modelo para o resumo da carga do CSV
+class IngestReport(BaseModel):
+    rows_accepted: int
+    rows_rejected: int
+    load_seconds: float
+    quarantine_file: Optional[str] = None
+
+# Modelo para o uso de memória do worker
+class MemoryUsage(BaseModel):
+    catalog_bytes: int
+    rss_bytes: int
 
 # Modelo para o status de saúde da API
 class HealthStatus(BaseModel):
     status: str
     data_source: str
+    data_version: Optional[str] = None
+    rows: int = 0
+    load_seconds: Optional[float] = None
+    memory: Optional[MemoryUsage] = None
+    ingest: Optional[IngestReport] = None
+
+# Modelo para a readiness do worker (ready, loading ou no_data)
+class ReadinessStatus(BaseModel):
+    status: str
+    rows: int
+    data_version: Optional[str] = None
+    error: Optional[str] = None
+    # Matriz de livros similares ("ready" ou "preparing"); não entra na readiness
+    similarity: Optional[str] = None
 
 # Modelo para contagem de livros por Rating
 class RatingDistribution(BaseModel):
@@ -54,3 +89,28 @@ class UserLogin(BaseModel):
 class AuthenticatedUser(BaseModel):
     username: str
     user_id: Optional[int] = None # Um ID seria usado em um DB real
+
+# Modelo para um job de scraping (tabela de jobs)
+class ScrapeJob(BaseModel):
+    id: int
+    status: str # queued, running, succeeded, failed ou cancelled
+    username: Optional[str] = None
+    created_at: str
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+    pages_done: int
+    requests: int
+    cancel_requested: bool
+    duration_seconds: Optional[float] = None
+    pages_per_second: Optional[float] = None
+    error_message: Optional[str] = None
+    result: Optional[Dict[str, int]] = None # Livros adicionados, alterados e removidos
+
+# Modelo para o estado do profiler por amostragem
+class ProfilerStatus(BaseModel):
+    running: bool
+    interval_seconds: float
+    samples: int
+    distinct_stacks: int
+    started_at: Optional[str] = None
+    stopped_at: Optional[str] = None
@@ -0,0 +1,109 @@
+import os
+import sys
+import time
+import threading
+from collections import Counter
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+# Intervalo padrão entre amostras (segundos)
+PROFILER_INTERVAL = 0.005
+
+# Liga o profiler no lifespan do worker (PROFILER_ENABLED=1); desligado por padrão
+PROFILER_ENABLED = os.getenv("PROFILER_ENABLED", "").lower() in ("1", "true", "yes")
+
+# Profundidade máxima das pilhas amostradas
+MAX_STACK_DEPTH = 64
+
+
+class SamplingProfiler:
+    """
+    Profiler por amostragem: uma thread lê a pilha de todas as outras threads do
+    processo a cada `interval` segundos e conta as pilhas iguais.
+
+    Não instrumenta as funções (o custo não depende do código medido, só do
+    intervalo) e pode ser ligado e desligado com o servidor em produção. O
+    resultado sai no formato "folded" (uma pilha por linha, frames separados por
+    ";" e a contagem no fim), lido por flamegraph.pl e speedscope.
+    """
+
+    def __init__(self, interval: float = PROFILER_INTERVAL):
+        self.interval = interval
+        # _control serializa start/stop; _lock protege só as amostras (a thread
+        # amostradora o toma a cada amostra, então ninguém espera por ela segurando-o)
+        self._control = threading.Lock()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._stacks: Counter = Counter()
+        self.samples = 0
+        self.started_at: Optional[float] = None
+        self.stopped_at: Optional[float] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, interval: Optional[float] = None) -> bool:
+        """Começa a amostrar (descartando as amostras anteriores); False se já estava ligado."""
+        with self._control:
+            if self.running:
+                return False
+            if interval is not None:
+                self.interval = interval
+            with self._lock:
+                self._stacks = Counter()
+                self.samples = 0
+            self.started_at, self.stopped_at = time.time(), None
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+            self._thread.start()
+            return True
+
+    def stop(self) -> bool:
+        """Para de amostrar (as amostras continuam disponíveis); False se já estava desligado."""
+        with self._control:
+            if not self.running:
+                return False
+            self._stop.set()
+            self._thread.join()
+            self.stopped_at = time.time()
+            return True
+
+    def _run(self):
+        own_thread = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            stacks = []
+            for thread_id, frame in frames.items():
+                if thread_id == own_thread:
+                    continue
+                stack = []
+                while frame is not None and len(stack) < MAX_STACK_DEPTH:
+                    code = frame.f_code
+                    stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                    frame = frame.f_back
+                stacks.append(";".join(reversed(stack)))
+            with self._lock:
+                self._stacks.update(stacks)
+                self.samples += 1
+
+    def folded(self) -> str:
+        """Pilhas no formato folded, das mais frequentes para as menos frequentes."""
+        with self._lock:
+            stacks = self._stacks.most_common()
+        return "".join(f"{stack} {count}\n" for stack, count in stacks)
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "running": self.running,
+            "interval_seconds": self.interval,
+            "samples": self.samples,
+            "distinct_stacks": len(self._stacks),
+            "started_at": datetime.fromtimestamp(self.started_at).isoformat() if self.started_at else None,
+            "stopped_at": datetime.fromtimestamp(self.stopped_at).isoformat() if self.stopped_at else None,
+        }
+
+
+# Profiler do processo (cada worker amostra só as próprias threads)
+PROFILER = SamplingProfiler()
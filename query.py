@@ -0,0 +1,204 @@
+import numpy as np
+from typing import List, Optional, Tuple
+from catalog import Catalog
+from metrics import SPAN_FILTERING, SPAN_INDEX_LOOKUP, span
+
+# Ordenações aceitas por /v1/books/query ("-" = decrescente)
+SORT_FIELDS = ("price", "-price", "rating", "-rating")
+
+
+class BookQuery:
+    """Filtros combinados de uma consulta (None = filtro não usado)."""
+
+    __slots__ = ("title", "category", "min_price", "max_price", "min_rating", "max_rating", "sort")
+
+    def __init__(
+        self,
+        title: Optional[str] = None,
+        category: Optional[str] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        min_rating: Optional[int] = None,
+        max_rating: Optional[int] = None,
+        sort: Optional[str] = None,
+    ):
+        self.title = title
+        self.category = category
+        self.min_price = min_price
+        self.max_price = max_price
+        self.min_rating = min_rating
+        self.max_rating = max_rating
+        self.sort = sort
+
+
+# --- Predicados ---
+# Cada predicado sabe estimar quantas linhas aceita (sem varrer o catálogo), gerar
+# as posições candidatas pelo seu índice e testar um conjunto já reduzido de posições.
+# Predicados sobre colunas com bitmap também expõem `bitmap()`, para que o
+# planejador os combine com AND direto nos bitsets.
+
+class CategoryPredicate:
+    name = "category"
+
+    def __init__(self, catalog: Catalog, text: str):
+        self.catalog = catalog
+        # Códigos das categorias que contêm o texto (busca só no dicionário)
+        self.codes = catalog.category_index.search(text)
+
+    def estimate(self) -> int:
+        return self.catalog.category_bitmaps.count(self.codes.tolist())
+
+    def bitmap(self) -> np.ndarray:
+        return self.catalog.category_bitmaps.any_of(self.codes.tolist())
+
+    def candidates(self) -> np.ndarray:
+        return self.catalog.category_bitmaps.positions(self.bitmap())
+
+    def matches(self, positions: np.ndarray) -> np.ndarray:
+        return np.isin(self.catalog.categoria_codes[positions], self.codes)
+
+
+class RatingPredicate:
+    name = "rating"
+
+    def __init__(self, catalog: Catalog, min_rating: Optional[int], max_rating: Optional[int]):
+        self.catalog = catalog
+        self.low = 0 if min_rating is None else min_rating
+        self.high = len(catalog.rating_bitmaps) - 1 if max_rating is None else max_rating
+        self.values = list(range(self.low, self.high + 1))
+
+    def estimate(self) -> int:
+        return self.catalog.rating_bitmaps.count(self.values)
+
+    def bitmap(self) -> np.ndarray:
+        return self.catalog.rating_bitmaps.any_of(self.values)
+
+    def candidates(self) -> np.ndarray:
+        return self.catalog.rating_bitmaps.positions(self.bitmap())
+
+    def matches(self, positions: np.ndarray) -> np.ndarray:
+        ratings = self.catalog.ratings[positions]
+        return (ratings >= self.low) & (ratings <= self.high)
+
+
+class PricePredicate:
+    name = "price"
+
+    def __init__(self, catalog: Catalog, min_price: Optional[float], max_price: Optional[float]):
+        self.catalog = catalog
+        self.low = 0.0 if min_price is None else min_price
+        self.high = float("inf") if max_price is None else max_price
+        # Faixa no índice ordenado: duas buscas binárias, contagem exata
+        self.range = catalog.price_index.range(self.low, self.high)
+
+    def estimate(self) -> int:
+        return len(self.range)
+
+    def candidates(self) -> np.ndarray:
+        return np.sort(self.range)
+
+    def matches(self, positions: np.ndarray) -> np.ndarray:
+        precos = self.catalog.precos[positions]
+        return (precos >= self.low) & (precos <= self.high)
+
+
+class TitlePredicate:
+    name = "title"
+
+    def __init__(self, catalog: Catalog, text: str):
+        self.catalog = catalog
+        self.text = text
+
+    def estimate(self) -> int:
+        return self.catalog.title_index.estimate(self.text)
+
+    def candidates(self) -> np.ndarray:
+        return self.catalog.title_index.search(self.text)
+
+    def matches(self, positions: np.ndarray) -> np.ndarray:
+        return self.catalog.title_index.matches(self.text, positions)
+
+
+def plan_query(catalog: Catalog, query: BookQuery) -> List[Tuple[object, int]]:
+    """
+    Monta o plano da consulta: os predicados usados, com sua estimativa de
+    linhas, do mais seletivo para o menos seletivo.
+    """
+    predicates = []
+    if query.category:
+        predicates.append(CategoryPredicate(catalog, query.category))
+    if query.min_rating is not None or query.max_rating is not None:
+        predicates.append(RatingPredicate(catalog, query.min_rating, query.max_rating))
+    if query.min_price is not None or query.max_price is not None:
+        predicates.append(PricePredicate(catalog, query.min_price, query.max_price))
+    if query.title:
+        predicates.append(TitlePredicate(catalog, query.title))
+
+    plan = [(predicate, predicate.estimate()) for predicate in predicates]
+    plan.sort(key=lambda step: step[1])
+    return plan
+
+
+def top_k(keys: np.ndarray, positions: np.ndarray, k: Optional[int] = None) -> np.ndarray:
+    """
+    As `k` posições de menor chave, ordenadas por (chave, posição).
+
+    Em vez de ordenar todos os candidatos, acha o k-ésimo valor com np.partition
+    (O(n)) e só ordena as posições com chave até esse valor. O desempate pela
+    posição garante o mesmo resultado de uma ordenação completa estável.
+    """
+    if k is not None and k < len(positions):
+        if k <= 0:
+            return positions[:0]
+        kth = np.partition(keys, k - 1)[k - 1]
+        selected = np.flatnonzero(keys <= kth)
+        keys, positions = keys[selected], positions[selected]
+    order = np.lexsort((positions, keys))
+    return positions[order[:k]] if k is not None else positions[order]
+
+
+def execute_query(catalog: Catalog, query: BookQuery, top: Optional[int] = None):
+    """
+    Executa a consulta e retorna (posições, plano).
+
+    O predicado mais seletivo gera os candidatos pelo seu índice; os demais só
+    testam esses candidatos (o custo cai com o tamanho do conjunto, não do
+    catálogo). Se o mais seletivo tem bitmap, todos os predicados com bitmap são
+    combinados antes com AND nos bitsets. Sem `sort`, o resultado fica na ordem do catálogo; com `sort`,
+    apenas as `top` primeiras posições são selecionadas e ordenadas.
+    """
+    with span(SPAN_INDEX_LOOKUP):
+        plan = plan_query(catalog, query)
+        remaining = []
+
+        if not plan:
+            positions = catalog.slice()
+        elif plan[0][1] == 0:
+            positions = np.empty(0, dtype=np.int64)
+        else:
+            remaining = [predicate for predicate, _ in plan]
+            if hasattr(remaining[0], "bitmap"):
+                bitmapped = [predicate for predicate in remaining if hasattr(predicate, "bitmap")]
+                positions = catalog.category_bitmaps.positions(
+                    np.bitwise_and.reduce([predicate.bitmap() for predicate in bitmapped])
+                )
+                remaining = [predicate for predicate in remaining if not hasattr(predicate, "bitmap")]
+            else:
+                positions = remaining.pop(0).candidates()
+
+    with span(SPAN_FILTERING):
+        for predicate in remaining:
+            if len(positions) == 0:
+                break
+            positions = positions[predicate.matches(positions)]
+
+        if query.sort:
+            column = catalog.precos if query.sort.lstrip("-") == "price" else catalog.ratings
+            keys = column[positions].astype(np.float64)
+            if query.sort.startswith("-"):
+                keys = -keys
+            positions = top_k(keys, positions, top)
+        elif top is not None:
+            positions = positions[:top]
+
+    return positions, [(predicate.name, estimate) for predicate, estimate in plan]
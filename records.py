@@ -0,0 +1,307 @@
+import os
+import csv
+import math
+import time
+import numpy as np
+from array import array
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+from catalog import Catalog, encode_json_row
+from columns import StringColumn
+from indexes import TrigramBuilder
+from models import Livro
+from snapshot import SNAPSHOT_DIR, publish_snapshot, write_snapshot
+
+# Relatório dos registros rejeitados na última carga (CSV ou scraper)
+QUARANTINE_PATH = "Data/Livros.quarantine.csv"
+MAX_RATING = 5
+DEFAULT_LABEL = "Indefinido"
+
+
+class BookRecord(NamedTuple):
+    """
+    Um livro extraído pelo scraper, já tipado: os campos do modelo Livro sem o id,
+    que é atribuído pelo catálogo (número do registro). Por ser uma tupla, vira
+    linha de CSV ou entra nas colunas do catálogo sem conversão.
+    """
+    titulo: str
+    preco: float
+    rating: int
+    disponibilidade: str
+    categoria: str
+    url_imagem: str
+
+
+# Campos do registro, na ordem do Livro (e das colunas do CSV exportado)
+RECORD_FIELDS = BookRecord._fields
+
+# O registro e o modelo servido pela API não podem divergir
+if RECORD_FIELDS != tuple(name for name in Livro.model_fields if name != "id"):
+    raise TypeError(f"BookRecord {RECORD_FIELDS} não corresponde ao modelo Livro")
+
+# Cabeçalhos localizados dos CSVs gravados por versões anteriores do scraper
+CSV_HEADER_ALIASES = {
+    "Título": "titulo",
+    "Preço(£)": "preco",
+    "Rating": "rating",
+    "Disponibilidade": "disponibilidade",
+    "Categoria": "categoria",
+    "URL da Imagem": "url_imagem",
+}
+
+
+def csv_field_names(header: List[str]) -> List[str]:
+    """Nome do campo de cada coluna de um cabeçalho de CSV (aceita os cabeçalhos localizados)."""
+    return [CSV_HEADER_ALIASES.get(name.strip(), name.strip()) for name in header]
+
+
+def record_error(record: BookRecord) -> str:
+    """Motivo de rejeição do registro ("" = aceito), com as mesmas regras da carga do CSV."""
+    if not isinstance(record.titulo, str) or not record.titulo.strip():
+        return "titulo vazio"
+    try:
+        preco = float(record.preco)
+    except (TypeError, ValueError):
+        return "preco invalido"
+    if not math.isfinite(preco):
+        return "preco invalido"
+    if preco < 0:
+        return "preco negativo"
+    try:
+        rating = float(record.rating)
+    except (TypeError, ValueError):
+        return "rating invalido"
+    if not math.isfinite(rating) or rating % 1 != 0 or not 0 <= rating <= MAX_RATING:
+        return "rating invalido"
+    return ""
+
+
+def _sorted_dictionary(values: Dict[str, int], codes: array) -> Tuple[List[str], np.ndarray]:
+    """Ordena o dicionário montado na ordem de chegada e remapeia os códigos (int32)."""
+    names = list(values)
+    if not names:
+        return [], np.empty(0, dtype=np.int32)
+    order = sorted(range(len(names)), key=names.__getitem__)
+    remap = np.empty(len(names), dtype=np.int32)
+    remap[order] = np.arange(len(names), dtype=np.int32)
+    return [names[code] for code in order], remap[np.asarray(codes)]
+
+
+class CatalogBuilder:
+    """
+    Monta um catálogo a partir de registros entregues um a um, sem passar por CSV.
+
+    Cada registro vai direto para colunas tipadas; categoria e disponibilidade são
+    codificadas na chegada (dicionário + códigos) e o dicionário é ordenado no fim,
+    como na carga do CSV. O id é o número do registro, então um registro rejeitado
+    não desloca os ids dos demais.
+
+    O índice de trigramas dos títulos e o JSON de cada linha também são montados na
+    chegada, enquanto o scraper ainda baixa as próximas páginas: depois do último
+    registro, `build` só junta as colunas e monta os índices numéricos.
+    """
+
+    def __init__(self, quarantine_path: Optional[str] = None):
+        self.quarantine_path = quarantine_path
+        self.count = 0
+        self._ids = array("q")
+        self._titulos: List[str] = []
+        self._precos = array("d")
+        self._ratings = array("b")
+        self._disponibilidades: Dict[str, int] = {}
+        self._disponibilidade_codes = array("i")
+        self._categorias: Dict[str, int] = {}
+        self._categoria_codes = array("i")
+        self._urls_imagem: List[str] = []
+        self._title_index = TrigramBuilder()
+        self._json_rows: List[bytes] = []
+        self._rejected: List[Tuple[str, int, BookRecord]] = []
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def append(self, record: BookRecord) -> bool:
+        """Adiciona o registro; False se ele foi rejeitado (vai para a quarentena)."""
+        self.count += 1
+        reason = record_error(record)
+        if reason:
+            self._rejected.append((reason, self.count, record))
+            return False
+
+        preco = float(record.preco)
+        rating = int(record.rating)
+        disponibilidade = record.disponibilidade or DEFAULT_LABEL
+        categoria = record.categoria or DEFAULT_LABEL
+        url_imagem = record.url_imagem or ""
+        self._ids.append(self.count)
+        self._titulos.append(record.titulo)
+        self._precos.append(preco)
+        self._ratings.append(rating)
+        self._disponibilidade_codes.append(self._disponibilidades.setdefault(disponibilidade, len(self._disponibilidades)))
+        self._categoria_codes.append(self._categorias.setdefault(categoria, len(self._categorias)))
+        self._urls_imagem.append(url_imagem)
+        self._title_index.add(record.titulo)
+        self._json_rows.append(encode_json_row({
+            'id': self.count,
+            'titulo': record.titulo,
+            'preco': preco,
+            'rating': rating,
+            'disponibilidade': disponibilidade,
+            'categoria': categoria,
+            'url_imagem': url_imagem,
+        }))
+        return True
+
+    def build(self) -> Catalog:
+        """Monta o catálogo (colunas + índices); o resumo fica em `catalog.load_report`."""
+        started = time.perf_counter()
+        disponibilidades, disponibilidade_codes = _sorted_dictionary(self._disponibilidades, self._disponibilidade_codes)
+        categorias, categoria_codes = _sorted_dictionary(self._categorias, self._categoria_codes)
+        catalog = Catalog(
+            ids=np.asarray(self._ids, dtype=np.int64),
+            titulos=np.asarray(self._titulos, dtype=object),
+            precos=np.asarray(self._precos, dtype=np.float64),
+            ratings=np.asarray(self._ratings, dtype=np.int8),
+            disponibilidade_codes=disponibilidade_codes,
+            disponibilidades=disponibilidades,
+            categoria_codes=categoria_codes,
+            categorias=categorias,
+            urls_imagem=np.asarray(self._urls_imagem, dtype=object),
+            title_index=self._title_index.build(),
+            json_rows=StringColumn.from_bytes(self._json_rows),
+        )
+
+        try:
+            quarantine = self._write_quarantine()
+        except OSError as e:
+            print(f"ERRO ao gravar relatório de quarentena: {e}")
+            quarantine = None
+
+        catalog.load_report = {
+            'rows_accepted': len(self),
+            'rows_rejected': len(self._rejected),
+            'load_seconds': round(time.perf_counter() - started, 4),
+            'quarantine_file': quarantine,
+        }
+        if self._rejected:
+            print(f"AVISO: {len(self._rejected)} registro(s) rejeitado(s); veja {quarantine}")
+        return catalog
+
+    def _write_quarantine(self) -> Optional[str]:
+        """Grava os registros rejeitados (com o motivo), no mesmo formato da carga do CSV."""
+        if self.quarantine_path is None:
+            return None
+        if not self._rejected:
+            if os.path.exists(self.quarantine_path):
+                os.remove(self.quarantine_path)
+            return None
+        with open(self.quarantine_path, "w", newline="", encoding="utf-8") as file:
+            writer = csv.writer(file)
+            writer.writerow(("motivo", "registro") + RECORD_FIELDS)
+            writer.writerows((reason, number) + tuple(record) for reason, number, record in self._rejected)
+        return self.quarantine_path
+
+
+# --- Destinos dos registros do scraper ---
+# Cada destino recebe os registros com `write` assim que a página é extraída,
+# publica o resultado com `commit(version)` e o descarta com `abort()`
+# (cancelamento, erro ou nenhuma mudança). Nada fica visível antes do commit.
+
+class CsvSink:
+    """Exporta os registros em CSV (colunas com os nomes dos campos do Livro)."""
+
+    name = "csv"
+
+    def __init__(self, path: str):
+        self.path = path
+        self._temp = f"{path}.tmp-{os.getpid()}"
+        self._file = None
+        self._writer = None
+
+    def _open(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(self._temp, "w", newline="", encoding="utf-8-sig")
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(RECORD_FIELDS)
+
+    def write(self, record: BookRecord) -> None:
+        if self._file is None:
+            self._open()
+        self._writer.writerow(record)
+
+    def commit(self, version: str) -> str:
+        """
+        Publica o CSV com um rename atômico. O mtime do arquivo é a própria versão,
+        então os workers não o tratam como dados novos (ver utils.data_version).
+        """
+        if self._file is None:
+            self._open()
+        self._file.close()
+        os.replace(self._temp, self.path)
+        os.utime(self.path, ns=(int(version), int(version)))
+        return self.path
+
+    def abort(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if os.path.exists(self._temp):
+            os.remove(self._temp)
+
+
+class CatalogSink:
+    """
+    Monta o catálogo em memória conforme os registros chegam e o entrega pronto a
+    `on_catalog` no commit (ex.: CatalogStore.publish, com o scraper no mesmo processo).
+    """
+
+    name = "catalog"
+
+    def __init__(self, on_catalog: Optional[Callable[[Catalog], Any]] = None, quarantine_path: Optional[str] = None):
+        self.on_catalog = on_catalog
+        self.builder = CatalogBuilder(quarantine_path)
+
+    def write(self, record: BookRecord) -> None:
+        self.builder.append(record)
+
+    def build(self, version: str) -> Catalog:
+        catalog = self.builder.build()
+        catalog.version = version
+        return catalog
+
+    def commit(self, version: str) -> Catalog:
+        catalog = self.build(version)
+        if self.on_catalog is not None:
+            self.on_catalog(catalog)
+        return catalog
+
+    def abort(self) -> None:
+        self.builder = CatalogBuilder(self.builder.quarantine_path)
+
+
+class SnapshotSink(CatalogSink):
+    """
+    Grava os registros direto no snapshot binário servido pela API (e na matriz de
+    similaridade) e o publica como a versão atual: os workers passam a servi-lo sem
+    ler nem converter CSV.
+    """
+
+    name = "snapshot"
+
+    def __init__(self, root: str = SNAPSHOT_DIR, quarantine_path: Optional[str] = None, similarity: bool = True):
+        super().__init__(quarantine_path=quarantine_path)
+        self.root = root
+        self.similarity = similarity
+
+    def commit(self, version: str) -> str:
+        catalog = self.build(version)
+        # Um crawl sem nenhum livro válido não substitui os dados servidos
+        if not catalog:
+            raise RuntimeError("Nenhum livro válido extraído; snapshot não publicado")
+        path = write_snapshot(catalog, version, self.root)
+        if self.similarity:
+            from similarity import write_similarity
+            write_similarity(catalog, version, self.root)
+        publish_snapshot(version, self.root)
+        return path
@@ -0,0 +1,217 @@
+import os
+import time
+import hashlib
+from collections import OrderedDict
+from typing import Callable, Iterable, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode
+
+# Limites padrão do cache de respostas
+CACHE_MAX_BYTES = 64 * 1024 * 1024
+CACHE_MAX_ENTRY_BYTES = 8 * 1024 * 1024
+CACHE_TTL_SECONDS = 300.0
+# RESPONSE_CACHE_ENABLED=0 desliga o cache (as rotas respondem direto, sem ETag)
+CACHE_ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "1").lower() not in ("0", "false", "no")
+
+
+class CachedResponse:
+    __slots__ = ("version", "status", "headers", "body", "etag", "expires")
+
+    def __init__(self, version: str, status: int, headers: List[Tuple[bytes, bytes]], body: bytes, etag: bytes, expires: float):
+        self.version = version
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.etag = etag
+        self.expires = expires
+
+
+class ResponseCache:
+    """
+    Cache LRU de respostas com TTL, limitado pelo total de bytes armazenados.
+
+    Cada entrada é marcada com a versão dos dados do catálogo: depois de um
+    recarregamento, entradas de versões anteriores deixam de ser usadas.
+    Com `enabled` False o middleware não passa pelo cache (nem calcula ETags).
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = CACHE_MAX_BYTES,
+        max_entry_bytes: int = CACHE_MAX_ENTRY_BYTES,
+        ttl: float = CACHE_TTL_SECONDS,
+        enabled: bool = CACHE_ENABLED,
+    ):
+        self.enabled = enabled
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes
+        self.ttl = ttl
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, CachedResponse]" = OrderedDict()
+
+    def get(self, key: str, version: str) -> Optional[CachedResponse]:
+        entry = self._entries.get(key)
+        if entry is None or entry.version != version or entry.expires < time.monotonic():
+            if entry is not None:
+                self._discard(key)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, key: str, entry: CachedResponse) -> None:
+        if len(entry.body) > self.max_entry_bytes:
+            return
+        self._discard(key)
+        self._entries[key] = entry
+        self.size += len(entry.body)
+        # Remove as entradas menos usadas até caber no limite de bytes
+        while self.size > self.max_bytes and self._entries:
+            self._discard(next(iter(self._entries)))
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.size = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _discard(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.size -= len(entry.body)
+
+
+def cache_key(path: str, query_string: bytes) -> str:
+    """Chave normalizada: caminho + parâmetros de query ordenados."""
+    query = parse_qsl(query_string.decode("latin-1"), keep_blank_values=True)
+    return f"{path}?{urlencode(sorted(query))}" if query else path
+
+
+def make_etag(body: bytes) -> bytes:
+    """ETag forte derivado do conteúdo do corpo."""
+    return b'"' + hashlib.sha1(body).hexdigest().encode("ascii") + b'"'
+
+
+def content_length(headers: Iterable[Tuple[bytes, bytes]]) -> int:
+    """Content-Length declarado pela rota (0 se ausente ou inválido)."""
+    for name, value in headers:
+        if name.lower() == b"content-length":
+            try:
+                return int(value)
+            except ValueError:
+                return 0
+    return 0
+
+
+def etag_matches(if_none_match: Optional[bytes], etag: bytes) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(b",")]
+    return etag in candidates or b"*" in candidates
+
+
+class ResponseCacheMiddleware:
+    """
+    Middleware ASGI que guarda as respostas GET das rotas de leitura.
+
+    - Respostas 200 ganham um ETag forte; um If-None-Match igual recebe 304 sem corpo.
+    - Acertos no cache são servidos sem chamar a rota.
+    - Respostas maiores que `max_entry_bytes` não são guardadas nem bufferizadas:
+      passam direto ao cliente assim que o limite é ultrapassado.
+    - A versão dos dados (`version_getter`) faz parte da validade de cada entrada.
+    """
+
+    def __init__(
+        self,
+        app,
+        cache: ResponseCache,
+        version_getter: Callable[[], Optional[str]],
+        prefixes: Iterable[str],
+        exclude: Iterable[str] = (),
+    ):
+        self.app = app
+        self.cache = cache
+        self.version_getter = version_getter
+        self.prefixes = tuple(prefixes)
+        self.exclude = tuple(exclude)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "GET" or not self.cache.enabled:
+            return await self.app(scope, receive, send)
+
+        path = scope["path"]
+        if not path.startswith(self.prefixes) or path.startswith(self.exclude):
+            return await self.app(scope, receive, send)
+
+        version = self.version_getter()
+        if version is None:
+            return await self.app(scope, receive, send)
+
+        key = cache_key(path, scope.get("query_string", b""))
+        if_none_match = dict(scope["headers"]).get(b"if-none-match")
+
+        entry = self.cache.get(key, version)
+        if entry is not None:
+            return await self._send_entry(send, entry, if_none_match)
+
+        # Executa a rota guardando a resposta enquanto ela couber em uma entrada do cache.
+        # Uma resposta maior (pelo Content-Length ou pelo corpo já recebido) deixa de ser
+        # guardada e passa direto ao cliente, sem ETag, conforme a rota a produz.
+        limit = self.cache.max_entry_bytes
+        start = {}
+        chunks = []
+        size = 0
+        streaming = False
+
+        async def capture(message):
+            nonlocal size, streaming
+            if streaming:
+                await send(message)
+            elif message["type"] == "http.response.start":
+                start.update(message)
+                if message.get("status", 500) != 200 or content_length(message.get("headers", [])) > limit:
+                    streaming = True
+                    await send(message)
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+                size += len(chunks[-1])
+                if size > limit:
+                    streaming = True
+                    await send(start)
+                    await send({"type": "http.response.body", "body": b"".join(chunks), "more_body": message.get("more_body", False)})
+                    chunks.clear()
+
+        await self.app(scope, receive, capture)
+        if streaming:
+            return
+
+        body = b"".join(chunks)
+        status = start.get("status", 500)
+        headers = [(name, value) for name, value in start.get("headers", []) if name.lower() != b"etag"]
+
+        if status != 200:
+            await send({"type": "http.response.start", "status": status, "headers": headers})
+            await send({"type": "http.response.body", "body": body})
+            return
+
+        entry = CachedResponse(
+            version=version,
+            status=status,
+            headers=headers,
+            body=body,
+            etag=make_etag(body),
+            expires=time.monotonic() + self.cache.ttl,
+        )
+        self.cache.put(key, entry)
+        await self._send_entry(send, entry, if_none_match)
+
+    async def _send_entry(self, send, entry: CachedResponse, if_none_match: Optional[bytes]):
+        if etag_matches(if_none_match, entry.etag):
+            await send({"type": "http.response.start", "status": 304, "headers": [(b"etag", entry.etag)]})
+            await send({"type": "http.response.body", "body": b""})
+            return
+        await send({"type": "http.response.start", "status": entry.status, "headers": entry.headers + [(b"etag", entry.etag)]})
+        await send({"type": "http.response.body", "body": entry.body})
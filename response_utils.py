@@ -0,0 +1,16 @@
+from fastapi import Response
+
+
+class PreEncodedJSONResponse(Response):
+    """
+    Resposta JSON cujo corpo já vem codificado em bytes.
+
+    Usada com os fragmentos JSON pré-codificados do catálogo: a lista é montada
+    juntando bytes, sem validar nem serializar cada linha pelo Pydantic. O
+    response_model da rota continua documentando o schema no OpenAPI.
+    """
+
+    media_type = "application/json"
+
+    def render(self, content: bytes) -> bytes:
+        return content
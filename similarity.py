@@ -0,0 +1,280 @@
+import os
+import threading
+import numpy as np
+from typing import TYPE_CHECKING, Optional, Tuple
+from catalog import Catalog
+from metrics import SPAN_INDEX_LOOKUP, span
+from snapshot import SNAPSHOT_DIR, snapshot_path
+from utils import CatalogNotReady
+
+# scipy e joblib são importados só quando a matriz é montada ou aberta (fora da inicialização do worker)
+if TYPE_CHECKING:
+    import scipy.sparse as sp
+
+# Arquivo da matriz de features, dentro do diretório do snapshot da versão
+SIMILARITY_FILE = "similarity.joblib"
+# Incrementado quando as features ou os pesos mudam (arquivos antigos são reconstruídos)
+SIMILARITY_FORMAT = 1
+
+# Peso de cada bloco de features na similaridade
+TITLE_WEIGHT = 1.0
+CATEGORY_WEIGHT = 0.6
+PRICE_WEIGHT = 0.3
+RATING_WEIGHT = 0.3
+
+# Tamanho máximo do vocabulário do TF-IDF dos títulos
+TFIDF_MAX_FEATURES = 50_000
+
+# Livros por lote nas consultas: lote x catálogo scores por vez (limita a memória)
+SCORE_BLOCK_CELLS = 4_000_000
+
+DEFAULT_SIMILAR = 10
+MAX_SIMILAR = 100
+
+
+def similarity_path(version: str, root: str = SNAPSHOT_DIR) -> str:
+    return os.path.join(snapshot_path(version, root), SIMILARITY_FILE)
+
+
+def build_features(catalog: Catalog) -> Tuple["sp.csr_matrix", np.ndarray]:
+    """
+    Features de cada livro: TF-IDF dos títulos e one-hot da categoria (parte
+    esparsa) e preço e rating normalizados para [0, 1] (parte densa, 2 colunas).
+
+    Cada bloco é normalizado e multiplicado pelo seu peso; depois cada linha é
+    normalizada (norma L2 = 1), de modo que a similaridade de cosseno entre dois
+    livros é só o produto escalar das linhas.
+    """
+    # Import local: o scikit-learn só é necessário para montar a matriz, não para as consultas
+    import scipy.sparse as sp
+    from sklearn.feature_extraction.text import TfidfVectorizer
+
+    rows = len(catalog)
+    titles = [catalog.titulos[pos] for pos in range(rows)]
+    vectorizer = TfidfVectorizer(
+        lowercase=True,
+        strip_accents="unicode",
+        stop_words="english",
+        sublinear_tf=True,
+        max_features=TFIDF_MAX_FEATURES,
+        dtype=np.float32,
+    )
+    try:
+        title_features = vectorizer.fit_transform(titles) * TITLE_WEIGHT
+    except ValueError:
+        # Nenhum termo no vocabulário (catálogo vazio ou títulos sem palavras)
+        title_features = sp.csr_matrix((rows, 0), dtype=np.float32)
+
+    category_features = sp.csr_matrix(
+        (np.full(rows, CATEGORY_WEIGHT, dtype=np.float32), catalog.categoria_codes, np.arange(rows + 1)),
+        shape=(rows, len(catalog.categorias)),
+    )
+    sparse = sp.hstack([title_features, category_features], format="csr", dtype=np.float32)
+
+    precos = np.asarray(catalog.precos, dtype=np.float64)
+    span_precos = float(precos.max() - precos.min()) if rows else 0.0
+    price = (precos - precos.min()) / span_precos if span_precos > 0 else np.zeros(rows)
+    rating = np.asarray(catalog.ratings, dtype=np.float64) / 5
+    dense = np.column_stack([price * PRICE_WEIGHT, rating * RATING_WEIGHT]).astype(np.float32)
+
+    norms = np.sqrt(np.asarray(sparse.multiply(sparse).sum(axis=1)).ravel() + (dense ** 2).sum(axis=1))
+    norms[norms == 0] = 1.0
+    sparse = sp.csr_matrix(sp.diags(1 / norms).dot(sparse), dtype=np.float32)
+    dense = (dense / norms[:, None]).astype(np.float32)
+    return sparse, dense
+
+
+class SimilarityIndex:
+    """
+    Matriz de features do catálogo para consultas de livros similares.
+
+    Guarda a parte esparsa por linha (features de cada livro) e transposta (livros
+    de cada termo/categoria, como um índice invertido): os scores de um lote de
+    livros só percorrem os livros que compartilham algum termo, mais um produto
+    denso com as duas colunas de preço e rating. O top-k usa argpartition, sem
+    ordenar o catálogo inteiro.
+    """
+
+    def __init__(self, sparse: "sp.csr_matrix", dense: np.ndarray, version: Optional[str] = None):
+        import scipy.sparse as sp
+
+        self.sparse = sp.csr_matrix(sparse)
+        self.postings = self.sparse.T.tocsr()
+        self.dense = np.asarray(dense, dtype=np.float32)
+        self.version = version
+
+    @classmethod
+    def build(cls, catalog: Catalog) -> "SimilarityIndex":
+        sparse, dense = build_features(catalog)
+        return cls(sparse, dense, catalog.version)
+
+    def __len__(self) -> int:
+        return self.sparse.shape[0]
+
+    # --- Persistência (joblib) ---
+    def save(self, path: str) -> None:
+        """Grava a matriz com joblib (arquivo temporário + rename atômico)."""
+        import joblib
+
+        temp = f"{path}.tmp-{os.getpid()}"
+        joblib.dump(
+            {
+                "format": SIMILARITY_FORMAT,
+                "version": self.version,
+                "sparse": self.sparse,
+                "postings": self.postings,
+                "dense": self.dense,
+            },
+            temp,
+        )
+        os.replace(temp, path)
+
+    @classmethod
+    def load(cls, path: str) -> Optional["SimilarityIndex"]:
+        """Abre a matriz gravada (arrays mapeados em memória); None se não existir ou for de outro formato."""
+        import joblib
+
+        try:
+            data = joblib.load(path, mmap_mode="r")
+        except (OSError, ValueError, EOFError, KeyError) as e:
+            if os.path.exists(path):
+                print(f"Matriz de similaridade {path} indisponível: {e}")
+            return None
+        if data.get("format") != SIMILARITY_FORMAT:
+            return None
+        index = cls.__new__(cls)
+        index.sparse = data["sparse"]
+        index.postings = data["postings"]
+        index.dense = data["dense"]
+        index.version = data["version"]
+        return index
+
+    # --- Consultas ---
+    def similar(self, positions: np.ndarray, k: int = DEFAULT_SIMILAR) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Os `k` livros mais similares a cada posição de `positions` (excluindo o próprio
+        livro), do mais para o menos similar. Retorna (posições, scores), ambos com
+        uma linha por livro consultado.
+        """
+        positions = np.asarray(positions, dtype=np.int64)
+        k = max(0, min(k, len(self) - 1))
+        neighbours = np.empty((len(positions), k), dtype=np.int64)
+        scores = np.empty((len(positions), k), dtype=np.float32)
+        if k == 0 or len(positions) == 0:
+            return neighbours, scores
+
+        block = max(1, SCORE_BLOCK_CELLS // len(self))
+        with span(SPAN_INDEX_LOOKUP):
+            for start in range(0, len(positions), block):
+                batch = positions[start:start + block]
+                neighbours[start:start + block], scores[start:start + block] = self._top_k(batch, k)
+        return neighbours, scores
+
+    def _top_k(self, batch: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        # Parte densa (preço e rating) para todo o catálogo, mais a esparsa só onde há termos em comum
+        block = self.dense[batch] @ self.dense.T
+        shared = self.sparse[batch] @ self.postings
+        rows = np.repeat(np.arange(len(batch)), np.diff(shared.indptr))
+        block[rows, shared.indices] += shared.data
+
+        # O próprio livro não é recomendado
+        block[np.arange(len(batch)), batch] = -np.inf
+
+        # argpartition acha os k maiores sem ordenar a linha inteira; só eles são ordenados
+        # (score decrescente, depois posição, para um resultado estável)
+        top = np.argpartition(-block, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(block, top, axis=1)
+        order = np.lexsort((top, -top_scores))
+        top = np.take_along_axis(top, order, axis=1)
+        return top, np.take_along_axis(top_scores, order, axis=1)
+
+
+def write_similarity(catalog: Catalog, version: str, root: str = SNAPSHOT_DIR) -> Optional[str]:
+    """Monta a matriz do catálogo e a grava junto do snapshot da versão (passo de build)."""
+    path = similarity_path(version, root)
+    if not os.path.isdir(os.path.dirname(path)):
+        return None
+    if SimilarityIndex.load(path) is None:
+        index = SimilarityIndex.build(catalog)
+        index.version = version
+        index.save(path)
+    return path
+
+
+class SimilarityNotReady(CatalogNotReady):
+    """A matriz de similaridade da versão atual ainda está sendo aberta ou montada."""
+
+
+class SimilarityStore:
+    """
+    Matriz de similaridade do snapshot atual do catálogo.
+
+    A matriz é montada uma vez por versão dos dados (write_similarity: pelo
+    scraper, por `python snapshot.py` ou pelo primeiro worker que não a encontra)
+    e os workers abrem o arquivo mapeado em memória. A preparação começa em
+    background logo depois da troca do catálogo (`schedule`), sem atrasar a
+    readiness. As consultas nunca abrem nem montam a matriz: enquanto ela não
+    está pronta, `get` responde SimilarityNotReady (503), mesmo com o worker pronto.
+    """
+
+    def __init__(self, root: str = SNAPSHOT_DIR):
+        self.root = root
+        self._lock = threading.Lock()
+        self._catalog: Optional[Catalog] = None
+        self._index: Optional[SimilarityIndex] = None
+        self._pending: Optional[Catalog] = None
+
+    def get(self, catalog: Catalog) -> SimilarityIndex:
+        """Matriz do catálogo informado; SimilarityNotReady se ela ainda não foi preparada."""
+        index = self._index
+        if self._catalog is catalog and index is not None:
+            return index
+        self.schedule(catalog)
+        raise SimilarityNotReady()
+
+    def ready(self, catalog: Catalog) -> bool:
+        """A matriz do catálogo informado já está aberta?"""
+        return self._catalog is catalog and self._index is not None
+
+    def schedule(self, catalog: Catalog) -> None:
+        """Prepara a matriz do catálogo em uma thread de background (não bloqueia)."""
+        if self._pending is catalog or self.ready(catalog):
+            return
+        self._pending = catalog
+        threading.Thread(target=self._background_prepare, args=(catalog,), daemon=True).start()
+
+    def prepare(self, catalog: Catalog) -> SimilarityIndex:
+        """Abre (ou monta) a matriz do catálogo e passa a servi-la (síncrono, fora das requisições)."""
+        with self._lock:
+            if self._catalog is not catalog or self._index is None:
+                index = self._load_or_build(catalog)
+                self._index, self._catalog = index, catalog
+            return self._index
+
+    def _background_prepare(self, catalog: Catalog) -> None:
+        try:
+            self.prepare(catalog)
+        except Exception as e:
+            print(f"ERRO ao preparar a matriz de similaridade: {e}")
+        finally:
+            if self._pending is catalog:
+                self._pending = None
+
+    def _load_or_build(self, catalog: Catalog) -> SimilarityIndex:
+        if catalog.version is not None:
+            path = similarity_path(catalog.version, self.root)
+            index = SimilarityIndex.load(path)
+            if index is not None and len(index) == len(catalog):
+                return index
+            try:
+                write_similarity(catalog, catalog.version, self.root)
+                index = SimilarityIndex.load(path)
+                if index is not None and len(index) == len(catalog):
+                    return index
+            except OSError as e:
+                print(f"ERRO ao gravar a matriz de similaridade: {e}")
+        # Sem snapshot em disco (ou falha ao gravar): matriz só em memória
+        return SimilarityIndex.build(catalog)
+
+
+SIMILARITY_STORE = SimilarityStore()
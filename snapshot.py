@@ -0,0 +1,121 @@
+import os
+import json
+import shutil
+import numpy as np
+from typing import Optional
+from catalog import Catalog
+
+SNAPSHOT_DIR = "Data/snapshot"
+META_FILE = "meta.json"
+# Versão publicada pelo scraper (snapshot gravado direto dos registros, sem CSV)
+CURRENT_FILE = "CURRENT"
+# Incrementado quando o conjunto de arrays do snapshot (ou a normalização dos textos) muda (snapshots antigos são ignorados)
+SNAPSHOT_FORMAT = 4
+
+
+def snapshot_path(version: str, root: str = SNAPSHOT_DIR) -> str:
+    return os.path.join(root, f"v{version}-f{SNAPSHOT_FORMAT}")
+
+
+def write_snapshot(catalog: Catalog, version: str, root: str = SNAPSHOT_DIR) -> str:
+    """
+    Grava o catálogo (colunas + índices) como arquivos .npy e um meta.json.
+
+    Cada versão dos dados ganha seu próprio diretório. O conteúdo é gravado em um
+    diretório temporário e publicado com um rename atômico, então um worker nunca
+    enxerga um snapshot pela metade. Versões antigas são removidas (workers que
+    ainda as mapeiam continuam lendo as páginas já abertas).
+    """
+    target = snapshot_path(version, root)
+    if os.path.exists(os.path.join(target, META_FILE)):
+        return target
+
+    os.makedirs(root, exist_ok=True)
+    temp = os.path.join(root, f".tmp-{version}-{os.getpid()}")
+    shutil.rmtree(temp, ignore_errors=True)
+    os.makedirs(temp)
+
+    arrays = catalog.to_arrays()
+    for name, array in arrays.items():
+        np.save(os.path.join(temp, f"{name}.npy"), np.ascontiguousarray(array), allow_pickle=False)
+
+    meta = catalog.to_meta()
+    meta['version'] = version
+    meta['arrays'] = sorted(arrays)
+    with open(os.path.join(temp, META_FILE), "w", encoding="utf-8") as file:
+        json.dump(meta, file, ensure_ascii=False)
+
+    try:
+        os.rename(temp, target)
+    except OSError:
+        # Outro worker publicou a mesma versão primeiro
+        shutil.rmtree(temp, ignore_errors=True)
+
+    for entry in os.listdir(root):
+        path = os.path.join(root, entry)
+        if path != target and entry.startswith("v"):
+            shutil.rmtree(path, ignore_errors=True)
+
+    return target
+
+
+def publish_snapshot(version: str, root: str = SNAPSHOT_DIR) -> None:
+    """Marca a versão como a atual (arquivo CURRENT, trocado com um rename atômico)."""
+    temp = os.path.join(root, f".{CURRENT_FILE}-{os.getpid()}")
+    with open(temp, "w", encoding="utf-8") as file:
+        file.write(version)
+    os.replace(temp, os.path.join(root, CURRENT_FILE))
+
+
+def published_version(root: str = SNAPSHOT_DIR) -> Optional[str]:
+    """Versão publicada pelo scraper; None se nenhum snapshot foi publicado."""
+    try:
+        with open(os.path.join(root, CURRENT_FILE), encoding="utf-8") as file:
+            version = file.read().strip()
+    except OSError:
+        return None
+    return version if version.isdigit() else None
+
+
+def _load_array(path: str) -> np.ndarray:
+    try:
+        return np.load(path, mmap_mode="r", allow_pickle=False)
+    except ValueError:
+        # Arrays vazios não podem ser mapeados em memória
+        return np.load(path, allow_pickle=False)
+
+
+def load_snapshot(version: str, root: str = SNAPSHOT_DIR) -> Optional[Catalog]:
+    """
+    Carrega o snapshot da versão informada mapeando os arquivos em memória (somente leitura).
+
+    As páginas mapeadas são compartilhadas pelo sistema operacional entre todos os
+    workers, então a memória não cresce com o número de processos.
+    Retorna None se não houver snapshot dessa versão.
+    """
+    path = snapshot_path(version, root)
+    if not os.path.exists(os.path.join(path, META_FILE)):
+        return None
+    try:
+        with open(os.path.join(path, META_FILE), encoding="utf-8") as file:
+            meta = json.load(file)
+        arrays = {name: _load_array(os.path.join(path, f"{name}.npy")) for name in meta['arrays']}
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Snapshot {path} indisponível: {e}")
+        return None
+
+    return Catalog.from_arrays(arrays, meta)
+
+
+if __name__ == "__main__":
+    # Passo de build: compila o CSV atual em um snapshot binário
+    from ingest import load_data
+    from utils import data_version
+    from similarity import write_similarity
+
+    version = data_version()
+    catalog = load_data()
+    if not catalog or version is None:
+        raise SystemExit("Nenhum dado carregado; snapshot não gerado.")
+    print(f"Snapshot gravado em: {write_snapshot(catalog, version)} ({len(catalog)} livros)")
+    print(f"Matriz de similaridade gravada em: {write_similarity(catalog, version)}")
@@ -0,0 +1,35 @@
+import os
+import sys
+import pytest
+
+# Os testes importam os módulos do projeto pela raiz (como a API e os Scripts)
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from records import BookRecord, CatalogBuilder
+
+BOOKS = [
+    BookRecord("A Light in the Attic", 51.77, 3, "In stock", "Poetry", "https://example.com/1.jpg"),
+    BookRecord("Tipping the Velvet", 53.74, 1, "In stock", "Historical Fiction", "https://example.com/2.jpg"),
+    BookRecord("Soumission", 50.10, 1, "In stock", "Fiction", "https://example.com/3.jpg"),
+    BookRecord("Sharp Objects", 47.82, 4, "In stock", "Mystery", "https://example.com/4.jpg"),
+    BookRecord("Sapiens: A Brief History of Humankind", 54.23, 5, "In stock", "History", "https://example.com/5.jpg"),
+    BookRecord("The Requiem Red", 22.65, 1, "Out of stock", "Young Adult", "https://example.com/6.jpg"),
+    BookRecord("The Dirty Little Secrets of Getting Your Dream Job", 33.34, 4, "In stock", "Business", "https://example.com/7.jpg"),
+    BookRecord("The Black Maria", 52.15, 1, "In stock", "Poetry", "https://example.com/8.jpg"),
+]
+
+
+def build_catalog(records=BOOKS, version="1"):
+    builder = CatalogBuilder()
+    for record in records:
+        builder.append(record)
+    catalog = builder.build()
+    catalog.version = version
+    return catalog
+
+
+@pytest.fixture
+def catalog():
+    return build_catalog()
@@ -0,0 +1,95 @@
+import os
+import time
+import sqlite3
+import pytest
+from jose import JWTError
+
+import auth_utils
+from auth_utils import RevokedTokens, VerifiedTokenCache, create_access_token, revoke_token, token_digest, verify_token
+
+
+@pytest.fixture
+def revoked(tmp_path, monkeypatch):
+    store = RevokedTokens(str(tmp_path / "revoked.sqlite3"))
+    monkeypatch.setattr(auth_utils, "REVOKED_TOKENS", store)
+    monkeypatch.setattr(auth_utils, "TOKEN_CACHE", VerifiedTokenCache())
+    return store
+
+
+def test_verify_uses_cache(revoked):
+    token = create_access_token({"username": "admin"})
+    assert verify_token(token)["username"] == "admin"
+    assert auth_utils.TOKEN_CACHE.hits == 1
+
+
+def test_revoke_rejects_cached_token(revoked):
+    token = create_access_token({"username": "admin"})
+    verify_token(token)
+    assert revoke_token(token)
+    with pytest.raises(JWTError):
+        verify_token(token)
+
+
+def test_revocation_is_shared_between_workers(revoked):
+    # Outro worker: mesma base, conexão e cache próprios
+    other_worker = RevokedTokens(revoked.path)
+    token = create_access_token({"username": "admin"})
+    verify_token(token)
+    other_worker.add(token_digest(token), time.time() + 60)
+    with pytest.raises(JWTError):
+        verify_token(token)
+
+
+def test_expired_revocations_are_dropped(revoked):
+    revoked.add(b"expired", time.time() - 1)
+    revoked.add(b"active", time.time() + 60)
+    assert b"expired" not in revoked
+    assert b"active" in revoked
+    assert len(revoked) == 1
+
+
+def test_revoke_invalid_token(revoked):
+    assert not revoke_token("nao-e-um-jwt")
+
+
+def test_lookup_does_not_create_the_database(revoked):
+    token = create_access_token({"username": "admin"})
+    verify_token(token)
+    assert not os.path.exists(revoked.path)
+
+
+def test_unreadable_list_keeps_serving(revoked, monkeypatch):
+    token = create_access_token({"username": "admin"})
+    assert revoke_token(token)
+
+    def broken():
+        raise sqlite3.OperationalError("database is locked")
+
+    # Outro worker muda a geração, mas a base não pode ser lida
+    monkeypatch.setattr(revoked, "_connect", broken)
+    os.replace(revoked.generation_path, revoked.generation_path + ".old")
+    other = create_access_token({"username": "outro"})
+    assert verify_token(other)["username"] == "outro"
+    # O que já estava na lista em memória continua recusado
+    with pytest.raises(JWTError):
+        verify_token(token)
+
+
+def test_logout_returns_503_when_the_list_cannot_be_written(revoked, monkeypatch):
+    from fastapi.testclient import TestClient
+    from fastapi import FastAPI
+    from api import auth
+
+    def broken():
+        raise sqlite3.OperationalError("attempt to write a readonly database")
+
+    monkeypatch.setattr(revoked, "_connect", broken)
+    app = FastAPI()
+    app.include_router(auth.router)
+    token = create_access_token({"username": "admin"})
+    client = TestClient(app)
+    response = client.post("/v1/auth/logout", headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 503
+    # Este worker já recusa o token
+    response = client.post("/v1/auth/logout", headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 401
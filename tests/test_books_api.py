@@ -0,0 +1,72 @@
+import asyncio
+import json
+import pytest
+from fastapi.testclient import TestClient
+
+import utils
+from models import Livro
+from utils import CatalogStore
+
+
+@pytest.fixture
+def client(catalog, monkeypatch):
+    import main
+
+    store = CatalogStore(lambda: catalog)
+    store.publish(catalog)
+    # Sem recarga: a versão em disco é sempre a do catálogo do teste
+    monkeypatch.setattr(utils, "data_version", lambda *args, **kwargs: catalog.version)
+    monkeypatch.setattr(utils, "CATALOG_STORE", store)
+    monkeypatch.setattr(main, "CATALOG_STORE", store)
+    monkeypatch.setattr(main.RESPONSE_CACHE, "enabled", False)
+    return TestClient(main.app)
+
+
+def ids(response):
+    return [book["id"] for book in response.json()]
+
+
+def test_price_range_route(client):
+    assert ids(client.get("/api/v1/books/price-range?min=47.82&max=52.15")) == [1, 3, 4, 8]
+    assert ids(client.get("/api/v1/books/price-range?min=50&sort=desc")) == [5, 2, 8, 1, 3]
+    assert ids(client.get("/api/v1/books/price-range?min=50&sort=asc&offset=1&limit=2")) == [1, 8]
+    assert client.get("/api/v1/books/price-range?min=60").status_code == 404
+    assert client.get("/api/v1/books/price-range?min=5&max=5").status_code == 400
+    assert client.get("/api/v1/books/price-range?sort=preco").status_code == 422
+
+
+def test_price_range_cursor_follows_price_order(client):
+    first = client.get("/api/v1/books/price-range?sort=asc&limit=3")
+    assert ids(first) == [6, 7, 4]
+    cursor = first.headers["X-Next-Cursor"]
+    assert ids(client.get(f"/api/v1/books/price-range?sort=asc&limit=3&after={cursor}")) == [3, 1, 8]
+
+
+def test_export_streams_ndjson(client, catalog):
+    response = client.get("/api/v1/books/export")
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    rows = [Livro(**json.loads(line)) for line in response.text.splitlines()]
+    assert rows == [Livro(**row) for row in catalog.rows()]
+
+    response = client.get("/api/v1/books/export?after=3&limit=2")
+    assert [json.loads(line)["id"] for line in response.text.splitlines()] == [4, 5]
+
+
+def test_export_sends_fixed_size_chunks(client, monkeypatch):
+    from api import books
+
+    monkeypatch.setattr(books, "EXPORT_CHUNK_ROWS", 3)
+
+    async def chunks():
+        response = await books.export_books(limit=None, after=None)
+        return [chunk async for chunk in response.body_iterator]
+
+    sizes = [chunk.count(b"\n") for chunk in asyncio.run(chunks())]
+    assert sizes == [3, 3, 2]
+
+
+def test_list_routes_return_pre_encoded_rows(client, catalog):
+    response = client.get("/api/v1/books/?ids=5,1")
+    assert response.headers["content-type"] == "application/json"
+    assert response.content == catalog.encode_rows(catalog.positions([5, 1]))
+    assert [Livro(**row) for row in response.json()] == [Livro(**row) for row in catalog.rows(catalog.positions([5, 1]))]
@@ -0,0 +1,117 @@
+import json
+import numpy as np
+import pytest
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from conftest import BOOKS, build_catalog
+from models import Livro
+from records import BookRecord
+
+
+def test_positions_dedupes_in_request_order(catalog):
+    positions = catalog.positions([5, 1, 5, 99, 3, 1])
+    assert catalog.ids[positions].tolist() == [5, 1, 3]
+
+
+def test_paginate_id_order(catalog):
+    page, cursor = catalog.paginate(limit=3)
+    assert catalog.ids[page].tolist() == [1, 2, 3]
+    page, cursor = catalog.paginate(limit=3, after=cursor)
+    assert catalog.ids[page].tolist() == [4, 5, 6]
+    page, cursor = catalog.paginate(limit=3, after=cursor)
+    assert catalog.ids[page].tolist() == [7, 8]
+    assert cursor is None
+
+
+def test_paginate_cursor_survives_removed_book(catalog):
+    # O livro do cursor não está mais no resultado: continua a partir do próximo id
+    positions = catalog.positions([1, 2, 4, 5])
+    page, _ = catalog.paginate(positions, limit=2, after=3)
+    assert catalog.ids[page].tolist() == [4, 5]
+
+
+def test_paginate_repeated_ids_terminates(catalog):
+    positions = catalog.positions([5, 1, 5, 3])
+    seen, cursor = [], None
+    for _ in range(10):
+        page, cursor = catalog.paginate(positions, limit=1, after=cursor, in_id_order=False)
+        seen += catalog.ids[page].tolist()
+        if cursor is None:
+            break
+    assert seen == [5, 1, 3]
+    assert cursor is None
+
+
+def test_paginate_unknown_cursor(catalog):
+    with pytest.raises(ValueError):
+        catalog.paginate(catalog.positions([5, 1]), limit=1, after=3, in_id_order=False)
+
+
+def test_aggregates_match_columns(catalog):
+    overview = catalog.aggregates.overview()
+    assert overview['total_livros'] == 8
+    assert overview['preco_medio'] == round(float(catalog.precos.sum()) / 8, 2)
+    assert {row['rating']: row['count'] for row in overview['distribuicao_ratings']} == {1: 4, 2: 0, 3: 1, 4: 2, 5: 1}
+    poetry = next(row for row in catalog.aggregates.categories() if row['categoria'] == 'Poetry')
+    assert poetry == {'categoria': 'Poetry', 'total_livros': 2, 'preco_medio': round((51.77 + 52.15) / 2, 2)}
+
+
+def test_price_range_bounds_are_inclusive(catalog):
+    positions = catalog.price_range(47.82, 52.15)
+    assert catalog.ids[positions].tolist() == [1, 3, 4, 8]
+    assert len(catalog.price_range(60, float("inf"))) == 0
+
+
+def test_price_range_sort(catalog):
+    asc = catalog.price_range(0, float("inf"), sort="asc")
+    assert catalog.precos[asc].tolist() == sorted(catalog.precos.tolist())
+    desc = catalog.price_range(0, float("inf"), sort="desc")
+    assert desc.tolist() == asc[::-1].tolist()
+
+
+def test_price_range_ties_keep_catalog_order():
+    records = [BookRecord(f"Livro {n}", price, 1, "In stock", "Poetry", "") for n, price in enumerate([5.0, 3.0, 5.0, 3.0, 5.0])]
+    catalog = build_catalog(records)
+    assert catalog.ids[catalog.price_range(3.0, 5.0, sort="asc")].tolist() == [2, 4, 1, 3, 5]
+    assert catalog.ids[catalog.price_range(4.0, 5.0)].tolist() == [1, 3, 5]
+
+
+def test_rating_and_category_bitmaps_match_columns(catalog):
+    assert catalog.ids[catalog.with_rating(1)].tolist() == [2, 3, 6, 8]
+    assert catalog.ids[catalog.with_rating(4, 5)].tolist() == [4, 5, 7]
+    assert len(catalog.with_rating(2)) == 0
+
+    # "fiction" casa com Fiction e Historical Fiction
+    bitmap = catalog.category_bitmap("fiction")
+    assert catalog.ids[catalog.category_bitmaps.positions(bitmap)].tolist() == [2, 3]
+    # AND de dois filtros direto sobre os bitsets
+    both = bitmap & catalog.rating_bitmaps.any_of([1])
+    assert catalog.ids[catalog.rating_bitmaps.positions(both)].tolist() == [2, 3]
+    assert catalog.category_names() == sorted({book.categoria for book in BOOKS})
+
+
+def test_bitmap_index_counts_and_unknown_values():
+    from indexes import BitmapIndex
+
+    codes = np.array([0, 2, 2, 1, 0, 2, 2, 2, 1], dtype=np.int32)
+    index = BitmapIndex(codes, cardinality=4)
+    assert index.counts.tolist() == [2, 2, 5, 0]
+    assert index.count([0, 2]) == 7
+    assert index.positions(index.any_of([1, 3, 99])).tolist() == [3, 8]
+    assert index.positions(index.bitmap(-1)).tolist() == []
+
+
+def test_pre_encoded_rows_match_pydantic_response():
+    records = BOOKS + [BookRecord('Aspas "duplas" \\ e ção – ☃', 10.0, 0, "In stock", "Ficção", "https://example.com/é.jpg")]
+    catalog = build_catalog(records)
+    expected = JSONResponse(jsonable_encoder([Livro(**row) for row in catalog.rows()])).body
+    assert catalog.encode_rows() == expected
+    assert catalog.encode_row(len(catalog) - 1) == JSONResponse(jsonable_encoder(Livro(**catalog.row(len(catalog) - 1)))).body
+
+
+def test_ndjson_is_one_pydantic_row_per_line(catalog):
+    positions = np.array([4, 0, 7])
+    lines = catalog.encode_ndjson(positions).decode("utf-8").splitlines()
+    assert [Livro(**json.loads(line)) for line in lines] == [Livro(**row) for row in catalog.rows(positions)]
+    assert catalog.encode_ndjson(np.array([], dtype=np.int64)) == b""
@@ -0,0 +1,80 @@
+import os
+import time
+import pytest
+
+import utils
+from utils import RELOAD_RETRY_SECONDS, CatalogStore
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def data_file(tmp_path, monkeypatch):
+    # Só o arquivo do teste define a versão (sem o snapshot publicado do repositório)
+    monkeypatch.setattr(utils, "published_version", lambda root=None: None)
+    path = tmp_path / "Livros.csv"
+    path.write_text("titulo\n")
+    return path
+
+
+def test_reload_publishes_new_version(data_file, catalog):
+    store = CatalogStore(lambda: catalog, path=str(data_file), check_interval=0)
+    store.reload()
+    assert store.get() is catalog
+    assert catalog.version == str(os.stat(data_file).st_mtime_ns)
+
+    os.utime(data_file, ns=(time.time_ns() + 10**9,) * 2)
+    store._loader = lambda: type(catalog).empty()
+    store.get()
+    wait_for(lambda: store.generation == 2 or store._failed_version is not None)
+    # Um catálogo vazio não substitui os dados servidos
+    assert store.get() is catalog
+
+
+def test_failed_version_waits_for_backoff_or_new_data(data_file):
+    calls = []
+
+    def loader():
+        calls.append(time.monotonic())
+        raise ValueError("arquivo quebrado")
+
+    store = CatalogStore(loader, path=str(data_file), check_interval=0)
+    with pytest.raises(ValueError):
+        store.reload()
+
+    # A mesma versão não é recarregada a cada verificação
+    for _ in range(20):
+        store.get()
+    time.sleep(0.05)
+    assert len(calls) == 1
+
+    # Dados novos: tenta de novo na hora
+    os.utime(data_file, ns=(time.time_ns() + 10**9,) * 2)
+    store.get()
+    wait_for(lambda: len(calls) == 2 and not store._reloading)
+    assert store.error == "arquivo quebrado"
+
+    # A versão nova também falhou: volta à espera inicial
+    assert store._retry_at - time.monotonic() > RELOAD_RETRY_SECONDS * 0.9
+    store.get()
+    time.sleep(0.05)
+    assert len(calls) == 2
+
+    # Passada a espera, a mesma versão é tentada de novo e a espera seguinte dobra
+    store._retry_at = 0.0
+    store.get()
+    wait_for(lambda: len(calls) == 3 and not store._reloading)
+    assert store._failures == 2
+    assert store._retry_at - time.monotonic() > RELOAD_RETRY_SECONDS * 1.9
+
+
+def test_configure_replaces_data_source(data_file, catalog, tmp_path):
+    store = CatalogStore(lambda: type(catalog).empty(), path=str(tmp_path / "ausente.csv"))
+    store.configure(loader=lambda: catalog, path=str(data_file))
+    assert store.reload() is catalog
+    assert store.get().version == str(os.stat(data_file).st_mtime_ns)
@@ -0,0 +1,86 @@
+import threading
+import time
+import pytest
+from fastapi.testclient import TestClient
+
+import utils
+from catalog import Catalog
+from utils import CatalogStore
+
+
+@pytest.fixture
+def app_with_loader(monkeypatch):
+    """main.app com a primeira carga feita pelo `loader` informado (em background, no lifespan)."""
+    import main
+
+    def install(loader):
+        store = CatalogStore(loader)
+        monkeypatch.setattr(utils, "data_version", lambda *args, **kwargs: "1")
+        monkeypatch.setattr(utils, "CATALOG_STORE", store)
+        monkeypatch.setattr(main, "CATALOG_STORE", store)
+        monkeypatch.setattr("api.health.CATALOG_STORE", store)
+        monkeypatch.setattr(main.RESPONSE_CACHE, "enabled", False)
+        return main.app
+
+    return install
+
+
+def wait_ready(client, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while True:
+        response = client.get("/api/v1/health/ready")
+        if response.json()["status"] != "loading":
+            return response
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_worker_serves_liveness_then_becomes_ready(app_with_loader, catalog):
+    release = threading.Event()
+
+    def loader():
+        release.wait(5)
+        return catalog
+
+    with TestClient(app_with_loader(loader)) as client:
+        # Primeira carga em andamento: vivo, mas não pronto, e as rotas de dados pedem para tentar depois
+        assert client.get("/api/v1/health/live").status_code == 200
+        ready = client.get("/api/v1/health/ready")
+        assert (ready.status_code, ready.json()["status"]) == (503, "loading")
+        assert client.get("/api/v1/health/").json()["data_source"] == "carregando"
+        books = client.get("/api/v1/books/")
+        assert books.status_code == 503 and "Retry-After" in books.headers
+
+        release.set()
+        ready = wait_ready(client)
+        assert (ready.status_code, ready.json()["status"], ready.json()["rows"]) == (200, "ready", len(catalog))
+        assert len(client.get("/api/v1/books/").json()) == len(catalog)
+        assert client.get("/api/v1/health/").json()["data_source"] == "ok"
+
+
+def test_empty_load_is_not_ready(app_with_loader):
+    with TestClient(app_with_loader(Catalog.empty)) as client:
+        ready = wait_ready(client)
+        assert (ready.status_code, ready.json()["status"]) == (503, "no_data")
+
+
+def test_failed_load_reports_the_error(app_with_loader):
+    def loader():
+        raise ValueError("CSV quebrado")
+
+    with TestClient(app_with_loader(loader)) as client:
+        ready = wait_ready(client)
+        assert (ready.status_code, ready.json()["status"]) == (503, "no_data")
+        assert ready.json()["error"] == "CSV quebrado"
+
+
+def test_lifespan_starts_and_stops_the_profiler(app_with_loader, catalog, monkeypatch):
+    import main
+    from profiler import SamplingProfiler
+
+    profiler = SamplingProfiler(interval=0.001)
+    monkeypatch.setattr(main, "PROFILER_ENABLED", True)
+    monkeypatch.setattr(main, "PROFILER", profiler)
+    with TestClient(app_with_loader(lambda: catalog)):
+        assert profiler.running
+    assert not profiler.running
@@ -0,0 +1,54 @@
+import numpy as np
+
+from indexes import IdIndex, TrigramIndex
+from conftest import BOOKS
+
+
+def test_dense_index():
+    index = IdIndex(np.array([1, 2, 3, 5]))
+    assert index.get(5) == 3
+    assert index.get(4) is None
+    assert index.get(-1) is None
+    assert index.get_many([5, 4, 1]).tolist() == [3, -1, 0]
+
+
+def test_sparse_index():
+    index = IdIndex(np.array([10, 1_000_000, 7]))
+    assert index._dense is None
+    assert index.get(1_000_000) == 1
+    assert index.get(8) is None
+    assert index.get_many([7, 8, 10]).tolist() == [2, -1, 0]
+
+
+def test_get_many_ignores_ids_outside_int64():
+    for ids in (np.array([1, 2, 3]), np.array([10, 1_000_000, 7])):
+        index = IdIndex(ids)
+        huge = 99999999999999999999999
+        assert index.get_many([huge, -huge]).tolist() == [-1, -1]
+        assert index.get_many([huge, int(ids[0])]).tolist() == [-1, 0]
+
+
+TITLES = [book.titulo for book in BOOKS] + [
+    "Straße der Sterne", "STRASSE", "İstanbul Nights", "ΟΔΥΣΣΕΙΑ", "Οδυσσεια", "ﬁnal ﬂight", "Final Flight",
+]
+QUERIES = ["ß", "ss", "strasse", "straße", "i̇st", "ist", "σσ", "ς", "ﬁ", "fi", "the", "a", "", "zzz", "mission"]
+
+
+def naive(query):
+    # Semântica original da rota de busca: `consulta.lower() in texto.lower()`
+    return [pos for pos, title in enumerate(TITLES) if query.lower() in title.lower()]
+
+
+def test_trigram_search_matches_naive_lower_scan():
+    index = TrigramIndex(TITLES)
+    every = np.arange(len(TITLES))
+    for query in QUERIES:
+        expected = naive(query)
+        assert index.search(query).tolist() == expected, query
+        assert np.flatnonzero(index.matches(query, every)).tolist() == expected, query
+        assert index.estimate(query) >= len(expected), query
+
+
+def test_sharp_s_does_not_match_ss():
+    index = TrigramIndex(TITLES)
+    assert TITLES.index("Soumission") not in index.search("ß").tolist()
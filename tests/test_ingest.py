@@ -0,0 +1,68 @@
+import csv
+import pytest
+
+pytest.importorskip("pandas")
+
+from ingest import load_data
+
+CSV = (
+    "Título,Preço(£),Rating,Disponibilidade,Categoria,URL da Imagem\n"
+    "A Light in the Attic,51.77,3,In stock,Poetry,https://example.com/1.jpg\n"
+    ",10.00,2,In stock,Poetry,https://example.com/2.jpg\n"
+    "Preço quebrado,abc,2,In stock,Poetry,https://example.com/3.jpg\n"
+    "Rating alto,12.00,9,In stock,Poetry,https://example.com/4.jpg\n"
+    "Soumission,50.10,1,In stock,Fiction,https://example.com/5.jpg\n"
+    "Campos a mais,1.00,1,In stock,Poetry,https://example.com/6.jpg,extra,extra\n"
+)
+
+
+@pytest.fixture
+def csv_file(tmp_path):
+    path = tmp_path / "Livros.csv"
+    path.write_text(CSV, encoding="utf-8")
+    return path
+
+
+def test_invalid_rows_are_quarantined(csv_file, tmp_path):
+    quarantine = tmp_path / "quarentena.csv"
+    catalog = load_data(str(csv_file), quarantine_path=str(quarantine))
+
+    # Só as linhas inválidas saem; os ids seguem o número do registro no CSV
+    assert [catalog.titulos[pos] for pos in range(len(catalog))] == ["A Light in the Attic", "Soumission"]
+    assert catalog.ids.tolist() == [1, 5]
+
+    report = catalog.load_report
+    assert (report["rows_accepted"], report["rows_rejected"]) == (2, 4)
+    assert report["quarantine_file"] == str(quarantine)
+
+    with open(quarantine, newline="", encoding="utf-8") as file:
+        rows = list(csv.DictReader(file))
+    reasons = [row["motivo"] for row in rows]
+    assert reasons[:3] == ["titulo vazio", "preco invalido", "rating invalido"]
+    assert reasons[3].startswith("linha malformada")
+    assert [row["registro"] for row in rows[:3]] == ["2", "3", "4"]
+
+
+def test_clean_load_removes_old_quarantine(csv_file, tmp_path):
+    quarantine = tmp_path / "quarentena.csv"
+    quarantine.write_text("antigo\n")
+    csv_file.write_text(CSV.splitlines()[0] + "\n" + CSV.splitlines()[1] + "\n", encoding="utf-8")
+    catalog = load_data(str(csv_file), quarantine_path=str(quarantine))
+    assert catalog.load_report["rows_rejected"] == 0
+    assert not quarantine.exists()
+
+
+def test_ingest_numbers_are_exposed_as_metrics(csv_file, tmp_path, monkeypatch):
+    import main
+    from metrics import METRICS
+    from utils import CatalogStore
+
+    catalog = load_data(str(csv_file), quarantine_path=str(tmp_path / "quarentena.csv"))
+    store = CatalogStore(lambda: catalog)
+    store.publish(catalog)
+    monkeypatch.setattr(main, "CATALOG_STORE", store)
+
+    text = METRICS.render()
+    assert 'catalog_ingest_rows{result="accepted"} 2' in text
+    assert 'catalog_ingest_rows{result="rejected"} 4' in text
+    assert "catalog_ingest_seconds " in text
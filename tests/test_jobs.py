@@ -0,0 +1,113 @@
+import os
+import pytest
+
+from jobs import CANCELLED, FAILED, QUEUED, RUNNING, SUCCEEDED, JobAlreadyRunning, JobStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return JobStore(str(tmp_path / "jobs.sqlite3"))
+
+
+def test_lifecycle(store):
+    job = store.create("scrape", username="admin")
+    assert job["status"] == QUEUED
+    assert store.start(job["id"], os.getpid())
+    assert store.get(job["id"])["status"] == RUNNING
+
+    assert not store.update_progress(job["id"], pages_done=3, requests=5)
+    store.finish(job["id"], SUCCEEDED, result={"added": 2})
+    job = store.get(job["id"])
+    assert (job["status"], job["pages_done"], job["result"]) == (SUCCEEDED, 3, {"added": 2})
+    assert store.latest("scrape")["id"] == job["id"]
+
+
+def test_only_one_active_job_per_kind(store):
+    job = store.create("scrape")
+    store.start(job["id"], os.getpid())
+    with pytest.raises(JobAlreadyRunning) as error:
+        store.create("scrape")
+    assert error.value.job["id"] == job["id"]
+    # Outro processo (outro worker) vê o mesmo job ativo
+    assert JobStore(store.path).active("scrape")["id"] == job["id"]
+
+
+def test_cancel_running_job(store):
+    job = store.create("scrape")
+    store.start(job["id"], os.getpid())
+    assert store.request_cancel(job["id"])["cancel_requested"]
+    assert store.update_progress(job["id"], 1, 1)
+    store.finish(job["id"], CANCELLED)
+    assert store.get(job["id"])["status"] == CANCELLED
+
+
+def test_cancel_before_start(store):
+    job = store.create("scrape")
+    assert store.request_cancel(job["id"])["status"] == CANCELLED
+    assert not store.start(job["id"], os.getpid())
+
+
+def test_lost_process_is_marked_failed(store):
+    job = store.create("scrape")
+    # pid que não existe: o processo do job morreu sem encerrar o job
+    store.start(job["id"], 2 ** 22 + 12345)
+    assert store.active("scrape") is None
+    assert store.get(job["id"])["status"] == FAILED
+
+
+@pytest.fixture
+def client(store, monkeypatch):
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from api import scrap
+    from auth_utils import get_current_user
+    from models import AuthenticatedUser
+
+    started = []
+
+    def start_job_process(job_id):
+        # No lugar do subprocesso: o job fica "rodando" com o pid do teste
+        started.append(job_id)
+        store.start(job_id, os.getpid())
+
+    monkeypatch.setattr(scrap, "JOB_STORE", store)
+    monkeypatch.setattr(scrap, "start_job_process", start_job_process)
+    app = FastAPI()
+    app.include_router(scrap.router)
+    app.dependency_overrides[get_current_user] = lambda: AuthenticatedUser(username="admin")
+    client = TestClient(app)
+    client.started = started
+    return client
+
+
+def test_scrap_routes_create_report_and_conflict(client, store):
+    assert client.get("/v1/scrap_status").json()["job"] is None
+
+    response = client.post("/v1/scrap")
+    assert response.status_code == 202
+    job_id = response.json()["job_id"]
+    assert client.started == [job_id]
+
+    status = client.get("/v1/scrap_status").json()
+    assert status["running"] and status["job"]["id"] == job_id
+
+    # Um job em andamento: o segundo pedido é recusado sem iniciar outro processo
+    assert client.post("/v1/scrap").status_code == 409
+    assert client.started == [job_id]
+
+    store.finish(job_id, SUCCEEDED, result={"added": 1})
+    status = client.get("/v1/scrap_status").json()
+    assert (status["running"], status["success"]) == (False, True)
+    assert [job["id"] for job in client.get("/v1/scrap/history").json()] == [job_id]
+
+
+def test_scrap_route_marks_job_failed_when_process_cannot_start(client, store, monkeypatch):
+    from api import scrap
+
+    def fail(job_id):
+        raise FileNotFoundError("Scripts/ScrapeJob.py")
+
+    monkeypatch.setattr(scrap, "start_job_process", fail)
+    assert client.post("/v1/scrap").status_code == 500
+    assert store.latest(scrap.JOB_KIND)["status"] == FAILED
+    assert client.post("/v1/scrap/cancel").status_code == 404
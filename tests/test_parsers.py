@@ -0,0 +1,107 @@
+import os
+import sys
+import time
+import threading
+from functools import partial
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Scripts"))
+pytest.importorskip("bs4")
+
+from FixtureServer import FixtureSite
+from ParserCheck import FIXTURE_BASE_URL, parseAll, sitePages
+from WebScrap import PARSER_BACKENDS, ParsePool, ScrapeCancelled, SoupBackend, createParserBackend, parseListing
+
+CATEGORIES = ["Poetry", "Science & Nature", "Young Adult", "Mystery"]
+
+
+@pytest.fixture(scope="module")
+def pages():
+    # Mais de uma página por listagem, e títulos/categorias com caracteres escapados no HTML
+    books = [
+        {
+            "id": number,
+            "title": f"Book {number} & \"Friends\" <{number % 7}> – Édition",
+            "price": round(10 + number * 1.37, 2),
+            "rating": number % 5 + 1,
+            "stock": "In stock" if number % 3 else "Out of stock",
+            "category": CATEGORIES[number % len(CATEGORIES)],
+            "image": f"cache/{number:02x}/cover.jpg",
+        }
+        for number in range(1, 46)
+    ]
+    return sitePages(FixtureSite(books))
+
+
+@pytest.mark.parametrize("name", [name for name in PARSER_BACKENDS if name != "bs4"])
+def test_backend_matches_beautifulsoup(name, pages):
+    backend = createParserBackend(name)
+    if backend.name != name:
+        pytest.skip(f"backend {name} não instalado")
+    expected = parseAll(pages, SoupBackend())
+    assert any(kind == "listing" and result["books"] for kind, result in expected)
+    assert parseAll(pages, backend) == expected
+
+
+def test_missing_optional_backend_falls_back_to_beautifulsoup(monkeypatch):
+    import WebScrap
+
+    def missing():
+        raise ImportError("selectolax")
+
+    monkeypatch.setitem(WebScrap.PARSER_BACKENDS, "selectolax", missing)
+    assert createParserBackend("selectolax").name == "bs4"
+    assert createParserBackend("auto").name in ("lxml", "bs4")
+
+
+def listing_pages(pages):
+    return [(url, html) for url, html in pages if 'class="product_page"' not in html][:4]
+
+
+def test_parse_pool_matches_in_process_parsing(pages):
+    parse = partial(parseListing, baseUrl=FIXTURE_BASE_URL)
+    pool = ParsePool(2, backendName="bs4", maxPending=2)
+    try:
+        results = [pool.parse(parse, html, url) for url, html in listing_pages(pages)]
+    finally:
+        pool.close()
+    assert results == [parseListing(html, url, FIXTURE_BASE_URL, SoupBackend()) for url, html in listing_pages(pages)]
+
+
+def test_parse_pool_cancel_while_waiting_for_a_slot(pages):
+    url, html = listing_pages(pages)[0]
+    cancel = threading.Event()
+    pool = ParsePool(1, backendName="bs4", maxPending=1, cancelEvent=cancel)
+    try:
+        # Fila cheia: o próximo parse espera por vaga até o cancelamento
+        assert pool.slots.acquire(timeout=1)
+        threading.Timer(0.2, cancel.set).start()
+        started = time.monotonic()
+        with pytest.raises(ScrapeCancelled):
+            pool.parse(partial(parseListing, baseUrl=FIXTURE_BASE_URL), html, url)
+        assert time.monotonic() - started < 5
+    finally:
+        pool.close(cancel=True)
+
+
+def test_parse_pool_close_cancels_queued_pages(pages):
+    url, html = listing_pages(pages)[0]
+    pool = ParsePool(1, backendName="bs4", maxPending=2)
+    # O único processo fica ocupado e a fila interna do executor cheia: a página
+    # seguinte fica pendente, ainda cancelável
+    for _ in range(3):
+        pool.executor.submit(time.sleep, 1)
+    errors, results = [], []
+
+    def parse():
+        try:
+            results.append(pool.parse(partial(parseListing, baseUrl=FIXTURE_BASE_URL), html, url))
+        except ScrapeCancelled as e:
+            errors.append(e)
+
+    thread = threading.Thread(target=parse)
+    thread.start()
+    time.sleep(0.2)
+    pool.close(cancel=True)
+    thread.join(10)
+    assert (len(errors), results) == (1, [])
@@ -0,0 +1,44 @@
+import threading
+import time
+
+from profiler import SamplingProfiler
+
+
+def busy(stop):
+    while not stop.is_set():
+        sum(range(1000))
+
+
+def test_start_stop_loop_with_busy_threads_does_not_deadlock():
+    stop = threading.Event()
+    workers = [threading.Thread(target=busy, args=(stop,), daemon=True) for _ in range(4)]
+    for worker in workers:
+        worker.start()
+    profiler = SamplingProfiler(interval=0.001)
+    try:
+        for _ in range(30):
+            assert profiler.start()
+            time.sleep(0.005)
+            done = threading.Event()
+            # stop() roda numa thread à parte para o teste falhar em vez de travar
+            threading.Thread(target=lambda: (profiler.stop(), done.set()), daemon=True).start()
+            assert done.wait(5.0), "stop() travou"
+            assert not profiler.running
+        assert "busy" in profiler.folded()
+    finally:
+        stop.set()
+
+
+def test_folded_is_available_while_sampling_and_after_stop():
+    profiler = SamplingProfiler(interval=0.001)
+    assert profiler.start()
+    assert not profiler.start()
+    time.sleep(0.05)
+    assert profiler.folded()
+    assert profiler.stop()
+    assert not profiler.stop()
+
+    status = profiler.status()
+    assert status["samples"] > 0 and not status["running"]
+    lines = profiler.folded().splitlines()
+    assert lines and all(line.rsplit(" ", 1)[1].isdigit() for line in lines)
@@ -0,0 +1,91 @@
+import random
+import numpy as np
+import pytest
+
+from query import BookQuery, execute_query, plan_query, top_k
+from records import BookRecord
+from conftest import build_catalog
+
+WORDS = ["love", "night", "the", "secret", "garden", "red", "city", "war", "sea", "light"]
+CATEGORIES = ["Poetry", "Fiction", "Historical Fiction", "Mystery", "Travel", "Science"]
+
+
+@pytest.fixture(scope="module")
+def big_catalog():
+    rng = random.Random(42)
+    records = [
+        BookRecord(
+            " ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 4))).title(),
+            round(rng.uniform(5, 60), 2),
+            rng.randint(1, 5),
+            rng.choice(["In stock", "Out of stock"]),
+            rng.choice(CATEGORIES),
+            "",
+        )
+        for _ in range(600)
+    ]
+    return build_catalog(records)
+
+
+def brute_force(catalog, query):
+    """Mesma consulta por varredura completa das colunas."""
+    keep = []
+    for pos in range(len(catalog)):
+        if query.title and query.title.lower() not in catalog.titulos[pos].lower():
+            continue
+        if query.category and query.category.lower() not in catalog.categorias[catalog.categoria_codes[pos]].lower():
+            continue
+        if query.min_price is not None and catalog.precos[pos] < query.min_price:
+            continue
+        if query.max_price is not None and catalog.precos[pos] > query.max_price:
+            continue
+        if query.min_rating is not None and catalog.ratings[pos] < query.min_rating:
+            continue
+        if query.max_rating is not None and catalog.ratings[pos] > query.max_rating:
+            continue
+        keep.append(pos)
+    positions = np.asarray(keep, dtype=np.int64)
+    if query.sort:
+        column = catalog.precos if query.sort.lstrip("-") == "price" else catalog.ratings
+        keys = column[positions].astype(np.float64) * (-1 if query.sort.startswith("-") else 1)
+        positions = positions[np.lexsort((positions, keys))]
+    return positions
+
+
+QUERIES = [
+    BookQuery(),
+    BookQuery(category="fiction"),
+    BookQuery(category="fiction", min_rating=4),
+    BookQuery(title="love", max_price=20),
+    BookQuery(title="night sea", category="poe"),
+    BookQuery(min_price=10, max_price=11, sort="-price"),
+    BookQuery(min_rating=2, max_rating=3, sort="rating"),
+    BookQuery(title="li", category="travel", min_price=30, sort="price"),
+    BookQuery(category="nenhuma"),
+]
+
+
+@pytest.mark.parametrize("query", QUERIES)
+def test_execute_query_matches_full_scan(big_catalog, query):
+    positions, _ = execute_query(big_catalog, query)
+    assert positions.tolist() == brute_force(big_catalog, query).tolist()
+
+
+@pytest.mark.parametrize("query", [query for query in QUERIES if query.sort])
+def test_top_matches_prefix_of_full_sort(big_catalog, query):
+    positions, _ = execute_query(big_catalog, query, top=5)
+    assert positions.tolist() == brute_force(big_catalog, query)[:5].tolist()
+
+
+def test_plan_orders_by_selectivity(big_catalog):
+    plan = plan_query(big_catalog, BookQuery(title="garden", category="i", min_price=0))
+    estimates = [estimate for _, estimate in plan]
+    assert estimates == sorted(estimates)
+    assert {predicate.name for predicate, _ in plan} == {"title", "category", "price"}
+
+
+def test_top_k_breaks_ties_by_position():
+    keys = np.array([2.0, 1.0, 1.0, 3.0, 1.0])
+    positions = np.array([10, 11, 12, 13, 14])
+    assert top_k(keys, positions, 2).tolist() == [11, 12]
+    assert top_k(keys, positions).tolist() == [11, 12, 14, 10, 13]
@@ -0,0 +1,73 @@
+import csv
+import os
+import numpy as np
+import pytest
+
+from conftest import BOOKS, build_catalog
+from records import RECORD_FIELDS, BookRecord, CatalogSink, CsvSink, SnapshotSink
+from snapshot import load_snapshot, published_version
+
+
+def test_builder_rejects_invalid_records_without_shifting_ids(tmp_path):
+    quarantine = tmp_path / "quarantine.csv"
+    records = [BOOKS[0], BookRecord("", 1.0, 1, "", "", ""), BookRecord("X", -1.0, 1, "", "", ""), BOOKS[1]]
+    sink = CatalogSink(quarantine_path=str(quarantine))
+    for record in records:
+        sink.write(record)
+    catalog = sink.build("1")
+    assert catalog.ids.tolist() == [1, 4]
+    assert catalog.load_report["rows_rejected"] == 2
+    with open(quarantine, newline="", encoding="utf-8") as file:
+        rows = list(csv.reader(file))
+    assert rows[0] == ["motivo", "registro", *RECORD_FIELDS]
+    assert [row[:2] for row in rows[1:]] == [["titulo vazio", "2"], ["preco negativo", "3"]]
+
+
+def test_catalog_sink_commit_calls_back():
+    received = []
+    sink = CatalogSink(on_catalog=received.append)
+    for record in BOOKS:
+        sink.write(record)
+    catalog = sink.commit("7")
+    assert received == [catalog]
+    assert catalog.version == "7"
+    assert catalog.encode_row(catalog.position(1)).startswith(b'{"id":1,"titulo":"A Light in the Attic"')
+
+
+def test_csv_sink_commit_and_abort(tmp_path):
+    path = tmp_path / "Livros.csv"
+    sink = CsvSink(str(path))
+    for record in BOOKS:
+        sink.write(record)
+    assert not path.exists()
+    sink.commit("1700000000000000000")
+    assert os.stat(path).st_mtime_ns == 1700000000000000000
+    with open(path, newline="", encoding="utf-8-sig") as file:
+        rows = list(csv.reader(file))
+    assert rows[0] == list(RECORD_FIELDS)
+    assert rows[1][0] == BOOKS[0].titulo
+
+    aborted = CsvSink(str(tmp_path / "Outro.csv"))
+    aborted.write(BOOKS[0])
+    aborted.abort()
+    assert os.listdir(tmp_path) == ["Livros.csv"]
+
+
+def test_snapshot_sink_publishes_loadable_snapshot(tmp_path):
+    sink = SnapshotSink(str(tmp_path), similarity=False)
+    for record in BOOKS:
+        sink.write(record)
+    sink.commit("5")
+    assert published_version(str(tmp_path)) == "5"
+    loaded = load_snapshot("5", str(tmp_path))
+    expected = build_catalog()
+    assert loaded.version == "5"
+    assert np.array_equal(loaded.precos, expected.precos)
+    assert loaded.encode_rows() == expected.encode_rows()
+
+
+def test_snapshot_sink_refuses_empty_catalog(tmp_path):
+    sink = SnapshotSink(str(tmp_path), similarity=False)
+    with pytest.raises(RuntimeError):
+        sink.commit("5")
+    assert published_version(str(tmp_path)) is None
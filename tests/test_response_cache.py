@@ -0,0 +1,109 @@
+import asyncio
+
+from response_cache import ResponseCache, ResponseCacheMiddleware, cache_key, make_etag
+
+
+def make_app(chunks, calls, content_length=None):
+    """Rota ASGI que responde os `chunks` em partes e registra cada chamada."""
+
+    async def app(scope, receive, send):
+        calls.append(scope["path"])
+        headers = [(b"content-type", b"application/json")]
+        if content_length is not None:
+            headers.append((b"content-length", str(content_length).encode()))
+        await send({"type": "http.response.start", "status": 200, "headers": headers})
+        for index, chunk in enumerate(chunks):
+            await send({"type": "http.response.body", "body": chunk, "more_body": index < len(chunks) - 1})
+
+    return app
+
+
+def request(middleware, path="/api/v1/books/", query=b"", headers=()):
+    sent = []
+
+    async def receive():
+        return {"type": "http.request"}
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "method": "GET", "path": path, "query_string": query, "headers": list(headers)}
+    asyncio.run(middleware(scope, receive, send))
+    return sent
+
+
+def middleware_for(app, cache, version="1"):
+    return ResponseCacheMiddleware(app, cache=cache, version_getter=lambda: version, prefixes=("/api/v1/books",))
+
+
+def test_cache_key_ignores_parameter_order():
+    assert cache_key("/api/v1/books/", b"b=2&a=1") == cache_key("/api/v1/books/", b"a=1&b=2")
+
+
+def test_etag_and_304_served_from_cache():
+    calls = []
+    middleware = middleware_for(make_app([b"[1,", b"2]"], calls), ResponseCache())
+    first = request(middleware)
+    etag = dict(first[0]["headers"])[b"etag"]
+    assert etag == make_etag(b"[1,2]")
+    assert first[1]["body"] == b"[1,2]"
+
+    second = request(middleware, headers=[(b"if-none-match", etag)])
+    assert second[0]["status"] == 304
+    assert calls == ["/api/v1/books/"]
+
+
+def test_new_data_version_invalidates_entry():
+    calls, version = [], ["1"]
+    cache = ResponseCache()
+    middleware = ResponseCacheMiddleware(make_app([b"[]"], calls), cache=cache, version_getter=lambda: version[0], prefixes=("/api/v1/books",))
+    request(middleware)
+    version[0] = "2"
+    request(middleware)
+    assert len(calls) == 2
+
+
+def test_large_content_length_is_streamed_through():
+    calls = []
+    cache = ResponseCache(max_entry_bytes=4)
+    middleware = middleware_for(make_app([b"0123", b"4567"], calls, content_length=8), cache)
+    sent = request(middleware)
+    assert [message.get("body") for message in sent[1:]] == [b"0123", b"4567"]
+    assert b"etag" not in dict(sent[0]["headers"])
+    assert len(cache) == 0
+
+
+def test_body_over_limit_stops_buffering():
+    sent = []
+    cache = ResponseCache(max_entry_bytes=4)
+
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"012", "more_body": True})
+        await send({"type": "http.response.body", "body": b"345", "more_body": True})
+        # Passou do limite: o que já veio foi entregue ao cliente antes do fim da rota
+        assert [message["type"] for message in sent] == ["http.response.start", "http.response.body"]
+        await send({"type": "http.response.body", "body": b"678", "more_body": False})
+
+    async def receive():
+        return {"type": "http.request"}
+
+    async def collect(message):
+        sent.append(message)
+
+    scope = {"type": "http", "method": "GET", "path": "/api/v1/books/", "query_string": b"", "headers": []}
+    asyncio.run(middleware_for(app, cache)(scope, receive, collect))
+    assert b"".join(message["body"] for message in sent[1:]) == b"012345678"
+    assert sent[-1]["more_body"] is False
+    assert len(cache) == 0
+
+
+def test_disabled_cache_passes_through():
+    calls = []
+    cache = ResponseCache(enabled=False)
+    middleware = middleware_for(make_app([b"[]"], calls), cache)
+    sent = request(middleware)
+    request(middleware)
+    assert len(calls) == 2
+    assert b"etag" not in dict(sent[0]["headers"])
+    assert len(cache) == 0
@@ -0,0 +1,108 @@
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Scripts"))
+WebScrap = pytest.importorskip("WebScrap")
+
+
+class FakeEngine:
+    """Engine sem rede: cada URL devolve a listagem cadastrada (None = falha)."""
+
+    baseUrl = "http://fixture/"
+
+    def __init__(self, listings):
+        self.listings = listings
+
+    def fetchAllParsed(self, urls, parse):
+        return [self.listings.get(url) for url in urls]
+
+    def iterParsed(self, urls, parse):
+        return iter(self.fetchAllParsed(urls, parse))
+
+
+def listing(pageCount, *titles):
+    return {"page_count": pageCount, "books": [{"title": title} for title in titles]}
+
+
+def test_crawl_listings_in_order():
+    engine = FakeEngine({
+        "http://fixture/a/index.html": listing(2, "a1"),
+        "http://fixture/a/page-2.html": listing(2, "a2"),
+        "http://fixture/b/index.html": listing(1, "b1"),
+    })
+    pages = list(WebScrap.crawlListings(engine, ["http://fixture/a/index.html", "http://fixture/b/index.html"]))
+    assert [(index, [book["title"] for book in books]) for index, books in pages] == [(0, ["a1"]), (0, ["a2"]), (1, ["b1"])]
+
+
+@pytest.mark.parametrize("missing", ["http://fixture/a/page-2.html", "http://fixture/b/index.html"])
+def test_failed_listing_page_stops_the_crawl(missing):
+    listings = {
+        "http://fixture/a/index.html": listing(2, "a1"),
+        "http://fixture/a/page-2.html": listing(2, "a2"),
+        "http://fixture/b/index.html": listing(1, "b1"),
+    }
+    del listings[missing]
+    with pytest.raises(WebScrap.ListingPageFailed):
+        list(WebScrap.crawlListings(FakeEngine(listings), ["http://fixture/a/index.html", "http://fixture/b/index.html"]))
+
+
+class RecordingSink:
+    name = "recording"
+
+    def __init__(self):
+        self.records, self.committed, self.aborted = [], False, False
+
+    def write(self, record):
+        self.records.append(record)
+
+    def commit(self, version):
+        self.committed = True
+
+    def abort(self):
+        self.aborted = True
+
+
+def test_failed_listing_page_publishes_nothing(tmp_path, monkeypatch):
+    def crawlBooks(engine, numPages=None, mode=None):
+        yield {"title": "a1", "price": 1.0, "rating": 1, "stock": "In stock", "category": "Poetry",
+               "image_url": "", "detail_url": "http://fixture/a1.html"}
+        raise WebScrap.ListingPageFailed("http://fixture/a/page-2.html")
+
+    monkeypatch.setattr(WebScrap, "crawlBooks", crawlBooks)
+    monkeypatch.setattr(WebScrap, "DATA_DIR", str(tmp_path))
+    monkeypatch.setattr(WebScrap, "STATE_FILE", str(tmp_path / "state.json"))
+    monkeypatch.setattr(WebScrap, "DELTA_FILE", str(tmp_path / "delta.json"))
+    sink = RecordingSink()
+    with pytest.raises(WebScrap.ListingPageFailed):
+        WebScrap.runScraping("http://fixture/", incremental=True, parseWorkers=0, sinks=[sink])
+    assert sink.aborted and not sink.committed
+    assert not os.path.exists(tmp_path / "state.json")
+
+
+@pytest.mark.parametrize("header, row", [
+    # Campos do BookRecord fora de ordem, com uma coluna extra
+    ("categoria,extra,url_imagem,titulo,rating,preco,disponibilidade",
+     "Poetry,x,https://example.com/media/cache/a.jpg,A Light in the Attic,3,51.77,In stock"),
+    # Cabeçalho localizado das versões anteriores do scraper
+    ("Título,Preço(£),Rating,Disponibilidade,Categoria,URL da Imagem",
+     "A Light in the Attic,51.77,3,In stock,Poetry,https://example.com/media/cache/a.jpg"),
+])
+def test_fixture_server_reads_columns_by_name(tmp_path, header, row):
+    from FixtureServer import loadBooks
+
+    path = tmp_path / "Livros.csv"
+    path.write_text(f"{header}\n{row}\n", encoding="utf-8")
+    assert loadBooks(str(path)) == [{
+        "id": 1, "title": "A Light in the Attic", "price": 51.77, "rating": 3,
+        "stock": "In stock", "category": "Poetry", "image": "cache/a.jpg",
+    }]
+
+
+def test_fixture_server_rejects_missing_columns(tmp_path):
+    from FixtureServer import loadBooks
+
+    path = tmp_path / "Livros.csv"
+    path.write_text("titulo,preco\nA,1\n", encoding="utf-8")
+    with pytest.raises(ValueError):
+        loadBooks(str(path))
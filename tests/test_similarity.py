@@ -0,0 +1,75 @@
+import time
+import asyncio
+import threading
+import pytest
+from fastapi import Response
+
+pytest.importorskip("sklearn")
+
+from similarity import SimilarityNotReady, SimilarityStore
+from utils import CatalogNotReady
+
+
+def test_get_does_not_build_on_request(catalog, tmp_path):
+    store = SimilarityStore(str(tmp_path))
+    with pytest.raises(SimilarityNotReady):
+        store.get(catalog)
+    # A preparação roda em background; a rota responde 503 (CatalogNotReady) enquanto isso
+    assert issubclass(SimilarityNotReady, CatalogNotReady)
+    deadline = time.monotonic() + 30
+    while True:
+        try:
+            index = store.get(catalog)
+            break
+        except SimilarityNotReady:
+            assert time.monotonic() < deadline
+            time.sleep(0.01)
+    assert len(index) == len(catalog)
+
+
+def test_prepare_then_query(catalog, tmp_path):
+    store = SimilarityStore(str(tmp_path))
+    index = store.prepare(catalog)
+    assert store.get(catalog) is index
+    neighbours, scores = index.similar(catalog.positions([1]), 3)
+    assert neighbours.shape == (1, 3)
+    assert 0 not in neighbours[0].tolist()
+    assert scores[0].tolist() == sorted(scores[0].tolist(), reverse=True)
+
+
+def test_readiness_does_not_wait_for_the_matrix(catalog, tmp_path, monkeypatch):
+    import similarity
+    from api import health
+    from utils import CatalogStore, prepare_similarity
+
+    store = SimilarityStore(str(tmp_path))
+    building = threading.Event()
+    release = threading.Event()
+    build = similarity.SimilarityIndex.build
+
+    def slow_build(catalog):
+        building.set()
+        release.wait(10)
+        return build(catalog)
+
+    monkeypatch.setattr(similarity, "SIMILARITY_STORE", store)
+    monkeypatch.setattr(similarity.SimilarityIndex, "build", staticmethod(slow_build))
+    catalog_store = CatalogStore(lambda: catalog, path=str(tmp_path / "Livros.csv"), after_publish=prepare_similarity)
+    monkeypatch.setattr(health, "CATALOG_STORE", catalog_store)
+    monkeypatch.setattr(health, "SIMILARITY_STORE", store)
+
+    # O reload publica e volta sem esperar a matriz
+    catalog_store.reload()
+    assert building.wait(10)
+    response = Response()
+    status = asyncio.run(health.readiness(response))
+    assert (response.status_code, status.status, status.similarity) == (200, "ready", "preparing")
+    with pytest.raises(SimilarityNotReady):
+        store.get(catalog)
+
+    release.set()
+    deadline = time.monotonic() + 30
+    while not store.ready(catalog):
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+    assert asyncio.run(health.readiness(Response())).similarity == "ready"
@@ -0,0 +1,60 @@
+import os
+
+from snapshot import CURRENT_FILE, load_snapshot, publish_snapshot, published_version, snapshot_path, write_snapshot
+from utils import data_version
+
+
+def test_round_trip_keeps_columns_and_indexes(catalog, tmp_path):
+    root = str(tmp_path)
+    write_snapshot(catalog, "100", root)
+    loaded = load_snapshot("100", root)
+
+    assert loaded.version == "100"
+    # Colunas mapeadas do arquivo (somente leitura), não cópias
+    assert not loaded.precos.flags.writeable and not loaded.precos.flags.owndata
+    assert loaded.rows() == catalog.rows()
+    assert loaded.encode_rows() == catalog.encode_rows()
+    # Os índices vêm do disco, não são reconstruídos
+    assert loaded.position(5) == catalog.position(5)
+    assert loaded.price_range(30, 52, sort="desc").tolist() == catalog.price_range(30, 52, sort="desc").tolist()
+    assert loaded.search(title="the", category="poe").tolist() == catalog.search(title="the", category="poe").tolist()
+    assert loaded.with_rating(1).tolist() == catalog.with_rating(1).tolist()
+    assert loaded.aggregates.overview() == catalog.aggregates.overview()
+
+
+def test_missing_or_broken_snapshot_is_none(catalog, tmp_path):
+    root = str(tmp_path)
+    assert load_snapshot("1", root) is None
+    path = write_snapshot(catalog, "1", root)
+    os.remove(os.path.join(path, "precos.npy"))
+    assert load_snapshot("1", root) is None
+
+
+def test_new_version_replaces_old_directories(catalog, tmp_path):
+    root = str(tmp_path)
+    old = write_snapshot(catalog, "1", root)
+    new = write_snapshot(catalog, "2", root)
+    assert not os.path.exists(old)
+    assert os.path.isdir(new) and new == snapshot_path("2", root)
+    assert not [entry for entry in os.listdir(root) if entry.startswith(".tmp")]
+
+
+def test_current_switches_the_served_version(catalog, tmp_path):
+    root = tmp_path / "snapshot"
+    csv_path = tmp_path / "Livros.csv"
+    csv_path.write_text("titulo\n")
+    csv_version = str(os.stat(csv_path).st_mtime_ns)
+    assert published_version(str(root)) is None
+    assert data_version(str(csv_path), str(root)) == csv_version
+
+    # O scraper publica uma versão mais nova que o CSV: ela passa a ser a servida
+    newer = str(int(csv_version) + 1)
+    write_snapshot(catalog, newer, str(root))
+    publish_snapshot(newer, str(root))
+    assert published_version(str(root)) == newer
+    assert data_version(str(csv_path), str(root)) == newer
+    assert load_snapshot(data_version(str(csv_path), str(root)), str(root)) is not None
+
+    # CURRENT inválido é ignorado
+    (root / CURRENT_FILE).write_text("lixo")
+    assert published_version(str(root)) is None
@@ -1,44 +1,243 @@
-import pandas as pd
-from typing import List, Dict, Any
+import os
+import time
+import threading
+from typing import Any, Callable, Optional
+from catalog import Catalog
+from snapshot import SNAPSHOT_DIR, load_snapshot, published_version, write_snapshot
 
 DATA_PATH = "Data/Livros.csv"
 
-def load_data() -> List[Dict[str, Any]]:
+# Espera antes de recarregar de novo uma versão dos dados que falhou (dobra a cada
+# falha seguida, até o máximo); uma versão nova é carregada sem esperar
+RELOAD_RETRY_SECONDS = 5.0
+RELOAD_RETRY_MAX_SECONDS = 300.0
+
+# Nomes da carga do CSV que continuam acessíveis por `utils` (ex.: from utils import load_data).
+# Ficam em ingest.py, importado só quando usado: o pandas não entra no caminho de serviço.
+INGEST_NAMES = (
+    "load_data", "QUARANTINE_PATH", "CSV_COLUMNS", "CSV_DTYPES",
+    "LOAD_CHUNK_ROWS", "MAX_RATING", "DEFAULT_LABEL",
+)
+
+
+def __getattr__(name: str):
+    if name in INGEST_NAMES:
+        import ingest
+        return getattr(ingest, name)
+    raise AttributeError(f"module 'utils' has no attribute '{name}'")
+
+
+def file_version(path: str = DATA_PATH) -> Optional[str]:
+    """Versão de um arquivo de dados: o seu mtime (ns)."""
+    try:
+        return str(os.stat(path).st_mtime_ns)
+    except OSError:
+        return None
+
+
+def data_version(path: str = DATA_PATH, root: str = SNAPSHOT_DIR) -> Optional[str]:
+    """
+    Versão dos dados: a mais recente entre o mtime (ns) do CSV e a versão do snapshot
+    publicado pelo scraper (também um instante em ns). Igual em todos os workers.
+    """
+    versions = [version for version in (file_version(path), published_version(root)) if version is not None]
+    return max(versions, key=int) if versions else None
+
+
+def load_catalog() -> Catalog:
     """
-    Carrega o arquivo CSV, pré-processa os dados e retorna uma lista de dicionários.
+    Carrega o catálogo a partir do snapshot binário da versão atual dos dados
+    (publicado pelo scraper ou compilado do CSV).
+
+    Se o snapshot ainda não existe, lê o CSV, grava o snapshot e o reabre mapeado
+    em memória, para que todos os workers compartilhem as mesmas páginas. A matriz
+    de similaridade não entra aqui: ela é montada depois da troca, em background
+    (prepare_similarity), sem atrasar a primeira carga.
+
+    Com o snapshot pronto, só numpy é usado: o pandas (ingest.py) é importado
+    apenas quando é preciso ler o CSV.
     """
+    for version in (data_version(), file_version()):
+        catalog = load_snapshot(version) if version is not None else None
+        if catalog is not None:
+            return catalog
+
+    # Sem snapshot: compila o CSV (export do scraper ou arquivo editado à mão)
+    version = file_version()
+    from ingest import load_data
+
+    catalog = load_data()
+    if version is None or not catalog:
+        return catalog
     try:
-        # Lê o CSV com cuidado: encoding, aspas e delimitador
-        df = pd.read_csv(
-            DATA_PATH,
-            sep=",",
-            quotechar='"',
-            encoding="utf-8"
-        )
-
-        # Normaliza nomes de colunas
-        df.columns = [
-            'titulo', 'preco', 'rating', 'disponibilidade',
-            'categoria', 'url_imagem'
-        ]
-
-        # Limpeza de dados
-        df['preco'] = df['preco'].astype(float)
-        df['rating'] = df['rating'].astype(int)
-        df['disponibilidade'] = df['disponibilidade'].fillna("Indefinido")
-        df['categoria'] = df['categoria'].fillna("Indefinido")
-        df['url_imagem'] = df['url_imagem'].fillna("")
-
-        # Adiciona ID sequencial
-        df.insert(0, 'id', range(1, len(df) + 1))
-
-        data = df.to_dict('records')
-        return data
-
-    except Exception as e:
-        print(f"ERRO ao carregar dados: {e}")
-        return []
-
-
-# Carrega os dados uma única vez na inicialização
-BOOKS_DATA = load_data()
+        write_snapshot(catalog, version)
+    except OSError as e:
+        print(f"ERRO ao gravar snapshot: {e}")
+        return catalog
+    return load_snapshot(version) or catalog
+
+
+class CatalogStore:
+    """
+    Guarda o snapshot atual do catálogo e o troca atomicamente.
+
+    Cada requisição pega uma referência ao snapshot (get) e a usa até o fim, então
+    continua lendo dados consistentes mesmo se houver uma troca no meio. A troca
+    só acontece depois que o novo catálogo e seus índices estão prontos.
+
+    Cada worker verifica a versão dos dados (mtime do CSV ou snapshot publicado pelo
+    scraper) no máximo uma vez a cada `check_interval` segundos; quando muda, o novo
+    snapshot é montado em uma thread de background, fora do caminho da requisição.
+
+    A primeira carga também roda em background (`start`, chamado no lifespan da
+    aplicação): o worker aceita conexões antes dos dados ficarem prontos, e
+    `loaded` indica quando a primeira tentativa de carga terminou.
+
+    Uma versão que falha ao carregar (erro ou catálogo vazio) é lembrada: ela só é
+    tentada de novo depois de RELOAD_RETRY_SECONDS (dobrando a cada falha, até
+    RELOAD_RETRY_MAX_SECONDS), ou assim que os dados mudarem de novo.
+
+    `after_publish` recebe cada catálogo recarregado logo depois da troca: é ali
+    que estruturas derivadas (ex.: a matriz de similaridade) começam a ser
+    preparadas, e não na primeira requisição que precisa delas. O hook não deve
+    bloquear: `loaded` (e a readiness) já vale antes dele terminar.
+    """
+
+    def __init__(
+        self,
+        loader: Callable[[], Catalog],
+        path: str = DATA_PATH,
+        check_interval: float = 2.0,
+        after_publish: Optional[Callable[[Catalog], Any]] = None,
+    ):
+        self._loader = loader
+        self._after_publish = after_publish
+        self._path = path
+        self._check_interval = check_interval
+        self._reload_lock = threading.Lock()
+        self._next_check = 0.0
+        self._reloading = False
+        self._failed_version: Optional[str] = None
+        self._failures = 0
+        self._retry_at = 0.0
+        self.generation = 0
+        self.loaded = False
+        self.error: Optional[str] = None
+        self._catalog = Catalog.empty()
+
+    def configure(self, loader: Optional[Callable[[], Catalog]] = None, path: Optional[str] = None) -> None:
+        """
+        Troca a origem dos dados (ex.: um catálogo sintético nos benchmarks e testes).
+        A troca vale a partir do próximo `reload`; as falhas anteriores são esquecidas.
+        """
+        with self._reload_lock:
+            if loader is not None:
+                self._loader = loader
+            if path is not None:
+                self._path = path
+            self._failed_version, self._failures = None, 0
+            self._next_check = 0.0
+
+    def start(self) -> None:
+        """Dispara a primeira carga em uma thread de background (não bloqueia)."""
+        if self._reloading or self.loaded:
+            return
+        self._reloading = True
+        self._next_check = time.monotonic() + self._check_interval
+        threading.Thread(target=self._background_reload, daemon=True).start()
+
+    def get(self) -> Catalog:
+        """Snapshot atual; dispara um recarregamento em background se os dados mudaram."""
+        now = time.monotonic()
+        if now >= self._next_check:
+            self._next_check = now + self._check_interval
+            if not self._reloading and self._should_reload(data_version(self._path), now):
+                self._reloading = True
+                threading.Thread(target=self._background_reload, daemon=True).start()
+        return self._catalog
+
+    def _should_reload(self, version: Optional[str], now: float) -> bool:
+        if version == self._catalog.version:
+            return False
+        return version != self._failed_version or now >= self._retry_at
+
+    def _record_failure(self, version: Optional[str]) -> float:
+        """Lembra a versão que falhou e agenda a próxima tentativa (backoff exponencial)."""
+        self._failures = self._failures + 1 if version == self._failed_version else 1
+        self._failed_version = version
+        delay = min(RELOAD_RETRY_MAX_SECONDS, RELOAD_RETRY_SECONDS * 2 ** (self._failures - 1))
+        self._retry_at = time.monotonic() + delay
+        return delay
+
+    def _background_reload(self):
+        try:
+            self.reload()
+        except Exception as e:
+            self.error = str(e)
+            print(f"ERRO ao carregar dados: {e}")
+        finally:
+            self.loaded = True
+            self._reloading = False
+
+    def reload(self) -> Catalog:
+        """Monta um novo snapshot e o publica (síncrono)."""
+        with self._reload_lock:
+            version = data_version(self._path)
+            start = time.perf_counter()
+            try:
+                catalog = self._loader()
+            except Exception:
+                delay = self._record_failure(version)
+                print(f"Versão {version} dos dados será tentada de novo em {delay:.0f}s (ou quando os dados mudarem)")
+                raise
+            catalog.version = version
+            catalog.load_seconds = round(time.perf_counter() - start, 4)
+
+            # Uma falha de carga não derruba os dados que já estão sendo servidos
+            if not catalog and self._catalog:
+                delay = self._record_failure(version)
+                print(f"ERRO ao recarregar dados: mantendo o snapshot atual (nova tentativa em {delay:.0f}s ou quando os dados mudarem)")
+                return self._catalog
+
+            self._failed_version, self._failures = None, 0
+            self.publish(catalog)
+            if self._after_publish is not None:
+                try:
+                    self._after_publish(catalog)
+                except Exception as e:
+                    print(f"ERRO ao preparar dados derivados do catálogo: {e}")
+            return catalog
+
+    def publish(self, catalog: Catalog) -> Catalog:
+        """
+        Troca o snapshot servido por um catálogo já montado (ex.: o CatalogSink do
+        scraper no mesmo processo). A versão do catálogo deve ser a dos dados em
+        disco; senão, a próxima verificação o substitui pelo que está no disco.
+        """
+        self._catalog = catalog
+        self.generation += 1
+        self.loaded = True
+        self.error = None
+        return catalog
+
+
+class CatalogNotReady(Exception):
+    """A primeira carga do catálogo ainda não terminou."""
+
+
+def prepare_similarity(catalog: Catalog) -> None:
+    """Começa a abrir (ou montar) a matriz de similaridade da nova versão, em background."""
+    from similarity import SIMILARITY_STORE
+    SIMILARITY_STORE.schedule(catalog)
+
+
+# Carregado no lifespan da aplicação (main.py); depois, recarrega quando o CSV muda
+CATALOG_STORE = CatalogStore(load_catalog, after_publish=prepare_similarity)
+
+
+def get_catalog() -> Catalog:
+    """Snapshot do catálogo para a requisição atual (CatalogNotReady durante a primeira carga)."""
+    catalog = CATALOG_STORE.get()
+    if not CATALOG_STORE.loaded:
+        raise CatalogNotReady()
+    return catalog